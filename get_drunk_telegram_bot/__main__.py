@@ -1,22 +1,91 @@
 import argparse
+import atexit
+import signal
 
-from get_drunk_telegram_bot.bot.server import create_server
+from get_drunk_telegram_bot.utils.profiling import StartupProfiler
 
 
 def parse_server_args():
     parser = argparse.ArgumentParser()
     parser.add_argument('--port', type=int, default='8888')
     parser.add_argument('--token', type=str, required=True)
-    parser.add_argument('--web-hook-url', type=str, required=True)
+    parser.add_argument('--mode', type=str, default='webhook', choices=['webhook', 'polling'])
+    parser.add_argument('--web-hook-url', type=str, default=None)
+    parser.add_argument('--offset-file', type=str, default='./offset.json')
+    parser.add_argument('--api-url', type=str, default='https://api.telegram.org')
+    parser.add_argument('--model-name', type=str, default='TFIdfCocktailModel')
+    parser.add_argument('--cache-dir', type=str, default=None)
+    parser.add_argument(
+        '--bert-inference-mode',
+        type=str,
+        default='eager',
+        choices=['eager', 'quantized', 'traced', 'quantized-traced'],
+    )
+    parser.add_argument('--num-threads', type=int, default=None)
+    parser.add_argument('--embed-workers', type=int, default=None)
+    parser.add_argument('--use-projection', action='store_true')
+    parser.add_argument('--rerank-top-n', type=int, default=None)
+    parser.add_argument('--similarity', type=str, default='exact', choices=['exact', 'quantized'])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--queue-size', type=int, default=100)
+    parser.add_argument('--http-pool-size', type=int, default=10)
+    parser.add_argument('--http-timeout', type=float, default=10)
+    parser.add_argument('--send-rate', type=float, default=30)
+    parser.add_argument('--chat-send-rate', type=float, default=1)
+    parser.add_argument('--dedup-window', type=int, default=10000)
+    parser.add_argument('--dedup-file', type=str, default=None)
+    parser.add_argument('--profile-startup', action='store_true')
     parser.add_argument('--debug', action='store_true')
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.mode == 'webhook' and args.web_hook_url is None:
+        parser.error('--web-hook-url is required in webhook mode')
+    return args
 
 
 if __name__ == '__main__':
     args = parse_server_args()
+    profiler = StartupProfiler()
+    with profiler.phase('imports'):
+        # imported here to measure how long the server imports take
+        from get_drunk_telegram_bot.bot.server import (
+            create_dedup,
+            create_handler,
+            create_poller,
+            create_server,
+        )
+
+    if args.num_threads is not None:
+        import torch
+
+        # process-wide, shared by the embeders and the STS cross-encoder
+        torch.set_num_threads(args.num_threads)
+
     if args.debug:
         print('Creating server...')
-    app = create_server(args)
+    if args.mode == 'polling':
+        get_drunk_bot = create_handler(args, None, profiler)
+        dedup = create_dedup(args)
+        poller = create_poller(get_drunk_bot, args.offset_file, dedup)
+    else:
+        app = create_server(args, profiler)
+        get_drunk_bot = app.extensions['get_drunk_bot']
+        dedup = app.extensions['update_dedup']
+    # the recent update ids are saved periodically and on exit
+    atexit.register(dedup.save)
+    # exit handlers run in reverse order: queued messages are processed
+    # first, then their replies are sent
+    atexit.register(get_drunk_bot.close)
+    if args.mode == 'webhook':
+        atexit.register(app.extensions['chat_dispatcher'].close)
+    if args.profile_startup:
+        print(f'Startup timings:\n{profiler.report()}')
+
+    # SIGHUP reloads the catalog and the model without dropping requests
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda *_: get_drunk_bot.reload_model())
 
-    # use_reloader is false due to problems with CUDA and multiprocessing
-    app.run(port=args.port, debug=args.debug, use_reloader=False)
+    if args.mode == 'polling':
+        poller.run()
+    else:
+        # use_reloader is false due to problems with CUDA and multiprocessing
+        app.run(port=args.port, debug=args.debug, use_reloader=False)
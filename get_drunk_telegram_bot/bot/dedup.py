@@ -0,0 +1,134 @@
+import logging
+import os
+import pathlib
+import threading
+from typing import Dict, Union
+
+import numpy as np
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+# marks a free slot of the ring buffer, update ids are non-negative
+_EMPTY = -1
+
+
+class UpdateDeduplicator:
+    """
+    UpdateDeduplicator remembers the ids of the most recent updates to
+    recognize updates Telegram delivers again.
+
+    The ids are kept in a fixed size ring buffer (the oldest id is forgotten
+    when a new one comes) and in a set for O(1) lookups.
+
+    :param size: int, number of remembered update ids (default=10000);
+
+    :param path: file the ids are saved to and loaded from at start, the ids
+        are kept in memory only if None (default=None);
+
+    :param save_every: int, the ids are saved after every save_every new
+        ids (default=100).
+    """
+
+    def __init__(
+        self,
+        size: int = 10000,
+        path: Union[str, pathlib.Path] = None,
+        save_every: int = 100,
+    ):
+        if size <= 0:
+            raise ValueError(f'size should be positive, got: {size}')
+
+        self.size = size
+        self.path = pathlib.Path(path) if path else None
+        self.save_every = save_every
+        self.hits = 0
+
+        self.__ids = np.full(size, _EMPTY, dtype=np.int64)
+        self.__position = 0
+        self.__seen = set()
+        self.__unsaved = 0
+        self.__lock = threading.Lock()
+        self.__save_lock = threading.Lock()
+        self.__load()
+
+    def __contains__(self, update_id: int) -> bool:
+        with self.__lock:
+            return update_id in self.__seen
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__seen)
+
+    def add(self, update_id: int) -> bool:
+        """
+        Remembers the update id.
+
+        :return: bool, True if the update is new, False if it was seen
+            already (counted as a hit).
+        """
+        with self.__lock:
+            if update_id in self.__seen:
+                self.hits += 1
+                return False
+
+            self.__push(update_id)
+            self.__unsaved += 1
+            save = self.path is not None and self.__unsaved >= self.save_every
+        if save:
+            self.save()
+        return True
+
+    def discard(self, update_id: int):
+        """
+        Forgets the update id, e.g. when the update was not accepted and will
+        be delivered again.
+        """
+        with self.__lock:
+            if update_id in self.__seen:
+                self.__seen.remove(update_id)
+                self.__ids[self.__ids == update_id] = _EMPTY
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {'size': len(self.__seen), 'capacity': self.size, 'hits': self.hits}
+
+    def save(self):
+        """
+        Saves the ids, oldest first. The file is replaced atomically.
+        """
+        if self.path is None:
+            return
+
+        with self.__save_lock:
+            with self.__lock:
+                ids = np.roll(self.__ids, -self.__position)
+                ids = ids[ids != _EMPTY]
+                self.__unsaved = 0
+
+            tmp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, ids)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def __push(self, update_id: int):
+        evicted = int(self.__ids[self.__position])
+        if evicted != _EMPTY:
+            self.__seen.discard(evicted)
+        self.__ids[self.__position] = update_id
+        self.__seen.add(update_id)
+        self.__position = (self.__position + 1) % self.size
+
+    def __load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            ids = np.load(self.path, allow_pickle=False)
+        except (OSError, ValueError) as e:
+            logging.warning(f'Ignored invalid update ids file {self.path}: {e}')
+            return
+
+        for update_id in ids[-self.size:]:
+            if int(update_id) not in self.__seen:
+                self.__push(int(update_id))
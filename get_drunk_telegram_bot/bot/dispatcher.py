@@ -0,0 +1,123 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Hashable
+
+import numpy as np
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+# number of the most recent queue latencies the percentiles are computed on
+_LATENCY_WINDOW = 1024
+
+
+class ChatDispatcher:
+    """
+    ChatDispatcher processes messages in a pool of worker threads.
+
+    Every worker owns a bounded queue and messages are sharded by chat_id,
+    so the messages of one chat are processed in order, one at a time, while
+    different chats are processed in parallel.
+
+    :param handle: callable(chat_id, text), processes one message;
+
+    :param n_workers: int, number of worker threads (default=4);
+
+    :param max_queue_size: int, max number of waiting messages per worker,
+        submit is rejected when the queue is full (default=100).
+    """
+
+    def __init__(
+        self,
+        handle: Callable[[Hashable, str], None],
+        n_workers: int = 4,
+        max_queue_size: int = 100,
+    ):
+        self.handle = handle
+        self.__queues = [queue.Queue(maxsize=max_queue_size) for _ in range(n_workers)]
+        self.__lock = threading.Lock()
+        self.__latencies = deque(maxlen=_LATENCY_WINDOW)
+        self.__counters = {'submitted': 0, 'rejected': 0, 'processed': 0, 'failed': 0}
+        self.__workers = [
+            threading.Thread(
+                target=self.__work, args=(messages,), name=f'chat-worker-{i}', daemon=True
+            )
+            for i, messages in enumerate(self.__queues)
+        ]
+        for worker in self.__workers:
+            worker.start()
+
+    def submit(self, chat_id: Hashable, text: str) -> bool:
+        """
+        Enqueues the message without waiting for it to be processed.
+
+        :return: bool, False if the chat queue is full and the message was
+            rejected.
+        """
+        messages = self.__queues[hash(chat_id) % len(self.__queues)]
+        try:
+            messages.put_nowait((chat_id, text, time.monotonic()))
+        except queue.Full:
+            self.__count('rejected')
+            logging.warning(f'Queue is full, rejected message for chat with id={chat_id}')
+            return False
+        self.__count('submitted')
+        return True
+
+    def join(self):
+        """
+        Blocks until all the submitted messages are processed.
+        """
+        for messages in self.__queues:
+            messages.join()
+
+    def close(self, timeout: float = None):
+        """
+        Processes the messages already submitted and stops the workers.
+        """
+        for messages in self.__queues:
+            messages.put(None)
+        for worker in self.__workers:
+            worker.join(timeout)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns message counters, current queue depth and the latency (in
+        seconds) between submit and the start of processing.
+        """
+        with self.__lock:
+            stats = dict(self.__counters)
+            latencies = np.array(self.__latencies)
+
+        stats['queue_depth'] = sum(messages.qsize() for messages in self.__queues)
+        stats['max_queue_depth'] = max(messages.qsize() for messages in self.__queues)
+        for name, percentile in [('p50', 50), ('p95', 95), ('max', 100)]:
+            value = np.percentile(latencies, percentile) if len(latencies) else 0.0
+            stats[f'queue_latency_{name}'] = float(value)
+        return stats
+
+    def __count(self, counter: str):
+        with self.__lock:
+            self.__counters[counter] += 1
+
+    def __work(self, messages: queue.Queue):
+        while True:
+            item = messages.get()
+            try:
+                if item is None:
+                    return
+
+                chat_id, text, submitted_at = item
+                with self.__lock:
+                    self.__latencies.append(time.monotonic() - submitted_at)
+                try:
+                    self.handle(chat_id, text)
+                except Exception:
+                    self.__count('failed')
+                    logging.exception(f'Failed to process message for chat with id={chat_id}')
+                else:
+                    self.__count('processed')
+            finally:
+                messages.task_done()
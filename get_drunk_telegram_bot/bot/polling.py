@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from typing import Callable, Dict, List, Union
+
+from get_drunk_telegram_bot.bot.telegram import TelegramClient
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+# max number of updates getUpdates returns at once
+MAX_UPDATES_LIMIT = 100
+# the read timeout exceeds the long polling timeout by this many seconds
+_READ_TIMEOUT_MARGIN = 10
+
+
+class UpdatePoller:
+    """
+    UpdatePoller receives updates with getUpdates long polling instead of a
+    webhook and hands every received batch to the handler at once.
+
+    The offset (the id of the next expected update) is saved to the file
+    only after the batch is handled, so a restarted bot continues from the
+    first unhandled update.
+
+    :param client: TelegramClient, used to call getUpdates;
+
+    :param handle_batch: callable(updates), processes the list of updates;
+
+    :param offset_path: file to keep the offset in, the offset is kept in
+        memory only if None (default=None);
+
+    :param limit: int, max number of updates per call (default=100);
+
+    :param timeout: int, long polling timeout in seconds (default=30);
+
+    :param error_delay: float, seconds to wait after a failed call
+        (default=1);
+
+    :param sleep: callable(seconds), used to wait after failures
+        (default=time.sleep).
+    """
+
+    def __init__(
+        self,
+        client: TelegramClient,
+        handle_batch: Callable[[List[Dict]], None],
+        offset_path: Union[str, pathlib.Path] = None,
+        limit: int = MAX_UPDATES_LIMIT,
+        timeout: int = 30,
+        error_delay: float = 1,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if not 1 <= limit <= MAX_UPDATES_LIMIT:
+            raise ValueError(f'limit should be in [1, {MAX_UPDATES_LIMIT}], got: {limit}')
+
+        self.client = client
+        self.handle_batch = handle_batch
+        self.offset_path = pathlib.Path(offset_path) if offset_path else None
+        self.limit = limit
+        self.timeout = timeout
+        self.error_delay = error_delay
+        self.sleep = sleep
+        self.offset = self.__load_offset()
+
+    def poll_once(self) -> int:
+        """
+        Fetches one batch of updates, handles it and saves the new offset.
+
+        :return: int, number of received updates.
+        """
+        data = {'limit': self.limit, 'timeout': self.timeout}
+        if self.offset:
+            data['offset'] = self.offset
+        response = self.client.call(
+            'getUpdates',
+            data=data,
+            timeout=(self.client.timeout[0], self.timeout + _READ_TIMEOUT_MARGIN),
+        )
+        if not response or not response.get('ok'):
+            logging.warning(f'getUpdates failed: {response}')
+            self.sleep(self.error_delay)
+            return 0
+
+        updates = [
+            update
+            for update in response.get('result') or []
+            if isinstance(update, dict) and isinstance(update.get('update_id'), int)
+        ]
+        if len(updates) == 0:
+            return 0
+
+        self.handle_batch(updates)
+        self.__save_offset(max(update['update_id'] for update in updates) + 1)
+        return len(updates)
+
+    def run(self, stop: threading.Event = None):
+        """
+        Polls until the stop event is set (forever if stop is None).
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                logging.exception('Failed to handle updates')
+                self.sleep(self.error_delay)
+
+    def __load_offset(self) -> int:
+        if self.offset_path is None or not self.offset_path.exists():
+            return 0
+        try:
+            return int(json.loads(self.offset_path.read_text())['offset'])
+        except (ValueError, KeyError, TypeError) as e:
+            logging.warning(f'Ignored invalid offset file {self.offset_path}: {e}')
+            return 0
+
+    def __save_offset(self, offset: int):
+        self.offset = offset
+        if self.offset_path is None:
+            return
+
+        # the file is replaced atomically, a crash keeps the previous offset
+        tmp_path = self.offset_path.with_name(f'{self.offset_path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'offset': offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.offset_path)
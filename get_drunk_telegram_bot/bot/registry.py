@@ -0,0 +1,147 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from get_drunk_telegram_bot.drinks.dataset import Dataset
+from get_drunk_telegram_bot.model import IModel
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+ModelFactory = Callable[..., IModel]
+
+
+class ModelRegistry:
+    """
+    ModelRegistry maps model names to factories. A factory is called as
+    factory(dataset, **options) and returns an IModel; options it doesn't
+    need should be ignored.
+    """
+
+    def __init__(self):
+        self.__factories: Dict[str, ModelFactory] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.__factories)
+
+    def register(self, name: str, factory: ModelFactory = None):
+        """
+        Registers factory under the name. Can be used as a decorator.
+        """
+        if factory is None:
+            return lambda factory: self.register(name, factory)
+
+        self.__factories[name] = factory
+        return factory
+
+    def create(self, name: str, dataset: Dataset, **options) -> IModel:
+        if name not in self.__factories:
+            raise ValueError(
+                f'Error in model_name. Available models: {self.names}, Got: {name}'
+            )
+        return self.__factories[name](dataset, **options)
+
+
+class Generation:
+    """
+    Generation is a model and the dataset it was built for, served together.
+    Values derived from the dataset (e.g. the recipes of the day) are kept in
+    derived, so they are replaced together with it.
+    """
+
+    def __init__(self, model: IModel, dataset: Dataset, version: int):
+        self.model = model
+        self.dataset = dataset
+        self.version = version
+        self.derived = {}
+        self.in_flight = 0
+        self.retired = False
+        self.released = threading.Event()
+
+
+class ModelSlot:
+    """
+    ModelSlot holds the current Generation and swaps it atomically.
+
+    Requests pin the generation they started with (acquire), so a swap never
+    changes the model under a running request. A replaced generation is
+    released as soon as its last in-flight request finishes.
+
+    :param model: IModel, initial model;
+
+    :param dataset: Dataset, initial dataset.
+    """
+
+    def __init__(self, model: IModel, dataset: Dataset):
+        self.__lock = threading.Lock()
+        self.__current = Generation(model, dataset, version=0)
+
+    @property
+    def current(self) -> Generation:
+        return self.__current
+
+    @contextmanager
+    def acquire(self):
+        with self.__lock:
+            generation = self.__current
+            generation.in_flight += 1
+        try:
+            yield generation
+        finally:
+            with self.__lock:
+                generation.in_flight -= 1
+                release = generation.retired and generation.in_flight == 0
+            if release:
+                self.__release(generation)
+
+    def swap(self, model: IModel, dataset: Dataset) -> Generation:
+        """
+        Makes model and dataset current, returns the replaced generation.
+        """
+        with self.__lock:
+            old = self.__current
+            self.__current = Generation(model, dataset, version=old.version + 1)
+            old.retired = True
+            release = old.in_flight == 0
+        if release:
+            self.__release(old)
+        return old
+
+    def swap_in_background(
+        self,
+        build: Callable[[], Tuple[IModel, Dataset]],
+        on_swap: Optional[Callable[[], None]] = None,
+    ) -> threading.Thread:
+        """
+        Builds a new (model, dataset) pair in a background thread and swaps
+        it in when ready. Requests are served by the current one meanwhile.
+
+        :param build: callable returning (model, dataset);
+
+        :param on_swap: callable, called after the swap succeeded
+            (default=None).
+        """
+
+        def run():
+            try:
+                model, dataset = build()
+            except Exception:
+                logging.exception('Failed to build a new model, keeping the current one')
+                return
+            old = self.swap(model, dataset)
+            logging.info(f'Model generation {old.version} replaced')
+            if on_swap is not None:
+                on_swap()
+
+        thread = threading.Thread(target=run, name='model-swap', daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def __release(generation: Generation):
+        generation.model = None
+        generation.dataset = None
+        generation.derived = {}
+        generation.released.set()
+        logging.info(f'Model generation {generation.version} released')
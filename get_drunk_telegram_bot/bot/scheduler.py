@@ -0,0 +1,308 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+# priorities, the lower is sent first
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BULK: 'bulk'}
+
+# number of the most recent delivery delays the percentiles are computed on
+_DELAY_WINDOW = 1024
+# idle chat buckets are dropped when there are more of them
+_MAX_IDLE_BUCKETS = 1024
+
+
+class TokenBucket:
+    """
+    TokenBucket allows rate events per second on average and bursts of up to
+    capacity events.
+
+    :param rate: float, tokens added per second;
+
+    :param capacity: float, max number of tokens;
+
+    :param now: float, current time in seconds.
+    """
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """
+        Returns seconds until a token is available, 0 if it is available now.
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def take(self):
+        self.tokens -= 1
+
+    def pause(self, seconds: float, now: float):
+        """
+        Makes the next token available in seconds at the earliest.
+        """
+        self.wait_time(now)
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def is_full(self, now: float) -> bool:
+        self.wait_time(now)
+        return self.tokens >= self.capacity
+
+
+class _Send:
+    __slots__ = ('method', 'data', 'files', 'submitted_at')
+
+    def __init__(self, method: str, data: Dict, files: Optional[Dict], submitted_at: float):
+        self.method = method
+        self.data = data
+        self.files = files
+        self.submitted_at = submitted_at
+
+
+def _retry_after(response) -> Optional[float]:
+    # delay of a rate limited (429) Telegram response, None for other ones
+    if isinstance(response, dict) and response.get('error_code') == 429:
+        return float((response.get('parameters') or {}).get('retry_after', 1))
+    return None
+
+
+class SendScheduler:
+    """
+    SendScheduler delivers outgoing Telegram calls within the rate limits:
+    a global token bucket (all chats) and a token bucket per chat.
+
+    Pending sends are queued per priority and per chat. INTERACTIVE sends go
+    before BULK ones, chats of the same priority are served round-robin and
+    sends of one chat and priority keep their order: a chat has at most one
+    send in flight.
+
+    Calls are made by a pool of delivery threads. When the call returns a
+    rate limited (429) response, the send is queued again and the chat
+    bucket is drained for retry_after seconds; other chats are not delayed.
+
+    :param send: callable(method, data, files), performs the call and returns
+        the decoded Telegram response;
+
+    :param global_rate: float, max sends per second for all chats
+        (default=30);
+
+    :param chat_rate: float, max sends per second to one chat (default=1);
+
+    :param chat_burst: int, number of sends to one chat allowed at once
+        (default=3);
+
+    :param n_workers: int, number of delivery threads, usually the size of
+        the HTTP connection pool (default=4);
+
+    :param clock: callable returning current time in seconds
+        (default=time.monotonic).
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, Dict, Optional[Dict]], object],
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: int = 3,
+        n_workers: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.send = send
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.n_workers = n_workers
+        self.clock = clock
+
+        self.__global = TokenBucket(global_rate, max(1.0, global_rate), clock())
+        self.__chats: Dict[Hashable, TokenBucket] = {}
+        self.__pending: Dict[int, OrderedDict] = {}
+        self.__in_flight = set()
+        self.__delays: Dict[int, deque] = {}
+        self.__sent: Dict[int, int] = {}
+        self.__rate_limited: Dict[int, int] = {}
+        self.__condition = threading.Condition()
+        self.__closing = False
+        self.__closed = False
+        self.__threads = []
+
+    def submit(
+        self,
+        chat_id: Hashable,
+        method: str,
+        data: Dict = None,
+        files: Dict = None,
+        priority: int = INTERACTIVE,
+    ):
+        """
+        Queues the call to be sent to the chat.
+        """
+        with self.__condition:
+            chats = self.__pending.setdefault(priority, OrderedDict())
+            chats.setdefault(chat_id, deque()).append(_Send(method, data, files, self.clock()))
+            self.__condition.notify()
+
+    def step(self) -> Optional[float]:
+        """
+        Sends one pending call if the rate limits allow it.
+
+        :return: 0 if a call was sent, seconds until the next call can be
+            sent, or None if nothing can be sent.
+        """
+        with self.__condition:
+            ready, wait = self.__pop_ready(self.clock())
+        if ready is not None:
+            self.__deliver(*ready)
+        return wait
+
+    def start(self):
+        """
+        Starts delivering calls in the background threads.
+        """
+        self.__threads = [
+            threading.Thread(target=self.__run, name=f'send-scheduler-{i}', daemon=True)
+            for i in range(self.n_workers)
+        ]
+        for thread in self.__threads:
+            thread.start()
+
+    def close(self, timeout: Optional[float] = 10):
+        """
+        Stops the background threads. Pending INTERACTIVE calls are sent
+        first, for at most timeout seconds; the rest is dropped.
+        """
+        with self.__condition:
+            self.__closing = True
+            self.__condition.notify_all()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self.__threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+        with self.__condition:
+            self.__closed = True
+            dropped = sum(len(sends) for chats in self.__pending.values() for sends in chats.values())
+            self.__condition.notify_all()
+        if dropped:
+            logging.warning(f'Dropped {dropped} pending sends on close')
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns per priority: number of pending, sent and rate limited
+        calls and the delivery delay (seconds between submit and send)
+        percentiles.
+        """
+        with self.__condition:
+            priorities = set(self.__pending) | set(self.__sent)
+            stats = {}
+            for priority in sorted(priorities):
+                delays = np.array(self.__delays.get(priority, ()))
+                stats[PRIORITY_NAMES.get(priority, str(priority))] = {
+                    'pending': sum(map(len, self.__pending.get(priority, {}).values())),
+                    'sent': self.__sent.get(priority, 0),
+                    'rate_limited': self.__rate_limited.get(priority, 0),
+                    **{
+                        f'delay_{name}': float(np.percentile(delays, q)) if len(delays) else 0.0
+                        for name, q in [('p50', 50), ('p95', 95), ('max', 100)]
+                    },
+                }
+            return stats
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while True:
+                    if self.__closed:
+                        return
+                    ready, wait = self.__pop_ready(self.clock())
+                    if ready is not None:
+                        break
+                    if self.__closing and not self.__in_flight:
+                        # only INTERACTIVE sends are considered while closing
+                        if not any(self.__pending.get(INTERACTIVE, {}).values()):
+                            return
+                    self.__condition.wait(wait)
+            self.__deliver(*ready)
+
+    def __pop_ready(self, now: float) -> Tuple[Optional[Tuple], Optional[float]]:
+        priorities = [INTERACTIVE] if self.__closing else sorted(self.__pending)
+        if not any(self.__pending.get(priority) for priority in priorities):
+            return None, None
+
+        wait = self.__global.wait_time(now)
+        if wait > 0:
+            return None, wait
+
+        wait = None
+        for priority in priorities:
+            chats = self.__pending.get(priority, {})
+            for chat_id in list(chats):
+                if chat_id in self.__in_flight:
+                    continue
+
+                bucket = self.__chat_bucket(chat_id, now)
+                chat_wait = bucket.wait_time(now)
+                if chat_wait > 0:
+                    wait = chat_wait if wait is None else min(wait, chat_wait)
+                    continue
+
+                bucket.take()
+                self.__global.take()
+                sends = chats[chat_id]
+                send = sends.popleft()
+                if sends:
+                    # the chat goes after the other waiting chats
+                    chats.move_to_end(chat_id)
+                else:
+                    del chats[chat_id]
+                self.__in_flight.add(chat_id)
+                return (priority, chat_id, send), 0
+        return None, wait
+
+    def __chat_bucket(self, chat_id: Hashable, now: float) -> TokenBucket:
+        if chat_id not in self.__chats:
+            if len(self.__chats) > _MAX_IDLE_BUCKETS:
+                self.__drop_idle_buckets(now)
+            self.__chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst, now)
+        return self.__chats[chat_id]
+
+    def __drop_idle_buckets(self, now: float):
+        pending = {chat_id for chats in self.__pending.values() for chat_id in chats}
+        for chat_id, bucket in list(self.__chats.items()):
+            if chat_id not in pending and chat_id not in self.__in_flight and bucket.is_full(now):
+                del self.__chats[chat_id]
+
+    def __record(self, priority: int, delay: float):
+        self.__delays.setdefault(priority, deque(maxlen=_DELAY_WINDOW)).append(delay)
+        self.__sent[priority] = self.__sent.get(priority, 0) + 1
+
+    def __deliver(self, priority: int, chat_id: Hashable, send: _Send):
+        response = None
+        try:
+            response = self.send(send.method, send.data, send.files)
+        except Exception:
+            logging.exception(f'Failed to send {send.method}')
+
+        retry_after = _retry_after(response)
+        with self.__condition:
+            now = self.clock()
+            if retry_after is None:
+                self.__record(priority, now - send.submitted_at)
+            else:
+                # the send keeps its place in front of the chat sends
+                self.__rate_limited[priority] = self.__rate_limited.get(priority, 0) + 1
+                chats = self.__pending.setdefault(priority, OrderedDict())
+                chats.setdefault(chat_id, deque()).appendleft(send)
+                self.__chat_bucket(chat_id, now).pause(retry_after, now)
+            self.__in_flight.discard(chat_id)
+            self.__condition.notify_all()
@@ -1,42 +1,177 @@
-import difflib
+import functools
 import json
 import logging
 import os
 import pickle
 import random
+import threading
 from datetime import datetime
 from io import BytesIO
 from string import punctuation
-from typing import List
+from typing import List, Optional, Tuple
 
 import numpy as np
-import pandas as pd
-import requests
 from flask import Flask, request
-from lazy import lazy
-from pkg_resources import Requirement, resource_filename
 
+from get_drunk_telegram_bot.bot.dedup import UpdateDeduplicator
+from get_drunk_telegram_bot.bot.dispatcher import ChatDispatcher
+from get_drunk_telegram_bot.bot.registry import ModelRegistry, ModelSlot
+from get_drunk_telegram_bot.bot.scheduler import INTERACTIVE, SendScheduler
+from get_drunk_telegram_bot.bot.polling import UpdatePoller
+from get_drunk_telegram_bot.bot.telegram import TELEGRAM_API_URL, TelegramClient
 from get_drunk_telegram_bot.drinks.cocktail import Cocktail
 from get_drunk_telegram_bot.drinks.dataset import Dataset
-from get_drunk_telegram_bot.embeder import BertEmbeder, TfidfEmbeder
-from get_drunk_telegram_bot.model import BaseModel, EmbederModel
-from get_drunk_telegram_bot.similarity import CosineSimilarity
+from get_drunk_telegram_bot.embeder import CachingEmbeder, ParallelEmbeder
+from get_drunk_telegram_bot.model import BaseModel, BM25Model, CandidateCache, EmbederModel
+from get_drunk_telegram_bot.similarity import (
+    CosineSimilarity,
+    QuantizedCosineSimilarity,
+    SparseCosineSimilarity,
+)
+from get_drunk_telegram_bot.utils.profiling import StartupProfiler
 from get_drunk_telegram_bot.utils.utils import decode_json, encode_json, normalize_text
 
 _EMBEDER_MAX_SIMILARITY = 0.79
 _EMBEDER_MIN_SIMILARITY = 0.3
+_EMBEDER_TOP_K = 50
+_RERANK_TOP_N = 20
+# a \recipe reply is picked among the best reranked cocktails only
+_RERANK_TOP_K = 3
 _EXPLORE_COCKTAILS_NUM = 3
+_RECIPES_OF_THE_DAY_NUM = 5
+_EXPLORE_NEIGHBOURS_K = 20
 
 logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
 
 
 def get_file(filename):
+    from pkg_resources import Requirement, resource_filename
+
     return resource_filename(
         Requirement.parse('get_drunk_telegram_bot'),
         f'get_drunk_telegram_bot/utils/{filename}',
     )
 
 
+MODELS = ModelRegistry()
+
+# dense similarities selected with --similarity
+SIMILARITIES = {'exact': CosineSimilarity, 'quantized': QuantizedCosineSimilarity}
+
+
+def _dense_similarity(similarity='exact'):
+    if similarity not in SIMILARITIES:
+        raise ValueError(
+            f'Error in similarity. Available: {list(SIMILARITIES)}, Got: {similarity}'
+        )
+    return SIMILARITIES[similarity]()
+
+
+@MODELS.register('BaseModel')
+def _create_base_model(dataset, **options):
+    return BaseModel()
+
+
+@MODELS.register('TFIdfCocktailModel')
+def _create_tfidf_model(
+    dataset, cache=None, use_projection=False, similarity='exact', profiler=None, **options
+):
+    if similarity != 'exact' and not use_projection:
+        raise ValueError(f'{similarity} similarity needs dense vectors, use projection')
+
+    profiler = profiler or StartupProfiler()
+    with profiler.phase('vectorizer'):
+        from get_drunk_telegram_bot.embeder.resource import load_projection
+        from get_drunk_telegram_bot.embeder.tfidf import TfidfEmbeder
+
+        embeder = CachingEmbeder(TfidfEmbeder())
+        # projected TF-IDF vectors are dense
+        projection = load_projection('tfidf') if use_projection else None
+    with profiler.phase('candidates'):
+        return EmbederModel(
+            embeder=embeder,
+            dataset=dataset,
+            similarity=_dense_similarity(similarity) if use_projection else SparseCosineSimilarity(),
+            max_similarity=_EMBEDER_MAX_SIMILARITY,
+            min_similarity=_EMBEDER_MIN_SIMILARITY,
+            top_k=_EMBEDER_TOP_K,
+            cache=cache,
+            projection=projection,
+            neighbours_k=_EXPLORE_NEIGHBOURS_K,
+        )
+
+
+@MODELS.register('BertCocktailModel')
+def _create_bert_model(
+    dataset,
+    cache=None,
+    bert_inference_mode='eager',
+    embed_workers=None,
+    use_projection=False,
+    similarity='exact',
+    profiler=None,
+    **options,
+):
+    profiler = profiler or StartupProfiler()
+    with profiler.phase('vectorizer'):
+        from get_drunk_telegram_bot.embeder.bert import BertEmbeder, create_worker_embeder
+        from get_drunk_telegram_bot.embeder.resource import load_projection
+
+        embeder = BertEmbeder(inference_mode=bert_inference_mode)
+        if embed_workers:
+            embeder = ParallelEmbeder(
+                embeder,
+                functools.partial(create_worker_embeder, inference_mode=bert_inference_mode),
+                n_workers=embed_workers,
+            )
+        embeder = CachingEmbeder(embeder)
+        projection = load_projection('bert') if use_projection else None
+    with profiler.phase('candidates'):
+        return EmbederModel(
+            embeder=embeder,
+            dataset=dataset,
+            similarity=_dense_similarity(similarity),
+            max_similarity=_EMBEDER_MAX_SIMILARITY,
+            min_similarity=_EMBEDER_MIN_SIMILARITY,
+            top_k=_EMBEDER_TOP_K,
+            cache=cache,
+            projection=projection,
+            neighbours_k=_EXPLORE_NEIGHBOURS_K,
+        )
+
+
+@MODELS.register('STSBertCocktailModel')
+def _create_sts_bert_model(
+    dataset, cache=None, rerank_top_n=None, profiler=None, **options
+):
+    profiler = profiler or StartupProfiler()
+    with profiler.phase('vectorizer'):
+        from get_drunk_telegram_bot.embeder.tfidf import TfidfEmbeder
+        from get_drunk_telegram_bot.model.stsbert import STSBertCocktailModel
+
+        embeder = CachingEmbeder(TfidfEmbeder())
+    with profiler.phase('candidates'):
+        retriever = EmbederModel(
+            embeder=embeder,
+            dataset=dataset,
+            similarity=SparseCosineSimilarity(),
+            min_similarity=_EMBEDER_MIN_SIMILARITY,
+            top_k=rerank_top_n or _RERANK_TOP_N,
+            cache=cache,
+        )
+    with profiler.phase('reranker'):
+        return STSBertCocktailModel(
+            retriever, dataset, top_n=rerank_top_n or _RERANK_TOP_N, top_k=_RERANK_TOP_K
+        )
+
+
+@MODELS.register('BM25CocktailModel')
+def _create_bm25_model(dataset, profiler=None, **options):
+    profiler = profiler or StartupProfiler()
+    with profiler.phase('candidates'):
+        return BM25Model(dataset=dataset, top_k=_EMBEDER_TOP_K, match_all=True)
+
+
 class TelegramInterface:
     """
     TelegramInterface class provides the basic functionality for
@@ -44,41 +179,85 @@ class TelegramInterface:
 
     :param token: str, telegram bot token
 
-    :param hook_url, telegram bot hook_url (provided by ngrok, see README.md)
+    :param hook_url, telegram bot hook_url (provided by ngrok, see README.md),
+    if None the webhook is deleted and updates are received with getUpdates;
+
+    :param api_url: str, Telegram Bot API server url (default=TELEGRAM_API_URL);
+
+    :param http_pool_size: int, max number of kept-alive connections to
+    Telegram and of threads sending replies (default=10);
+
+    :param http_timeout: float, read timeout of Telegram requests in seconds
+    (default=10);
+
+    :param send_rate: float, max number of messages sent per second to all
+    chats (default=30);
+
+    :param chat_send_rate: float, max number of messages sent per second to
+    one chat (default=1);
 
     :param debug: bool, specifies the verbosity level (if True, logs will be
     provided in sys.stdout).
     """
 
-    def __init__(self, token, hook_url, debug=False):
+    def __init__(
+        self,
+        token,
+        hook_url,
+        api_url=TELEGRAM_API_URL,
+        http_pool_size=10,
+        http_timeout=10,
+        send_rate=30,
+        chat_send_rate=1,
+        debug=False,
+    ):
         if debug:
             print('Starting tg interface...')
-        self._bot_url = f'https://api.telegram.org/bot{token}'
-        self._set_web_hook(hook_url)
+        self._client = TelegramClient(
+            token, api_url=api_url, pool_size=http_pool_size, timeout=(3.05, http_timeout)
+        )
+        # replies are queued and sent within Telegram rate limits, rate
+        # limited (429) sends are queued again by the scheduler
+        self._scheduler = SendScheduler(
+            functools.partial(self._client.call, wait_on_rate_limit=False),
+            global_rate=send_rate,
+            chat_rate=chat_send_rate,
+            n_workers=http_pool_size,
+        )
+        self._scheduler.start()
+        if hook_url is None:
+            self._delete_web_hook()
+        else:
+            self._set_web_hook(hook_url)
         self._chat_id = None
         if debug:
             print('tg interface started successfully.')
 
+    def close(self, timeout=10):
+        """
+        Sends the pending replies (for at most timeout seconds) and stops
+        sending.
+        """
+        self._scheduler.close(timeout)
+
     def _set_web_hook(self, hook_url):
-        method = 'setWebhook'
-        url = f'{self._bot_url}/{method}'
-        data = {'url': hook_url}
-        requests.post(url, data=data)
-
-    def _send_photo(self, chat_id, text, image):
-        method = 'sendPhoto'
-        url = f'{self._bot_url}/{method}'
+        self._client.call('setWebhook', data={'url': hook_url})
+
+    def _delete_web_hook(self):
+        # getUpdates does not work while a webhook is set
+        self._client.call('deleteWebhook')
+
+    def _send_photo(self, chat_id, text, image, priority=INTERACTIVE):
         data = {'chat_id': chat_id, 'caption': text}
         byte_io = BytesIO()
         image.save(byte_io, 'png')
-        byte_io.seek(0)
-        requests.post(url, data=data, files={'photo': byte_io})
+        self._scheduler.submit(
+            chat_id, 'sendPhoto', data=data, files={'photo': byte_io}, priority=priority
+        )
 
-    def _send_message(self, chat_id, text):
-        method = 'sendMessage'
-        url = f'{self._bot_url}/{method}'
+    def _send_message(self, chat_id, text, priority=INTERACTIVE):
         data = {'chat_id': chat_id, 'text': text}
-        requests.post(url, data=data)
+        self._scheduler.submit(chat_id, 'sendMessage', data=data, priority=priority)
 
 
 class ServerDataBase:
@@ -86,11 +265,15 @@ class ServerDataBase:
     ServerDataBase saves an information about user history of drinks or amount
     of total alcohol absorbed.
 
+    Messages of different chats are processed in parallel, so every access
+    to the records (and the dump) is done under a lock.
+
     :param save_path: str, path to the local database.
     """
 
     def __init__(self, save_path):
         self.json_path = save_path
+        self._lock = threading.RLock()
         if os.path.exists(save_path):
             with open(save_path, 'r', encoding='utf-8') as f:
                 self.db = json.load(f, object_hook=decode_json)
@@ -122,13 +305,14 @@ class ServerDataBase:
 
         :param cocktail: Cocktail instance.
         """
-        self._initialize_record_if_needed(chat_id)
+        with self._lock:
+            self._initialize_record_if_needed(chat_id)
 
-        self.db[chat_id]['cocktails_history'].append(cocktail)
-        self.db[chat_id]['cocktail'] = cocktail
-        self.db[chat_id]['total_alcohol_absorbed'] += cocktail.abv * cocktail.volume
+            self.db[chat_id]['cocktails_history'].append(cocktail)
+            self.db[chat_id]['cocktail'] = cocktail
+            self.db[chat_id]['total_alcohol_absorbed'] += cocktail.abv * cocktail.volume
 
-        self._dump()
+            self._dump()
 
     def get_cocktail(self, chat_id):
         """
@@ -140,8 +324,9 @@ class ServerDataBase:
 
         :return: Cocktail instance, the most recent cocktail taken by user.
         """
-        self._initialize_record_if_needed(chat_id)
-        return self.db[chat_id]['cocktail']
+        with self._lock:
+            self._initialize_record_if_needed(chat_id)
+            return self.db[chat_id]['cocktail']
 
     def get_cocktails_history(self, chat_id):
         """
@@ -152,8 +337,9 @@ class ServerDataBase:
 
         :return: list, full user cocktails history.
         """
-        self._initialize_record_if_needed(chat_id)
-        return self.db[chat_id]['cocktails_history']
+        with self._lock:
+            self._initialize_record_if_needed(chat_id)
+            return self.db[chat_id]['cocktails_history']
 
     def get_total_alcohol_absorbed(self, chat_id):
         """
@@ -164,8 +350,9 @@ class ServerDataBase:
 
         :return: int, total amount of alcohol absorbed by user.
         """
-        self._initialize_record_if_needed(chat_id)
-        return self.db[chat_id]['total_alcohol_absorbed']
+        with self._lock:
+            self._initialize_record_if_needed(chat_id)
+            return self.db[chat_id]['total_alcohol_absorbed']
 
     def end_current_session(self, chat_id):
         """
@@ -175,17 +362,19 @@ class ServerDataBase:
         :param chat_id: str, from which the message was received and where to
         send the response;
         """
-        if chat_id in self.db:
-            self.db[chat_id] = {
-                'total_alcohol_absorbed': 0,
-                'cocktails_history': [],
-                'cocktail': None,
-            }
-            self._dump()
+        with self._lock:
+            if chat_id in self.db:
+                self.db[chat_id] = {
+                    'total_alcohol_absorbed': 0,
+                    'cocktails_history': [],
+                    'cocktail': None,
+                }
+                self._dump()
 
     def _dump(self):
-        with open(self.json_path, 'w', encoding='utf-8') as f:
-            json.dump(self.db, f, default=encode_json, indent=4)
+        with self._lock:
+            with open(self.json_path, 'w', encoding='utf-8') as f:
+                json.dump(self.db, f, default=encode_json, indent=4)
 
 
 class GetDrunkBotHandler(TelegramInterface):
@@ -193,8 +382,9 @@ class GetDrunkBotHandler(TelegramInterface):
     class GetDrunkBotHandler is responsible for all kind of user-server
     communication from processing messages to sending commands in return.
 
-    :param model_name: str, should be one of the {TFIdfCocktailModel,
-        BertCocktailModel, BaseModel} (default=BaseModel);
+    :param model_name: str, name registered in MODELS, e.g. one of the
+        {TFIdfCocktailModel, BertCocktailModel, STSBertCocktailModel,
+        BM25CocktailModel, BaseModel} (default=TFIdfCocktailModel);
 
     :param train: str, path to the train table (default=None);
 
@@ -202,6 +392,28 @@ class GetDrunkBotHandler(TelegramInterface):
 
     :param model_vocab_file: str, path to model vocab file (default=None);
 
+    :param cache_dir: str, directory where candidate vectors are cached between
+        restarts (default=None, no caching);
+
+    :param bert_inference_mode: str, BertEmbeder inference mode, one of
+        {eager, quantized, traced, quantized-traced} (default=eager);
+
+    :param embed_workers: int, number of processes embedding the catalog with
+        BertEmbeder (default=None, no process pool);
+
+    :param use_projection: bool, rank TF-IDF and Bert vectors in the reduced
+        space fitted with scripts/fit_projection.py (default=False);
+
+    :param rerank_top_n: int, number of TF-IDF candidates reranked by
+        STSBertCocktailModel (default=None, 20);
+
+    :param similarity: str, ranking of dense vectors, one of {exact,
+        quantized}; quantized ranks over int8 codes and rescores the best
+        candidates from the memory-mapped cache file (default=exact);
+
+    :param profiler: StartupProfiler, records startup phases timings
+        (default=None, a new one is created);
+
     :param debug: bool, specifies the verbosity level (if True, logs will be
         provided in sys.stdout).
     """
@@ -216,57 +428,112 @@ class GetDrunkBotHandler(TelegramInterface):
         train=None,
         model_config_file=None,
         model_vocab_file=None,
+        cache_dir=None,
+        bert_inference_mode='eager',
+        embed_workers=None,
+        use_projection=False,
+        rerank_top_n=None,
+        similarity='exact',
+        profiler=None,
         debug=False,
         **telegram_kwargs,
     ):
-        super(GetDrunkBotHandler, self).__init__(**telegram_kwargs, debug=debug)
+        self.profiler = profiler or StartupProfiler()
+        with self.profiler.phase('webhook'):
+            super(GetDrunkBotHandler, self).__init__(**telegram_kwargs, debug=debug)
 
         self.model_name = model_name
         self.train = train
         self.model_config_file = model_config_file
         self.model_vocab_file = model_vocab_file
-        self.model = None
-        self.dataset = Dataset()
-        self._create_model()
+        self.cache = CandidateCache(cache_dir) if cache_dir else None
+        self.bert_inference_mode = bert_inference_mode
+        self.embed_workers = embed_workers
+        self.use_projection = use_projection
+        self.rerank_top_n = rerank_top_n
+        self.similarity = similarity
+        with self.profiler.phase('dataset'):
+            dataset = Dataset()
+        self.models = ModelSlot(
+            self._create_model(model_name, dataset, self.profiler), dataset
+        )
+        self._pinned = threading.local()
+        self._derived_lock = threading.RLock()
 
         # TODO: use custom db path here
         self.db = ServerDataBase(save_path='./db.json')
 
-        # index of the cocktail in recipe of the day list, refactor here
-        self.index = None
-
         self.debug = debug
-        self._create_model()
-
-    def _create_model(self):
-        similarity = CosineSimilarity()
-        if self.model_name == 'BaseModel':
-            self.model = BaseModel()
-        elif self.model_name == 'TFIdfCocktailModel':
-            embeder = TfidfEmbeder()
-            self.model = EmbederModel(
-                embeder=embeder,
-                dataset=self.dataset,
-                similarity=similarity,
-                max_similarity=_EMBEDER_MAX_SIMILARITY,
-                min_similarity=_EMBEDER_MIN_SIMILARITY,
-            )
-        elif self.model_name == 'BertCocktailModel':
-            embeder = BertEmbeder()
-            self.model = EmbederModel(
-                embeder=embeder,
-                dataset=self.dataset,
-                similarity=similarity,
-                max_similarity=_EMBEDER_MAX_SIMILARITY,
-                min_similarity=_EMBEDER_MIN_SIMILARITY,
-            )
-        else:
+
+    def _create_model(self, model_name, dataset, profiler):
+        return MODELS.create(
+            model_name,
+            dataset,
+            cache=self.cache,
+            bert_inference_mode=self.bert_inference_mode,
+            embed_workers=self.embed_workers,
+            use_projection=self.use_projection,
+            rerank_top_n=self.rerank_top_n,
+            similarity=self.similarity,
+            profiler=profiler,
+        )
+
+    @property
+    def model(self):
+        return self._generation().model
+
+    @property
+    def dataset(self):
+        return self._generation().dataset
+
+    def _generation(self):
+        """
+        Returns the generation pinned by the message being processed in this
+        thread, or the current one outside of message processing.
+        """
+        return getattr(self._pinned, 'generation', None) or self.models.current
+
+    def _derived(self, name, compute):
+        """
+        Returns the value derived from the dataset of the generation, it is
+        computed once per generation by compute(dataset).
+        """
+        generation = self._generation()
+        with self._derived_lock:
+            if name not in generation.derived:
+                generation.derived[name] = compute(generation.dataset)
+            return generation.derived[name]
+
+    def reload_model(self, model_name=None):
+        """
+        Reloads the dataset and builds the model in a background thread, then
+        swaps them in atomically. Messages are served by the old model until
+        the new one is ready.
+
+        :param model_name: str, registered model name (default=current model);
+
+        :return: threading.Thread, thread building the model.
+        """
+        model_name = model_name or self.model_name
+        if model_name not in MODELS.names:
             raise ValueError(
-                f'Error in model_name. Available models: '
-                f"{['TFIdfCocktailModel', 'BertCocktailModel', 'BaseModel']}, "
-                f'Got: {self.model_name}'
+                f'Error in model_name. Available models: {MODELS.names}, '
+                f'Got: {model_name}'
             )
 
+        def build():
+            profiler = StartupProfiler()
+            with profiler.phase('dataset'):
+                dataset = Dataset()
+            model = self._create_model(model_name, dataset, profiler)
+            logging.info(f'Model {model_name} reloaded:\n{profiler.report()}')
+            return model, dataset
+
+        def on_swap():
+            self.model_name = model_name
+
+        return self.models.swap_in_background(build, on_swap)
+
     def process_message(self, chat_id, msg):
         """
         Process message from user and send the response back.
@@ -275,6 +542,68 @@ class GetDrunkBotHandler(TelegramInterface):
             send the response.
         :param msg: str, message that was sent by user.
         """
+        with self.models.acquire() as generation:
+            self._pinned.generation = generation
+            try:
+                self._process_message(chat_id, msg)
+            finally:
+                self._pinned.generation = None
+
+    def process_batch(self, messages):
+        """
+        Process messages received at once, in order. The ingredients of all
+        the \\recipe requests are embedded and ranked together when the model
+        supports batch prediction.
+
+        :param messages: list of (chat_id, msg) pairs.
+        """
+        with self.models.acquire() as generation:
+            self._pinned.generation = generation
+            try:
+                try:
+                    self._pinned.predictions = self._predict_recipes(
+                        [msg for _, msg in messages]
+                    )
+                except Exception:
+                    # every message is predicted on its own then
+                    logging.exception('Failed to predict recipes for the batch')
+                    self._pinned.predictions = None
+                for chat_id, msg in messages:
+                    try:
+                        self._process_message(chat_id, msg)
+                    except Exception:
+                        logging.exception(f'Failed to process message for chat with id={chat_id}')
+            finally:
+                self._pinned.generation = None
+                self._pinned.predictions = None
+
+    def _predict_recipes(self, messages):
+        predict_batch = getattr(self.model, 'predict_batch', None)
+        if predict_batch is None:
+            return None
+
+        queries = list(
+            dict.fromkeys(
+                ' '.join(self.parse_ingredients(msg))
+                for msg in messages
+                if self._is_recipe_request(msg)
+            )
+        )
+        if len(queries) == 0:
+            return None
+        return dict(zip(queries, predict_batch(queries)))
+
+    @staticmethod
+    def _is_recipe_request(msg):
+        return msg not in ('\\start', '\\end', '\\recipe of the day') and '\\recipe' in msg
+
+    def _predict(self, query):
+        predictions = getattr(self._pinned, 'predictions', None) or {}
+        if query in predictions:
+            return predictions[query]
+        return self.model.predict(query)
+
+    def _process_message(self, chat_id, msg):
         if self.debug:
             print('Got a message: <%s>.' % msg)
 
@@ -352,7 +681,7 @@ class GetDrunkBotHandler(TelegramInterface):
     def _send_best_cocktail_with_ingredients(self, chat_id, ingredients):
         if self.debug:
             print('Model predict starts.')
-        best_cocktails = self.model.predict(' '.join(ingredients))
+        best_cocktails = self._predict(' '.join(ingredients))
         if len(best_cocktails) == 0:
             msg = (
                 "Oops 😭 We couldn't find cocktail for you\n"
@@ -457,9 +786,9 @@ class GetDrunkBotHandler(TelegramInterface):
     def _send_day_cocktail(self, chat_id):
         weekday_name = datetime.today().strftime('%A')
 
-        if self.index is None:
-            self.index = random.randint(0, len(self.recipes_of_the_day) - 1)
-        cocktail = self.recipes_of_the_day[self.index]
+        cocktail = self._derived(
+            'recipe_of_the_day', lambda dataset: random.choice(self.recipes_of_the_day)
+        )
         msg = normalize_text(
             f"""
             Our {weekday_name} menu 👩‍🍳🥳:
@@ -515,21 +844,20 @@ class GetDrunkBotHandler(TelegramInterface):
         right_ingredients = None
         right_cocktail_name = None
 
-        max_ratio = 0.8
-        for cocktail_name, ingredients in self.dataset.get_names_and_ingredients():
-            words = cocktail_name.split()
-            original_name = ' '.join([word for word in words if word.lower()[0].islower()])
-            ratio = difflib.SequenceMatcher(a=query, b=original_name.lower()).ratio()
-            if ratio > max_ratio:
-                right_ingredients = ingredients
-                right_cocktail_name = cocktail_name
-                max_ratio = ratio
+        cocktail_id = self.dataset.name_index.search(query, min_ratio=0.8)
+        if cocktail_id is not None:
+            cocktail = self.dataset.get_coctail_by_id(cocktail_id)
+            right_ingredients = cocktail.ingredients_str
+            right_cocktail_name = cocktail.name
 
         if right_ingredients:
-            predictions = self.model.predict(right_ingredients, True)
+            try:
+                similar_cocktails = self.model.predict_similar(cocktail_id)
+            except NotImplementedError:
+                similar_cocktails = self.model.predict(right_ingredients, True)[1:]
             cocktails = np.random.choice(
-                predictions[1:],
-                min(_EXPLORE_COCKTAILS_NUM, len(predictions[1:])),
+                similar_cocktails,
+                min(_EXPLORE_COCKTAILS_NUM, len(similar_cocktails)),
                 replace=False,
             )
 
@@ -603,11 +931,14 @@ class GetDrunkBotHandler(TelegramInterface):
         except ValueError:
             return []
 
-    @lazy
-    def recipes_of_the_day(self, recipes_num: int = 5) -> List[Cocktail]:
-        indexes = np.arange(len(self.dataset))
-        np.random.shuffle(indexes)
-        return self.dataset.get_coctails_by_ids(indexes[:5])
+    @property
+    def recipes_of_the_day(self) -> List[Cocktail]:
+        def pick(dataset):
+            indexes = np.arange(len(dataset))
+            np.random.shuffle(indexes)
+            return dataset.get_coctails_by_ids(indexes[:_RECIPES_OF_THE_DAY_NUM])
+
+        return self._derived('recipes_of_the_day', pick)
 
     # TODO: put this method into drinks/preprocessing later?
     @staticmethod
@@ -616,6 +947,8 @@ class GetDrunkBotHandler(TelegramInterface):
         Load information about recipes of the day
         (local 05-CocktailRecipes.csv table).
         """
+        import pandas as pd
+
         data = pd.read_csv(get_file('05-CocktailRecipes.csv'))[
             [
                 'RecipeName',
@@ -679,41 +1012,173 @@ class GetDrunkBotHandler(TelegramInterface):
         return recipes
 
 
-def create_server(args):
+def parse_update(data) -> Optional[Tuple[int, str]]:
     """
-    Starts get-drunk-telegram bot.
+    Extracts (chat_id, text) from the Telegram update.
+
+    :param data: dict, update sent by Telegram;
 
-    :param args: --port, --token, --web-hook-url and --debug params specified.
+    :return: (chat_id, text) or None if the update has no text message.
+    """
+    if not isinstance(data, dict):
+        return None
+
+    message = data.get('message') or data.get('edited_message')
+    if not isinstance(message, dict):
+        return None
+
+    chat_id = (message.get('chat') or {}).get('id')
+    text = message.get('text')
+    if chat_id is None or not isinstance(text, str):
+        return None
+    return chat_id, text
+
+
+def create_handler(args, hook_url, profiler=None):
+    """
+    Creates the bot handler from the command line args (see create_server).
     """
-    app = Flask(__name__)
     if args.debug:
         print('Init Bot')
-    get_drunk_bot = GetDrunkBotHandler(
-        token=args.token, hook_url=args.web_hook_url, debug=args.debug
+    return GetDrunkBotHandler(
+        token=args.token,
+        hook_url=hook_url,
+        api_url=args.api_url,
+        model_name=args.model_name,
+        cache_dir=args.cache_dir,
+        bert_inference_mode=args.bert_inference_mode,
+        embed_workers=args.embed_workers,
+        use_projection=args.use_projection,
+        rerank_top_n=args.rerank_top_n,
+        similarity=args.similarity,
+        profiler=profiler,
+        debug=args.debug,
+        http_pool_size=args.http_pool_size,
+        http_timeout=args.http_timeout,
+        send_rate=args.send_rate,
+        chat_send_rate=args.chat_send_rate,
+    )
+
+
+def create_dedup(args):
+    """
+    Creates the window of recently seen update ids from the command line
+    args (--dedup-window and --dedup-file).
+    """
+    return UpdateDeduplicator(size=args.dedup_window, path=args.dedup_file)
+
+
+def create_server(args, profiler=None):
+    """
+    Starts get-drunk-telegram bot.
+
+    :param args: --port, --token, --web-hook-url, --api-url, --model-name,
+        --cache-dir, --bert-inference-mode, --embed-workers,
+        --use-projection, --rerank-top-n, --similarity, --workers, --queue-size,
+        --http-pool-size, --http-timeout, --send-rate, --chat-send-rate,
+        --dedup-window, --dedup-file and --debug params specified;
+
+    :param profiler: StartupProfiler, records startup phases timings
+        (default=None).
+    """
+    app = Flask(__name__)
+    get_drunk_bot = create_handler(args, args.web_hook_url, profiler)
+    app.extensions['get_drunk_bot'] = get_drunk_bot
+
+    dispatcher = ChatDispatcher(
+        get_drunk_bot.process_message,
+        n_workers=args.workers,
+        max_queue_size=args.queue_size,
     )
+    app.extensions['chat_dispatcher'] = dispatcher
+    dedup = create_dedup(args)
+    app.extensions['update_dedup'] = dedup
 
     @app.route('/', methods=['GET', 'POST'])
     def post():
         """
-        Handles every user message.
+        Handles every user message: the message is queued and processed by
+        the dispatcher, Telegram gets the answer right away. Updates
+        delivered again are acknowledged without processing.
         """
         if request.method == 'POST':
             # data format may differ
-            data = request.get_json(force=True)
+            data = request.get_json(force=True, silent=True)
 
             logging.info(f'Got request:\n{data}\n')
 
-            if 'message' in data:
-                chat_id = data['message']['chat']['id']
-                text = data['message']['text']
-            else:
-                chat_id = data['edited_message']['chat']['id']
-                text = data['edited_message']['text']
-
-            get_drunk_bot.process_message(chat_id, text)
+            update_id = data.get('update_id') if isinstance(data, dict) else None
+            if not isinstance(update_id, int):
+                update_id = None
+            if update_id is not None and not dedup.add(update_id):
+                logging.info(f'Ignored duplicate update with id={update_id}')
+                return json.dumps({'ok': True})
+
+            message = parse_update(data)
+            if message is None:
+                logging.warning('Ignored update without text message')
+            elif not dispatcher.submit(*message):
+                # Telegram redelivers the update later, it should not be
+                # taken for a duplicate then
+                if update_id is not None:
+                    dedup.discard(update_id)
+                return json.dumps({'ok': False}), 429
         else:
             return 'Hello, world!'
 
         return json.dumps({'ok': True})
 
+    @app.route('/stats', methods=['GET'])
+    def stats():
+        """
+        Returns dispatcher queue metrics, duplicate updates counters,
+        Telegram calls counters and delivery delays of the replies.
+        """
+        stats = dispatcher.stats()
+        stats['dedup'] = dedup.stats()
+        client = getattr(get_drunk_bot, '_client', None)
+        if client is not None:
+            stats['telegram'] = client.stats()
+        scheduler = getattr(get_drunk_bot, '_scheduler', None)
+        if scheduler is not None:
+            stats['sends'] = scheduler.stats()
+        return json.dumps(stats)
+
     return app
+
+
+def create_poller(get_drunk_bot, offset_file=None, dedup=None):
+    """
+    Creates the loop receiving updates for the bot with long polling, the
+    handler should be created without hook_url (create_handler(args, None)).
+
+    :param get_drunk_bot: GetDrunkBotHandler;
+
+    :param offset_file: str, file the updates offset is kept in
+        (default=None, the offset is not persisted);
+
+    :param dedup: UpdateDeduplicator, skips updates received again
+        (default=None);
+
+    :return: UpdatePoller, call run to start polling.
+    """
+
+    def handle_batch(updates):
+        if dedup is not None:
+            received = len(updates)
+            updates = [update for update in updates if dedup.add(update['update_id'])]
+            if len(updates) < received:
+                logging.info(f'Ignored {received - len(updates)} duplicate updates')
+        messages = [message for message in map(parse_update, updates) if message is not None]
+        if len(messages) < len(updates):
+            logging.warning(f'Ignored {len(updates) - len(messages)} updates without text message')
+        try:
+            get_drunk_bot.process_batch(messages)
+        except Exception:
+            # the batch is fetched again, it should not be taken for duplicates
+            if dedup is not None:
+                for update in updates:
+                    dedup.discard(update['update_id'])
+            raise
+
+    return UpdatePoller(get_drunk_bot._client, handle_batch, offset_path=offset_file)
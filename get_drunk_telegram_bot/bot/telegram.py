@@ -0,0 +1,189 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+TELEGRAM_API_URL = 'https://api.telegram.org'
+
+# methods that may be delivered twice when retried after a read timeout
+_NOT_IDEMPOTENT_PREFIXES = ('send', 'forward', 'copy')
+
+
+class TelegramClient:
+    """
+    TelegramClient calls Telegram Bot API methods through one pooled
+    keep-alive session.
+
+    Connection errors and 5xx responses are retried with jittered
+    exponential backoff; 429 responses are retried after the retry_after
+    delay sent by Telegram. Read timeouts are retried only for idempotent
+    methods: a timed out sendMessage may have been delivered already. Calls,
+    retries, failures and latency are counted per method.
+
+    :param token: str, telegram bot token;
+
+    :param api_url: str, Bot API server url (default=TELEGRAM_API_URL);
+
+    :param pool_size: int, max number of kept-alive connections (default=10);
+
+    :param timeout: (connect, read) timeouts in seconds (default=(3.05, 10));
+
+    :param max_retries: int, max number of retries of one call (default=3);
+
+    :param backoff: float, base backoff delay in seconds (default=0.5);
+
+    :param sleep: callable(seconds), used to wait between retries
+        (default=time.sleep).
+    """
+
+    def __init__(
+        self,
+        token: str,
+        api_url: str = TELEGRAM_API_URL,
+        pool_size: int = 10,
+        timeout: Tuple[float, float] = (3.05, 10),
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.bot_url = f"{api_url.rstrip('/')}/bot{token}"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sleep = sleep
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.__lock = threading.Lock()
+        self.__stats = defaultdict(
+            lambda: {
+                'calls': 0,
+                'retries': 0,
+                'failures': 0,
+                'rate_limited': 0,
+                'latency': 0.0,
+                'max_latency': 0.0,
+            }
+        )
+
+    def call(
+        self,
+        method: str,
+        data: Dict = None,
+        files: Dict = None,
+        timeout: Tuple[float, float] = None,
+        wait_on_rate_limit: bool = True,
+    ) -> Optional[Dict]:
+        """
+        Calls the Bot API method.
+
+        :param method: str, e.g. sendMessage;
+
+        :param data: dict, method parameters;
+
+        :param files: dict, files to upload, file objects are rewound before
+            every attempt;
+
+        :param timeout: (connect, read) timeouts, e.g. for long polling
+            (default=None, the client timeouts);
+
+        :param wait_on_rate_limit: bool, if False, a 429 response is returned
+            right away (with parameters.retry_after) instead of being retried
+            after the delay, e.g. when the caller schedules the retry
+            (default=True);
+
+        :return: dict, decoded Telegram response, None if the call failed.
+        """
+        url = f'{self.bot_url}/{method}'
+        for attempt in range(self.max_retries + 1):
+            for f in (files or {}).values():
+                f.seek(0)
+
+            start = time.perf_counter()
+            try:
+                response = self.session.post(
+                    url, data=data, files=files, timeout=timeout or self.timeout
+                )
+            except requests.ConnectionError as e:
+                # includes connect timeouts, the request was not sent
+                response, delay = None, self.__backoff(attempt)
+                logging.warning(f'{method} failed: {e}')
+            except requests.Timeout as e:
+                if method.startswith(_NOT_IDEMPOTENT_PREFIXES):
+                    self.__record(method, time.perf_counter() - start)
+                    self.__count(method, 'failures')
+                    logging.error(f'{method} timed out and may have been delivered: {e}')
+                    return None
+                response, delay = None, self.__backoff(attempt)
+                logging.warning(f'{method} failed: {e}')
+            else:
+                delay = self.__retry_delay(response, attempt)
+            self.__record(method, time.perf_counter() - start)
+
+            if response is not None and response.status_code == 429 and not wait_on_rate_limit:
+                self.__count(method, 'rate_limited')
+                logging.warning(f'{method} is rate limited for {delay:.1f}s')
+                return {'ok': False, 'error_code': 429, 'parameters': {'retry_after': delay}}
+
+            if response is not None and delay is None:
+                if not response.ok:
+                    self.__count(method, 'failures')
+                    logging.warning(f'{method} failed with {response.status_code}: {response.text}')
+                return self.__decode(response)
+
+            if attempt < self.max_retries:
+                self.__count(method, 'retries')
+                self.sleep(delay)
+
+        self.__count(method, 'failures')
+        logging.error(f'{method} failed after {self.max_retries} retries')
+        return None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns counters per method: calls (attempts), retries, failures,
+        rate limited calls returned to the caller, total and max latency in
+        seconds.
+        """
+        with self.__lock:
+            return {method: dict(stats) for method, stats in self.__stats.items()}
+
+    def __retry_delay(self, response: requests.Response, attempt: int) -> Optional[float]:
+        # None means the response is final
+        if response.status_code == 429:
+            parameters = (self.__decode(response) or {}).get('parameters') or {}
+            return float(parameters.get('retry_after', self.__backoff(attempt)))
+        if response.status_code >= 500:
+            return self.__backoff(attempt)
+        return None
+
+    def __backoff(self, attempt: int) -> float:
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    @staticmethod
+    def __decode(response: requests.Response) -> Optional[Dict]:
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def __record(self, method: str, latency: float):
+        with self.__lock:
+            stats = self.__stats[method]
+            stats['calls'] += 1
+            stats['latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+
+    def __count(self, method: str, counter: str):
+        with self.__lock:
+            self.__stats[method][counter] += 1
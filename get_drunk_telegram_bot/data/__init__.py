@@ -1,3 +1,4 @@
+import hashlib
 import pathlib
 import json
 
@@ -5,9 +6,19 @@ _DATA_PATH = pathlib.Path(__file__).parent
 
 COCTAILS = _DATA_PATH / 'coctails.json'
 PROCESSED_COCKTAILS = _DATA_PATH / 'processed_cocktails.json'
+# binary snapshot of PROCESSED_COCKTAILS, see scripts/build_catalog_snapshot.py
+CATALOG_SNAPSHOT = _DATA_PATH / 'processed_cocktails.snapshot'
 ALCOHOL_DEGREE = _DATA_PATH / 'alcohol_degree.json'
 
 
 def load_data(path: pathlib.Path):
     with path.open(encoding='utf8') as f:
         return json.load(f)
+
+
+def file_fingerprint(path: pathlib.Path) -> str:
+    digest = hashlib.sha1()
+    with path.open('rb') as f:
+        for block in iter(lambda: f.read(2 ** 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,180 @@
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from get_drunk_telegram_bot.drinks.cocktail import Cocktail
+
+# fields of ingredients and tools items, in the stored order
+ITEM_FIELDS = ('name', 'amount', 'unit')
+
+
+class StringTable:
+    """
+    StringTable keeps many strings in one utf-8 buffer addressed by offsets,
+    instead of one python object per string. None values are kept in a mask.
+
+    :param strings: optional strings to store.
+    """
+
+    def __init__(self, strings: Iterable[Optional[str]] = ()):
+        encoded, lengths, missing = [], [], []
+        for string in strings:
+            missing.append(string is None)
+            encoded.append(b'' if string is None else string.encode('utf8'))
+            lengths.append(len(encoded[-1]))
+
+        self.buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        self.offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.missing = np.array(missing, dtype=bool)
+
+    @classmethod
+    def from_arrays(cls, buffer: np.array, offsets: np.array, missing: np.array) -> 'StringTable':
+        """
+        Wraps already built (e.g. memory mapped) arrays without copying them.
+        """
+        table = cls()
+        table.buffer, table.offsets, table.missing = buffer, offsets, missing
+        return table
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self.missing[i]:
+            return None
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class ColumnarCatalog:
+    """
+    ColumnarCatalog stores cocktails column by column: numbers in numpy
+    arrays, texts in StringTables, and ingredients, tools, characteristics
+    and recipe steps as offsets into flat id arrays. Ingredient and tool
+    fields (name, amount, unit) and characteristics are ids into one
+    vocabulary of distinct values. Cocktail objects are built on access only.
+    """
+
+    def __init__(self):
+        self.vocabulary: List = []
+        self.names = StringTable()
+        self.images = StringTable()
+        self.useful_info = StringTable()
+        self.abv = np.empty(0, dtype=np.float64)
+        self.volume = np.empty(0, dtype=np.float64)
+        # the i-th cocktail items are rows offsets[i]:offsets[i + 1] of the
+        # [item_count, len(ITEM_FIELDS)] ids array
+        self.ingredient_offsets = np.zeros(1, dtype=np.int64)
+        self.ingredient_ids = np.empty((0, len(ITEM_FIELDS)), dtype=np.int32)
+        self.tool_offsets = np.zeros(1, dtype=np.int64)
+        self.tool_ids = np.empty((0, len(ITEM_FIELDS)), dtype=np.int32)
+        self.characteristic_offsets = np.zeros(1, dtype=np.int64)
+        self.characteristic_ids = np.empty(0, dtype=np.int32)
+        self.has_characteristics = np.empty(0, dtype=bool)
+        self.recipe_offsets = np.zeros(1, dtype=np.int64)
+        self.recipe_steps = StringTable()
+        # lowercased ingredient names joined with spaces, the embeders input
+        self.ingredients_strs = StringTable()
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> 'ColumnarCatalog':
+        """
+        :param records: list of Cocktail constructor arguments.
+        """
+        catalog = cls()
+        ids: Dict = {}
+
+        def vocabulary_id(value) -> int:
+            key = (type(value), value)
+            if key not in ids:
+                ids[key] = len(catalog.vocabulary)
+                catalog.vocabulary.append(sys.intern(value) if isinstance(value, str) else value)
+            return ids[key]
+
+        def items_columns(column: str) -> Tuple[np.array, np.array]:
+            lengths, item_ids = [], []
+            for record in records:
+                items = record.get(column) or []
+                lengths.append(len(items))
+                item_ids.extend(
+                    [vocabulary_id(item.get(field)) for field in ITEM_FIELDS] for item in items
+                )
+            offsets = np.zeros(len(records) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            return offsets, np.array(item_ids, dtype=np.int32).reshape(-1, len(ITEM_FIELDS))
+
+        catalog.names = StringTable(record['name'] for record in records)
+        catalog.images = StringTable(record.get('image') for record in records)
+        catalog.useful_info = StringTable(record.get('useful_info') for record in records)
+        catalog.abv = np.array([record.get('abv') or 0.0 for record in records], dtype=np.float64)
+        catalog.volume = np.array(
+            [record.get('volume') or 1.0 for record in records], dtype=np.float64
+        )
+        catalog.ingredient_offsets, catalog.ingredient_ids = items_columns('ingredients')
+        catalog.tool_offsets, catalog.tool_ids = items_columns('tools')
+
+        characteristics = [record.get('characteristics') for record in records]
+        catalog.has_characteristics = np.array(
+            [values is not None for values in characteristics], dtype=bool
+        )
+        catalog.characteristic_offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        np.cumsum(
+            [len(values or []) for values in characteristics],
+            out=catalog.characteristic_offsets[1:],
+        )
+        catalog.characteristic_ids = np.array(
+            [vocabulary_id(value) for values in characteristics for value in values or []],
+            dtype=np.int32,
+        )
+
+        recipes = [record.get('recipe') for record in records]
+        recipes = [recipe if isinstance(recipe, list) else [] for recipe in recipes]
+        catalog.recipe_offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        np.cumsum([len(recipe) for recipe in recipes], out=catalog.recipe_offsets[1:])
+        catalog.recipe_steps = StringTable(str(step) for recipe in recipes for step in recipe)
+
+        catalog.ingredients_strs = StringTable(
+            ' '.join(str(item.get('name')).lower() for item in record.get('ingredients') or [])
+            for record in records
+        )
+        return catalog
+
+    def __len__(self):
+        return len(self.names)
+
+    def __items(self, offsets: np.array, item_ids: np.array, i: int) -> List[Dict]:
+        return [
+            {field: self.vocabulary[j] for field, j in zip(ITEM_FIELDS, row)}
+            for row in item_ids[offsets[i]:offsets[i + 1]]
+        ]
+
+    def ingredients_str(self, i: int) -> str:
+        return self.ingredients_strs[i]
+
+    def cocktail(self, i: int) -> Cocktail:
+        """
+        Builds the Cocktail record of the i-th cocktail.
+        """
+        characteristics = None
+        if self.has_characteristics[i]:
+            start, end = self.characteristic_offsets[i], self.characteristic_offsets[i + 1]
+            characteristics = [self.vocabulary[j] for j in self.characteristic_ids[start:end]]
+
+        return Cocktail(
+            name=self.names[i],
+            characteristics=characteristics,
+            ingredients=self.__items(self.ingredient_offsets, self.ingredient_ids, i),
+            tools=self.__items(self.tool_offsets, self.tool_ids, i),
+            recipe=[
+                self.recipe_steps[j]
+                for j in range(self.recipe_offsets[i], self.recipe_offsets[i + 1])
+            ],
+            image=self.images[i],
+            useful_info=self.useful_info[i],
+            abv=float(self.abv[i]),
+            volume=float(self.volume[i]),
+        )
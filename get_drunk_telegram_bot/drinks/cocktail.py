@@ -1,13 +1,50 @@
-from copy import copy
+import sys
 from io import BytesIO
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 
 import requests
-from lazy import lazy
-from PIL import Image
+
+# marks derived fields which are not computed yet
+_MISSING = object()
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _freeze_items(items: Optional[List[Dict[str, str]]]) -> Tuple[Mapping[str, str], ...]:
+    if items is None:
+        return ()
+    return tuple(
+        MappingProxyType({_intern(k): _intern(v) for k, v in item.items()}) for item in items
+    )
 
 
 class Cocktail:
+    """
+    Cocktail is an immutable catalog record, so it is shared between
+    handlers without copying. Repeated strings (ingredient names, units, ...)
+    are interned, derived fields are computed once, on first access.
+    """
+
+    __slots__ = (
+        '_name',
+        '_characteristics',
+        '_ingredients',
+        '_tools',
+        '_recipe',
+        '_image',
+        '_useful_info',
+        '_abv',
+        '_volume',
+        '_ingredients_str',
+        '_pretty_ingredients',
+        '_recipe_str',
+        '_useful_info_str',
+        '_image_content',
+    )
+
     def __init__(
         self,
         name: str,
@@ -20,80 +57,144 @@ class Cocktail:
         abv: Optional[float] = None,
         volume: Optional[float] = None,
     ):
-        self._name = name
-        self._characteristics = characteristics
-        self._ingredients = ingredients
-        self._tools = tools
-        self._recipe = recipe
-        self._image = image
-        self._useful_info = useful_info
-        self._abv = abv or 0.0
-        self._volume = volume or 1.0
+        if characteristics is not None:
+            characteristics = tuple(map(_intern, characteristics))
+        if isinstance(recipe, list):
+            recipe = tuple(recipe)
+
+        for slot, value in [
+            ('_name', name),
+            ('_characteristics', characteristics),
+            ('_ingredients', _freeze_items(ingredients)),
+            ('_tools', _freeze_items(tools)),
+            ('_recipe', recipe),
+            ('_image', image),
+            ('_useful_info', useful_info),
+            ('_abv', abv or 0.0),
+            ('_volume', volume or 1.0),
+            ('_ingredients_str', _MISSING),
+            ('_pretty_ingredients', _MISSING),
+            ('_recipe_str', _MISSING),
+            ('_useful_info_str', _MISSING),
+            ('_image_content', _MISSING),
+        ]:
+            object.__setattr__(self, slot, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, key):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __reduce__(self):
+        return Cocktail, tuple(self.to_dict().values())
 
     def __repr__(self):
+        dct = self.to_dict()
         return f"""
         {self._name}
-        characteristics: {self._characteristics}
-        ingredients: {self._ingredients}
-        tools: {self._tools}
-        recipe: {self._recipe}
+        characteristics: {dct['characteristics']}
+        ingredients: {dct['ingredients']}
+        tools: {dct['tools']}
+        recipe: {dct['recipe']}
         abv: {self._abv}
         volume: {self._volume}
         """
 
+    def __cached(self, slot: str, compute):
+        value = getattr(self, slot)
+        if value is _MISSING:
+            value = compute()
+            object.__setattr__(self, slot, value)
+        return value
+
+    def to_dict(self) -> Dict:
+        """
+        Returns the constructor arguments as plain (json friendly) values.
+        """
+        characteristics = self._characteristics
+        return {
+            'name': self._name,
+            'characteristics': None if characteristics is None else list(characteristics),
+            'ingredients': [dict(item) for item in self._ingredients],
+            'tools': [dict(item) for item in self._tools],
+            'recipe': list(self._recipe) if isinstance(self._recipe, tuple) else self._recipe,
+            'image': self._image,
+            'useful_info': self._useful_info,
+            'abv': self._abv,
+            'volume': self._volume,
+        }
+
     @property
-    def name(self):
-        return copy(self._name)
+    def name(self) -> str:
+        return self._name
 
     @property
-    def ingredients(self):
-        return copy(self._ingredients)
+    def ingredients(self) -> Tuple[Mapping[str, str], ...]:
+        return self._ingredients
 
     @property
-    def abv(self):
-        return copy(self._abv)
+    def tools(self) -> Tuple[Mapping[str, str], ...]:
+        return self._tools
 
     @property
-    def volume(self):
-        return copy(self._volume)
+    def abv(self) -> float:
+        return self._abv
 
     @property
-    def useful_info(self):
+    def volume(self) -> float:
+        return self._volume
+
+    @property
+    def useful_info(self) -> Optional[str]:
+        return self.__cached('_useful_info_str', self.__format_useful_info)
+
+    def __format_useful_info(self) -> Optional[str]:
         info = []
         if self._useful_info is not None:
-            info.append(copy(self._useful_info))
+            info.append(self._useful_info)
         if self._characteristics is not None:
             info.append(f"\nCharacteristics: {', '.join(self._characteristics)}")
         if len(info) != 0:
             return '\n'.join(info)
         return None
 
-    @ingredients.setter
-    def ingredients(self, ingredients):
-        self._ingredients = copy(ingredients)
-
-    @lazy
+    @property
     def image(self):
+        return self.__cached('_image_content', self.__load_image)
+
+    def __load_image(self):
         if self._image:
+            from PIL import Image
+
             response = requests.get(self._image)
             image = Image.open(BytesIO(response.content))
             return image
         return None
 
     @property
-    def ingredients_str(self):
-        return ' '.join(map(lambda x: x['name'].lower(), self._ingredients))
+    def ingredients_str(self) -> str:
+        return self.__cached(
+            '_ingredients_str',
+            lambda: ' '.join(map(lambda x: x['name'].lower(), self._ingredients)),
+        )
 
     @property
     def recipe(self) -> str:
+        return self.__cached('_recipe_str', self.__format_recipe)
+
+    def __format_recipe(self) -> str:
         try:
             return '\n'.join([f'{i}. {step}' for i, step in enumerate(self._recipe, 1)])
         except TypeError:
             return ''
 
     @property
-    def pretty_ingredients(self) -> List[str]:
-        return [
-            f"{ingredient['name']} {ingredient['amount']} {ingredient['unit']}"
-            for ingredient in self._ingredients
-        ]
+    def pretty_ingredients(self) -> Tuple[str, ...]:
+        return self.__cached(
+            '_pretty_ingredients',
+            lambda: tuple(
+                f"{ingredient['name']} {ingredient['amount']} {ingredient['unit']}"
+                for ingredient in self._ingredients
+            ),
+        )
@@ -1,41 +1,108 @@
 import logging
-from typing import Dict, List, Optional
+import pathlib
+from typing import Dict, List, Optional, Tuple
 
-from get_drunk_telegram_bot.data import PROCESSED_COCKTAILS, load_data
+from get_drunk_telegram_bot.data import (
+    CATALOG_SNAPSHOT,
+    PROCESSED_COCKTAILS,
+    file_fingerprint,
+    load_data,
+)
+from get_drunk_telegram_bot.drinks.catalog import ColumnarCatalog
 from get_drunk_telegram_bot.drinks.cocktail import Cocktail
+from get_drunk_telegram_bot.drinks.name_index import NameIndex
+from get_drunk_telegram_bot.drinks.snapshot import SnapshotError, load_snapshot
 
 logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
 
 
 class Dataset:
-    def __init__(self):
-        coctails_info = map(
-            self.__preprocess_coctail_info, load_data(PROCESSED_COCKTAILS)
+    """
+    Dataset of the coctails. Coctails are kept in a ColumnarCatalog and
+    Cocktail records are built only when they are requested by id.
+
+    The catalog is opened from the binary snapshot when it is present and
+    was built from the current PROCESSED_COCKTAILS json (the fingerprints
+    match), otherwise it is built from the json.
+
+    :param snapshot_path: path to the catalog snapshot
+        (default=CATALOG_SNAPSHOT).
+    """
+
+    def __init__(self, snapshot_path: Optional[pathlib.Path] = None):
+        self.__catalog, self.__fingerprint = self.__load_catalog(
+            pathlib.Path(snapshot_path or CATALOG_SNAPSHOT)
         )
-        self.__coctails = {
-            i: Cocktail(**coctail_info) for i, coctail_info in enumerate(coctails_info)
-        }
+        self.__name_index = NameIndex(list(self.__catalog.names))
 
     def __len__(self):
-        return len(self.__coctails)
+        return len(self.__catalog)
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Content hash of the coctails data the dataset was loaded from
+        """
+        return self.__fingerprint
+
+    @property
+    def name_index(self) -> NameIndex:
+        """
+        Index of the coctail names, ids are the dataset ids
+        """
+        return self.__name_index
+
+    @classmethod
+    def build_catalog(cls, fingerprint: Optional[str] = None) -> Tuple[ColumnarCatalog, str]:
+        """
+        Builds the catalog from PROCESSED_COCKTAILS json
+
+        Args:
+            fingerprint: content hash of the json if it is already computed
 
-    def __preprocess_coctail_info(self, coctail_info: Dict) -> Dict:
+        Returns:
+            catalog: ColumnarCatalog
+            fingerprint: str, content hash of the json
+        """
+        coctails_info = map(cls.__preprocess_coctail_info, load_data(PROCESSED_COCKTAILS))
+        return (
+            ColumnarCatalog.from_records(list(coctails_info)),
+            fingerprint or file_fingerprint(PROCESSED_COCKTAILS),
+        )
+
+    def __load_catalog(self, snapshot_path: pathlib.Path) -> Tuple[ColumnarCatalog, str]:
+        if not snapshot_path.exists():
+            return self.build_catalog()
+        try:
+            catalog, fingerprint = load_snapshot(snapshot_path)
+        except SnapshotError as e:
+            logging.warning(f'Failed to open catalog snapshot: {e}')
+            return self.build_catalog()
+
+        # without the json the snapshot is the only source
+        if not PROCESSED_COCKTAILS.exists():
+            return catalog, fingerprint
+        source_fingerprint = file_fingerprint(PROCESSED_COCKTAILS)
+        if fingerprint != source_fingerprint:
+            logging.warning(f'{snapshot_path} is out of date with {PROCESSED_COCKTAILS}, ignoring it')
+            return self.build_catalog(source_fingerprint)
+        return catalog, fingerprint
+
+    @staticmethod
+    def __preprocess_coctail_info(coctail_info: Dict) -> Dict:
         return {k.lower(): i for k, i in coctail_info.items() if k != 'id'}
 
     def get_ingredients(self) -> List[str]:
-        return [coctail.ingredients_str for coctail in self.__coctails.values()]
+        return [self.__catalog.ingredients_str(i) for i in range(len(self))]
 
     def get_names_and_ingredients(self) -> List[str]:
-        return [
-            (coctail.name, coctail.ingredients_str)
-            for coctail in self.__coctails.values()
-        ]
+        return list(zip(self.__catalog.names, self.get_ingredients()))
 
     def get_coctail_by_id(self, coctail_id: int) -> Optional[Cocktail]:
-        try:
-            return self.__coctails[coctail_id]
-        except KeyError:
+        if not 0 <= coctail_id < len(self):
             logging.warning(f'Tried to get non existing coctail: {coctail_id}')
+            return None
+        return self.__catalog.cocktail(int(coctail_id))
 
     def get_coctails_by_ids(self, coctail_ids: List[int]) -> List[Cocktail]:
         coctails = [self.get_coctail_by_id(i) for i in coctail_ids]
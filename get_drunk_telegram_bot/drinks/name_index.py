@@ -0,0 +1,70 @@
+import difflib
+from collections import Counter, defaultdict
+from typing import List, Optional
+
+
+def strip_name(name: str) -> str:
+    """
+    Drops decorations (emoji) from the cocktail name and lowercases it,
+    e.g. 'Pina Colada 🍍 🥃' -> 'pina colada'.
+    """
+    return ' '.join(word for word in name.split() if word.lower()[0].islower()).lower()
+
+
+def trigrams(text: str) -> List[str]:
+    text = f' {text} '
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+
+class NameIndex:
+    """
+    NameIndex finds the cocktail name closest to a query.
+
+    Names are indexed by character trigrams; only the names sharing the most
+    trigrams with the query are compared with difflib.SequenceMatcher.
+
+    :param names: list of cocktail names, position is the cocktail id;
+
+    :param shortlist_size: int, max number of names compared exactly
+        (default=20).
+    """
+
+    def __init__(self, names: List[str], shortlist_size: int = 20):
+        self.names = [strip_name(name) for name in names]
+        self.shortlist_size = shortlist_size
+        self.__postings = defaultdict(list)
+        for i, name in enumerate(self.names):
+            for trigram in set(trigrams(name)):
+                self.__postings[trigram].append(i)
+
+    def shortlist(self, query: str) -> List[int]:
+        """
+        Returns ids of the names sharing the most trigrams with the query.
+        """
+        shared = Counter()
+        for trigram in set(trigrams(query)):
+            shared.update(self.__postings.get(trigram, ()))
+        return [i for i, _ in shared.most_common(self.shortlist_size)]
+
+    def search(self, query: str, min_ratio: float = 0.8) -> Optional[int]:
+        """
+        Finds the name most similar to the query.
+
+        :param query: str, lowercase cocktail name;
+
+        :param min_ratio: float, SequenceMatcher ratio the name should exceed;
+
+        :return: id of the best name, None if no name is similar enough.
+        """
+        best_id, best_ratio = None, min_ratio
+        matcher = difflib.SequenceMatcher(a=query)
+        for i in sorted(self.shortlist(query)):
+            name = self.names[i]
+            # ratio can't exceed 2 * min(len) / (sum of lengths)
+            if 2 * min(len(name), len(query)) <= best_ratio * (len(name) + len(query)):
+                continue
+            matcher.set_seq2(name)
+            ratio = matcher.ratio()
+            if ratio > best_ratio:
+                best_id, best_ratio = i, ratio
+        return best_id
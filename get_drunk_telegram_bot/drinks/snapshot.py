@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import pathlib
+import struct
+import sys
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from get_drunk_telegram_bot.drinks.catalog import ColumnarCatalog, StringTable
+
+SNAPSHOT_VERSION = 2
+
+# magic, version, sha1 of the metadata, metadata length
+_HEADER = struct.Struct('<8sI20sQ')
+_MAGIC = b'GDCATSNP'
+_ALIGNMENT = 8
+
+_ARRAYS = (
+    'abv',
+    'volume',
+    'ingredient_offsets',
+    'ingredient_ids',
+    'tool_offsets',
+    'tool_ids',
+    'characteristic_offsets',
+    'characteristic_ids',
+    'has_characteristics',
+    'recipe_offsets',
+)
+_STRING_TABLES = ('names', 'images', 'useful_info', 'recipe_steps', 'ingredients_strs')
+_STRING_TABLE_ARRAYS = ('buffer', 'offsets', 'missing')
+
+
+class SnapshotError(ValueError):
+    """
+    Raised when a catalog snapshot is corrupted or has unsupported version.
+    """
+
+
+def _padding(size: int) -> bytes:
+    return b'\0' * (-size % _ALIGNMENT)
+
+
+def save_snapshot(
+    catalog: ColumnarCatalog, path: Union[str, pathlib.Path], fingerprint: str
+):
+    """
+    Writes the catalog into one binary file: a fixed size header, json
+    metadata (array layout, vocabulary, source fingerprint, sha1 of the
+    arrays) and the raw little-endian arrays, each aligned to 8 bytes.
+
+    :param catalog: ColumnarCatalog to save;
+
+    :param path: snapshot path;
+
+    :param fingerprint: str, fingerprint of the data the catalog was built from.
+    """
+    arrays = {name: getattr(catalog, name) for name in _ARRAYS}
+    for table in _STRING_TABLES:
+        for name in _STRING_TABLE_ARRAYS:
+            arrays[f'{table}.{name}'] = getattr(getattr(catalog, table), name)
+
+    layout, chunks, offset = {}, [], 0
+    payload_checksum = hashlib.sha1()
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=np.asarray(array).dtype.newbyteorder('<'))
+        layout[name] = [array.dtype.str, list(array.shape), offset]
+        chunks.extend([array.tobytes(), _padding(array.nbytes)])
+        offset += array.nbytes + len(chunks[-1])
+        payload_checksum.update(chunks[-2])
+        payload_checksum.update(chunks[-1])
+
+    metadata = json.dumps(
+        {
+            'fingerprint': fingerprint,
+            'vocabulary': catalog.vocabulary,
+            'arrays': layout,
+            'payload_size': offset,
+            'payload_sha1': payload_checksum.hexdigest(),
+        }
+    ).encode('utf8')
+    checksum = hashlib.sha1(metadata).digest()
+
+    path = pathlib.Path(path)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, SNAPSHOT_VERSION, checksum, len(metadata)))
+        f.write(metadata)
+        f.write(_padding(_HEADER.size + len(metadata)))
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def _open(path: Union[str, pathlib.Path]) -> Tuple[np.memmap, Dict, int]:
+    # maps the file and validates the header, the metadata and the file size
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    if data.size < _HEADER.size:
+        raise SnapshotError(f'{path} is too short to be a catalog snapshot')
+
+    magic, version, checksum, metadata_length = _HEADER.unpack(data[:_HEADER.size].tobytes())
+    if magic != _MAGIC:
+        raise SnapshotError(f'{path} is not a catalog snapshot')
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(
+            f'{path} has version {version}, expected version {SNAPSHOT_VERSION}'
+        )
+
+    metadata_end = _HEADER.size + metadata_length
+    metadata = data[_HEADER.size:metadata_end].tobytes()
+    if hashlib.sha1(metadata).digest() != checksum:
+        raise SnapshotError(f'{path} checksum mismatch')
+    metadata = json.loads(metadata.decode('utf8'))
+
+    payload_start = metadata_end + len(_padding(metadata_end))
+    if data.size != payload_start + metadata['payload_size']:
+        raise SnapshotError(f'{path} is truncated')
+    return data, metadata, payload_start
+
+
+def verify_snapshot(path: Union[str, pathlib.Path]):
+    """
+    Checks the checksum of the whole snapshot, arrays included. load_snapshot
+    checks only the header and the metadata, so that opening the snapshot
+    does not read all of its pages; run this once after the snapshot is built.
+
+    :param path: snapshot path.
+    """
+    data, metadata, payload_start = _open(path)
+    if hashlib.sha1(data[payload_start:]).hexdigest() != metadata['payload_sha1']:
+        raise SnapshotError(f'{path} checksum mismatch')
+
+
+def load_snapshot(path: Union[str, pathlib.Path]) -> Tuple[ColumnarCatalog, str]:
+    """
+    Opens the snapshot memory-mapped: arrays are views of the file pages,
+    which are shared by all the processes that open the same snapshot.
+
+    :param path: snapshot path;
+
+    :return: catalog and the fingerprint of its source data.
+    """
+    data, metadata, payload_start = _open(path)
+
+    arrays = {}
+    for name, (dtype, shape, offset) in metadata['arrays'].items():
+        dtype = np.dtype(dtype)
+        start = payload_start + offset
+        size = int(np.prod(shape)) * dtype.itemsize
+        arrays[name] = data[start:start + size].view(dtype).reshape(shape)
+
+    catalog = ColumnarCatalog()
+    catalog.vocabulary = [
+        sys.intern(value) if isinstance(value, str) else value
+        for value in metadata['vocabulary']
+    ]
+    for name in _ARRAYS:
+        setattr(catalog, name, arrays[name])
+    for table in _STRING_TABLES:
+        setattr(
+            catalog,
+            table,
+            StringTable.from_arrays(*[arrays[f'{table}.{name}'] for name in _STRING_TABLE_ARRAYS]),
+        )
+    return catalog, metadata['fingerprint']
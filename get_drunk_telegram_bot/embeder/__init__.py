@@ -1,3 +1,18 @@
+import importlib
+
 from get_drunk_telegram_bot.embeder.abstract import IEmbeder
-from get_drunk_telegram_bot.embeder.bert import BertEmbeder
-from get_drunk_telegram_bot.embeder.tfidf import TfidfEmbeder
+from get_drunk_telegram_bot.embeder.caching import CachingEmbeder
+from get_drunk_telegram_bot.embeder.parallel import ParallelEmbeder, embed_parallel
+from get_drunk_telegram_bot.embeder.projection import Projection
+
+# heavy backends (torch, sklearn) are imported on first access only
+_LAZY = {
+    'BertEmbeder': 'get_drunk_telegram_bot.embeder.bert',
+    'TfidfEmbeder': 'get_drunk_telegram_bot.embeder.tfidf',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,5 +1,6 @@
 import abc
-from typing import List
+import pathlib
+from typing import List, Optional, Union
 
 import numpy as np
 
@@ -16,3 +17,33 @@ class IEmbeder(metaclass=abc.ABCMeta):
         Returns:
             vectors: array
         """
+
+    def embed_to(self, data: List[str], path: Union[str, pathlib.Path]) -> Optional[np.array]:
+        """
+        Embeds data straight into a .npy file, without keeping all the
+        vectors in memory. Embeders that can't do it return None.
+
+        Args:
+            data: array
+            path: .npy file to write
+
+        Returns:
+            vectors: array memory-mapped to the file, or None
+        """
+        return None
+
+    @property
+    def name(self) -> str:
+        """
+        Short name of the embeder, wrappers (e.g. caching) return the name of
+        the wrapped embeder.
+        """
+        return type(self).__name__
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Identity of the embeder and its configuration. Vectors produced by
+        embeders with equal fingerprints are interchangeable.
+        """
+        return type(self).__name__
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 import numpy as np
 import torch
@@ -6,43 +6,154 @@ from pytorch_pretrained_bert import BertModel, BertTokenizer
 
 from get_drunk_telegram_bot.embeder import IEmbeder
 
+INFERENCE_MODES = ('eager', 'quantized', 'traced', 'quantized-traced')
+
+
+class _ClsEncoder(torch.nn.Module):
+    """
+    Returns the last layer [CLS] vectors, so that the whole forward pass
+    can be traced as one graph.
+    """
+
+    def __init__(self, model: BertModel):
+        super().__init__()
+        self.model = model
+
+    def forward(self, tokens: torch.Tensor, attention_mask: torch.Tensor):
+        encoded_layer, _ = self.model(
+            tokens, attention_mask=attention_mask, output_all_encoded_layers=False
+        )
+        return encoded_layer[:, 0, :]
+
 
 class BertEmbeder(IEmbeder):
     """
     BertCocktailModel performs cocktail recipe search by finding the most
     similar cocktail recipe using Bert model.
+
+    Texts are sorted by their token count and batched, so that every batch is
+    padded only up to its longest text (with an attention mask); vectors
+    are returned in the original order.
+
+    :param model_name: str, pretrained model name or path;
+
+    :param batch_size: int, number of texts in one forward pass;
+
+    :param inference_mode: str, one of INFERENCE_MODES. 'quantized' applies
+        dynamic int8 quantization to Linear layers, 'traced' traces the model
+        with TorchScript once at start (default='eager', float32).
+
+    The number of torch threads is process-wide, it is set once at start
+    (see --num-threads), not by the embeder.
     """
 
-    def __init__(self, model_name='bert-base-uncased', batch_size: int = 32):
+    def __init__(
+        self,
+        model_name='bert-base-uncased',
+        batch_size: int = 32,
+        inference_mode: str = 'eager',
+    ):
+        if inference_mode not in INFERENCE_MODES:
+            raise ValueError(
+                f'Error in inference_mode. Available modes: {list(INFERENCE_MODES)}, '
+                f'Got: {inference_mode}'
+            )
+
+        self.model_name = model_name
+        self.inference_mode = inference_mode
         self.tokenizer = BertTokenizer.from_pretrained(model_name)
         self.model = BertModel.from_pretrained(model_name)
+        self.model.eval()
         self.max_sequence_len = 256
-        self.batch_size = 32
+        self.batch_size = batch_size
+        self.encoder = self.__create_encoder()
 
-    def tokenize(self, text: str):
-        tokenized_text = self.tokenizer.tokenize(text)
+    @property
+    def fingerprint(self) -> str:
         return (
-            ['[CLS]']
-            + tokenized_text
-            + ['[SEP]']
-            + ['[PAD]'] * (self.max_sequence_len - len(tokenized_text) - 2)
+            f'{type(self).__name__}:{self.model_name}:{self.max_sequence_len}:'
+            f'{self.inference_mode}'
         )
 
+    def __create_encoder(self) -> torch.nn.Module:
+        if 'quantized' in self.inference_mode:
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        encoder = _ClsEncoder(self.model).eval()
+
+        if 'traced' in self.inference_mode:
+            example = self.pad([self.encode(self.tokenize('example text'))] * 2)
+            with torch.no_grad():
+                encoder = torch.jit.trace(encoder, example, check_trace=False)
+        return encoder
+
+    def tokenize(self, text: str):
+        tokenized_text = self.tokenizer.tokenize(text)[:self.max_sequence_len - 2]
+        return ['[CLS]'] + tokenized_text + ['[SEP]']
+
     def encode(self, tokenized_text: List):
         return self.tokenizer.convert_tokens_to_ids(tokenized_text)
 
+    def pad(self, batch: List[List[int]]) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Pads encoded texts up to the longest one.
+
+        :param batch: list of token ids lists;
+
+        :return: token ids and attention mask tensors, [batch_size, max_len].
+        """
+        pad_id = self.encode(['[PAD]'])[0]
+        max_len = max(len(ids) for ids in batch)
+        tokens = torch.full((len(batch), max_len), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch), max_len), dtype=torch.long)
+        for i, ids in enumerate(batch):
+            tokens[i, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[i, :len(ids)] = 1
+        return tokens, attention_mask
+
     def embed(self, data: List[str]) -> np.array:
-        batches = []
+        if len(data) == 0:
+            return np.empty((0, self.model.config.hidden_size), dtype=np.float32)
 
-        for i in range(0, len(data), self.batch_size):
-            tokens_tensor = torch.tensor(
-                [
-                    self.encode(self.tokenize(text))
-                    for text in data[i:i + self.batch_size]
-                ]
+        encoded = [self.encode(self.tokenize(text)) for text in data]
+        order = np.argsort([len(ids) for ids in encoded], kind='stable')
+
+        batches = []
+        for i in range(0, len(order), self.batch_size):
+            tokens_tensor, attention_mask = self.pad(
+                [encoded[j] for j in order[i:i + self.batch_size]]
             )
             with torch.no_grad():
-                encoded_layers, _ = self.model(tokens_tensor)
-            batches.append(encoded_layers[-1][:, 0, :])
+                batches.append(self.encoder(tokens_tensor, attention_mask))
 
-        return torch.cat(batches).detach().numpy()
+        vectors = np.empty((len(data), batches[0].shape[1]), dtype=np.float32)
+        vectors[order] = torch.cat(batches).detach().numpy()
+        return vectors
+
+    def check_parity(self, data: List[str]) -> float:
+        """
+        Compares embeddings with the ones of the eager float32 model.
+
+        :param data: list of texts to compare embeddings for;
+
+        :return: float, the lowest cosine similarity between the embeddings.
+        """
+        reference = BertEmbeder(self.model_name, self.batch_size)
+        expected, actual = reference.embed(data), self.embed(data)
+
+        norms = np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+        norms[norms == 0] = 1
+        return float(((expected * actual).sum(axis=1) / norms).min())
+
+
+def create_worker_embeder(**kwargs) -> BertEmbeder:
+    """
+    Creates BertEmbeder in a process pool worker (see ParallelEmbeder). The
+    worker process runs one torch thread, so that workers don't compete for
+    the same cores.
+
+    :param kwargs: BertEmbeder arguments.
+    """
+    torch.set_num_threads(1)
+    return BertEmbeder(**kwargs)
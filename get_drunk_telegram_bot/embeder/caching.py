@@ -0,0 +1,123 @@
+import threading
+from collections import OrderedDict
+import pathlib
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from scipy import sparse
+
+from get_drunk_telegram_bot.embeder import IEmbeder
+
+Vector = Union[np.array, sparse.spmatrix]
+
+
+class CachingEmbeder(IEmbeder):
+    """
+    CachingEmbeder wraps any embeder with a bounded LRU cache of embeddings.
+
+    Cache keys are canonicalized texts (lowercased, whitespace collapsed,
+    tokens sorted), so 'Rum  lime' and 'lime rum' share one entry. The
+    wrapped embeder receives the original text of the first miss. Batches
+    larger than max_entries (e.g. the whole catalog) bypass the cache.
+
+    :param embeder: IEmbeder, embeder to cache;
+
+    :param max_entries: int, max number of cached embeddings;
+
+    :param max_bytes: int, max total size of cached embeddings in bytes.
+    """
+
+    def __init__(
+        self, embeder: IEmbeder, max_entries: int = 1024, max_bytes: int = 64 * 2 ** 20
+    ):
+        self.__embeder = embeder
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__cache = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def name(self) -> str:
+        return self.__embeder.name
+
+    @property
+    def fingerprint(self) -> str:
+        return f'{type(self).__name__}({self.__embeder.fingerprint})'
+
+    @staticmethod
+    def canonicalize(text: str) -> str:
+        return ' '.join(sorted(text.lower().split()))
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self.__cache),
+                'bytes': self.__bytes,
+            }
+
+    def embed_to(self, data: List[str], path: Union[str, pathlib.Path]) -> Optional[np.array]:
+        # batches written to a file are too large to be cached
+        return self.__embeder.embed_to(data, path)
+
+    def embed(self, data: List[str]) -> Vector:
+        if len(data) == 0 or len(data) > self.__max_entries:
+            return self.__embeder.embed(data)
+
+        texts = [self.canonicalize(text) for text in data]
+        vectors = {}
+        with self.__lock:
+            for text in texts:
+                if text in self.__cache:
+                    self.__cache.move_to_end(text)
+                    vectors[text] = self.__cache[text]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        # canonical text -> original text to embed
+        missing = OrderedDict()
+        for text, original in zip(texts, data):
+            if text not in vectors:
+                missing.setdefault(text, original)
+        if missing:
+            embeddings = self.__embeder.embed(list(missing.values()))
+            for i, text in enumerate(missing):
+                vectors[text] = self.__row(embeddings, i)
+            with self.__lock:
+                for text in missing:
+                    self.__put(text, vectors[text])
+
+        rows = [vectors[text] for text in texts]
+        if any(sparse.issparse(row) for row in rows):
+            return sparse.vstack(rows, format='csr')
+        return np.stack(rows)
+
+    @staticmethod
+    def __row(embeddings: Vector, i: int) -> Vector:
+        if sparse.issparse(embeddings):
+            return sparse.csr_matrix(embeddings[i])
+        # copy, so that the cached row doesn't keep the whole batch alive
+        return np.array(embeddings[i])
+
+    @staticmethod
+    def __size(vector: Vector) -> int:
+        if sparse.issparse(vector):
+            return vector.data.nbytes + vector.indices.nbytes + vector.indptr.nbytes
+        return vector.nbytes
+
+    def __put(self, text: str, vector: Vector):
+        if text in self.__cache:
+            return
+
+        self.__cache[text] = vector
+        self.__bytes += self.__size(vector)
+        while self.__cache and (
+            len(self.__cache) > self.__max_entries or self.__bytes > self.__max_bytes
+        ):
+            _, evicted = self.__cache.popitem(last=False)
+            self.__bytes -= self.__size(evicted)
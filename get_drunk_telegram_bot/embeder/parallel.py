@@ -0,0 +1,125 @@
+import multiprocessing
+import pathlib
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from get_drunk_telegram_bot.embeder import IEmbeder
+
+EmbederFactory = Callable[[], IEmbeder]
+
+# embeder of the current pool worker, created once by _init_worker
+_worker_embeder = None
+
+
+def _init_worker(embeder_factory: EmbederFactory):
+    global _worker_embeder
+    _worker_embeder = embeder_factory()
+
+
+def _embed_shard(shard: Tuple[int, List[str]]) -> Tuple[int, np.array]:
+    start, texts = shard
+    return start, np.asarray(_worker_embeder.embed(texts))
+
+
+def embed_parallel(
+    embeder_factory: EmbederFactory,
+    data: List[str],
+    n_workers: Optional[int] = None,
+    shard_size: int = 256,
+    out_path: Optional[Union[str, pathlib.Path]] = None,
+) -> np.array:
+    """
+    Embeds data with a pool of processes. Every worker creates its embeder
+    once with embeder_factory, shards are written into one preallocated
+    matrix as soon as they are ready.
+
+    :param embeder_factory: picklable callable returning a dense IEmbeder,
+        e.g. functools.partial(bert.create_worker_embeder);
+
+    :param data: list of texts to embed;
+
+    :param n_workers: int, number of processes (default=cpu count);
+
+    :param shard_size: int, number of texts sent to a worker at once;
+
+    :param out_path: path of .npy file to write vectors to. If set, the
+        returned matrix is memory-mapped to it (default=None, in memory).
+
+    :return: array, [len(data), vector_size].
+    """
+    shards = [(start, data[start:start + shard_size]) for start in range(0, len(data), shard_size)]
+    # an empty shard still defines the vector size of an empty result
+    shards = shards or [(0, [])]
+    context = multiprocessing.get_context('spawn')
+
+    vectors = None
+    with context.Pool(n_workers, initializer=_init_worker, initargs=(embeder_factory,)) as pool:
+        for start, shard_vectors in pool.imap_unordered(_embed_shard, shards):
+            if vectors is None:
+                shape = (len(data), shard_vectors.shape[1])
+                if out_path is not None and len(data) > 0:
+                    vectors = np.lib.format.open_memmap(
+                        out_path, mode='w+', dtype=shard_vectors.dtype, shape=shape
+                    )
+                else:
+                    vectors = np.empty(shape, dtype=shard_vectors.dtype)
+            vectors[start:start + len(shard_vectors)] = shard_vectors
+
+    if isinstance(vectors, np.memmap):
+        vectors.flush()
+    elif out_path is not None:
+        # empty files can't be memory-mapped
+        np.save(out_path, vectors)
+    return vectors
+
+
+class ParallelEmbeder(IEmbeder):
+    """
+    ParallelEmbeder embeds large batches (e.g. the whole catalog) with a
+    process pool and small ones (e.g. queries) with a local embeder.
+
+    :param embeder: IEmbeder, local embeder, also defines the fingerprint;
+
+    :param worker_factory: picklable callable creating an embeder equivalent
+        to the local one in every worker (usually limited to one thread);
+
+    :param n_workers: int, number of processes (default=cpu count);
+
+    :param shard_size: int, number of texts sent to a worker at once. Batches
+        not larger than that are embedded locally.
+    """
+
+    def __init__(
+        self,
+        embeder: IEmbeder,
+        worker_factory: EmbederFactory,
+        n_workers: Optional[int] = None,
+        shard_size: int = 256,
+    ):
+        self.__embeder = embeder
+        self.__worker_factory = worker_factory
+        self.__n_workers = n_workers
+        self.__shard_size = shard_size
+
+    @property
+    def name(self) -> str:
+        return self.__embeder.name
+
+    @property
+    def fingerprint(self) -> str:
+        return self.__embeder.fingerprint
+
+    def embed_to(self, data: List[str], path: Union[str, pathlib.Path]) -> Optional[np.array]:
+        if len(data) <= self.__shard_size:
+            return None
+        return embed_parallel(
+            self.__worker_factory, data, self.__n_workers, self.__shard_size, out_path=path
+        )
+
+    def embed(self, data: List[str]) -> np.array:
+        if len(data) <= self.__shard_size:
+            return self.__embeder.embed(data)
+        return embed_parallel(
+            self.__worker_factory, data, self.__n_workers, self.__shard_size
+        )
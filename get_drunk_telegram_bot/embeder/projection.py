@@ -0,0 +1,115 @@
+import hashlib
+import pathlib
+from typing import Optional, Union
+
+import numpy as np
+from scipy import sparse
+
+from get_drunk_telegram_bot.similarity import CosineSimilarity, SparseCosineSimilarity
+from get_drunk_telegram_bot.similarity.metrics import recall_at_k
+
+Vector = Union[np.array, sparse.spmatrix]
+
+
+class Projection:
+    """
+    Projection is a linear map of embeddings into a lower dimensional space,
+    fitted offline (PCA for dense vectors, TruncatedSVD for sparse ones) and
+    stored as plain arrays, so sklearn is not needed to apply it.
+
+    :param components: array, [dim, vector_size], projection axes;
+
+    :param mean: array, [vector_size], subtracted before projecting
+        (default=None, no centering);
+
+    :param method: str, name of the fitting method (default='pca').
+    """
+
+    def __init__(
+        self, components: np.array, mean: Optional[np.array] = None, method: str = 'pca'
+    ):
+        self.components = np.asarray(components, dtype=np.float32)
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+        self.method = method
+
+        digest = hashlib.sha1(self.components.tobytes())
+        if self.mean is not None:
+            digest.update(self.mean.tobytes())
+        self.__fingerprint = f'{type(self).__name__}:{method}:{self.dim}:{digest.hexdigest()}'
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def fingerprint(self) -> str:
+        return self.__fingerprint
+
+    @classmethod
+    def fit(cls, vectors: Vector, dim: int, seed: int = 0) -> 'Projection':
+        """
+        Fits TruncatedSVD on sparse vectors (keeps them uncentered and sparse)
+        and PCA on dense ones.
+        """
+        if sparse.issparse(vectors):
+            from sklearn.decomposition import TruncatedSVD
+
+            svd = TruncatedSVD(n_components=dim, random_state=seed).fit(vectors)
+            return cls(svd.components_, method='svd')
+
+        from sklearn.decomposition import PCA
+
+        pca = PCA(n_components=dim, random_state=seed).fit(np.asarray(vectors))
+        return cls(pca.components_, mean=pca.mean_, method='pca')
+
+    def transform(self, vectors: Vector) -> np.array:
+        """
+        :param vectors: array or sparse matrix, [count, vector_size];
+
+        :return: array, [count, dim], float32.
+        """
+        projected = vectors @ self.components.T
+        if self.mean is not None:
+            projected = projected - self.mean.dot(self.components.T)
+        return np.asarray(projected, dtype=np.float32)
+
+    def recall(self, anchors: Vector, candidates: Vector, k: int) -> float:
+        """
+        Measures recall@k of the cosine ranking in the projected space against
+        the full dimensional one.
+
+        :param anchors: array or sparse matrix, [anchor_count, vector_size];
+
+        :param candidates: array or sparse matrix, [candidate_count, vector_size];
+
+        :param k: int;
+
+        :return: float, from 0 to 1.
+        """
+        if sparse.issparse(candidates):
+            full = SparseCosineSimilarity()
+        else:
+            full = CosineSimilarity()
+        _, expected_ranks = full.rank_batch(anchors, full.prepare(candidates), k)
+
+        projected = CosineSimilarity()
+        _, actual_ranks = projected.rank_batch(
+            self.transform(anchors), projected.prepare(self.transform(candidates)), k
+        )
+        return recall_at_k(expected_ranks, actual_ranks)
+
+    def save(self, path: Union[str, pathlib.Path]):
+        arrays = {'components': self.components, 'method': np.array(self.method)}
+        if self.mean is not None:
+            arrays['mean'] = self.mean
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: Union[str, pathlib.Path]) -> 'Projection':
+        with np.load(path) as arrays:
+            return cls(
+                arrays['components'],
+                mean=arrays['mean'] if 'mean' in arrays else None,
+                method=str(arrays['method']),
+            )
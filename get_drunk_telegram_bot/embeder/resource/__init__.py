@@ -2,8 +2,37 @@ import pathlib
 
 from sklearn.externals import joblib
 
+from get_drunk_telegram_bot.data import file_fingerprint
+
 _ROOT = pathlib.Path(__file__).parent
+_FEATURE_MODEL = _ROOT / 'feature_model.joblib'
 
 
 def load_feature_model():
-    return joblib.load(_ROOT / 'feature_model.joblib')
+    return joblib.load(_FEATURE_MODEL)
+
+
+def feature_model_fingerprint() -> str:
+    return file_fingerprint(_FEATURE_MODEL)
+
+
+def projection_path(embeder_name: str) -> pathlib.Path:
+    return _ROOT / f'{embeder_name}_projection.npz'
+
+
+def load_projection(embeder_name: str):
+    """
+    Loads the projection fitted for embeder_name (e.g. tfidf or bert)
+    with scripts/fit_projection.py.
+    """
+    from get_drunk_telegram_bot.embeder.projection import Projection
+
+    return Projection.load(projection_path(embeder_name))
+
+
+def get_resource_path(filename: str) -> pathlib.Path:
+    """
+    Returns path of an artifact stored next to the feature model,
+    e.g. an index built over candidate vectors.
+    """
+    return _ROOT / filename
@@ -1,14 +1,22 @@
 from typing import List
 
-import numpy as np
+from scipy import sparse
 
 from get_drunk_telegram_bot.embeder import IEmbeder
-from get_drunk_telegram_bot.embeder.resource import load_feature_model
+from get_drunk_telegram_bot.embeder.resource import (
+    feature_model_fingerprint,
+    load_feature_model,
+)
 
 
 class TfidfEmbeder(IEmbeder):
     def __init__(self):
         self.__vectorizer = load_feature_model()
+        self.__fingerprint = f'{type(self).__name__}:{feature_model_fingerprint()}'
 
-    def embed(self, data: List[str]) -> np.array:
-        return self.__vectorizer.transform(data).toarray()
+    @property
+    def fingerprint(self) -> str:
+        return self.__fingerprint
+
+    def embed(self, data: List[str]) -> sparse.csr_matrix:
+        return sparse.csr_matrix(self.__vectorizer.transform(data))
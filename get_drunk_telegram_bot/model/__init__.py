@@ -1,4 +1,18 @@
+import importlib
+
 from get_drunk_telegram_bot.model.abstract import IModel
 from get_drunk_telegram_bot.model.base import BaseModel
+from get_drunk_telegram_bot.model.bm25 import BM25Model
+from get_drunk_telegram_bot.model.cache import CandidateCache
 from get_drunk_telegram_bot.model.predictor import EmbederModel
-from get_drunk_telegram_bot.model.stsbert import STSBertCocktailModel
+
+# heavy backends (torch) are imported on first access only
+_LAZY = {
+    'STSBertCocktailModel': 'get_drunk_telegram_bot.model.stsbert',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -16,3 +16,15 @@ class IModel(metaclass=abc.ABCMeta):
         Returns:
             coctals: closest coctails, array
         """
+
+    def predict_similar(self, coctail_id: int) -> List[Cocktail]:
+        """
+        Find coctails similar to the coctail from the dataset
+
+        Args:
+            coctail_id: dataset id of the coctail, int
+
+        Returns:
+            coctails: similar coctails, most similar first, array
+        """
+        raise NotImplementedError(f'{type(self).__name__} has no similar coctails lookup')
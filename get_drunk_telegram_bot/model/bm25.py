@@ -0,0 +1,97 @@
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from get_drunk_telegram_bot.drinks.cocktail import Cocktail
+from get_drunk_telegram_bot.drinks.dataset import Dataset
+from get_drunk_telegram_bot.model import IModel
+from get_drunk_telegram_bot.similarity.cosine import select_top_k
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Model(IModel):
+    """
+    BM25Model performs lexical cocktail search over an inverted index of
+    ingredient tokens. Only cocktails sharing a token with the query are
+    scored; if match_all is set, only cocktails having every known query
+    token are (when there are any).
+
+    :param dataset: Dataset, cocktails to search in;
+
+    :param k1: float, BM25 term frequency saturation;
+
+    :param b: float, BM25 document length normalization;
+
+    :param top_k: int, max number of cocktails to return (default=all);
+
+    :param match_all: bool, intersect postings of the query tokens.
+    """
+
+    def __init__(
+        self,
+        dataset: Dataset,
+        k1: float = 1.5,
+        b: float = 0.75,
+        top_k: Optional[int] = None,
+        match_all: bool = False,
+    ):
+        self.__dataset = dataset
+        self.__top_k = top_k or len(dataset)
+        self.__match_all = match_all
+        self.__postings = self.__build_postings(dataset.get_ingredients(), k1, b)
+
+    @staticmethod
+    def __build_postings(
+        documents: List[str], k1: float, b: float
+    ) -> Dict[str, Tuple[np.array, np.array]]:
+        frequencies = defaultdict(list)
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for coctail_id, document in enumerate(documents):
+            tokens = tokenize(document)
+            lengths[coctail_id] = len(tokens)
+            for token, frequency in Counter(tokens).items():
+                frequencies[token].append((coctail_id, frequency))
+
+        average_length = max(lengths.mean(), 1.0) if len(documents) else 1.0
+        postings = {}
+        for token, token_frequencies in frequencies.items():
+            ids = np.array([i for i, _ in token_frequencies], dtype=np.int32)
+            tf = np.array([tf for _, tf in token_frequencies], dtype=np.float32)
+            idf = np.log1p((len(documents) - len(ids) + 0.5) / (len(ids) + 0.5))
+            # BM25 term weight doesn't depend on the query, so it is stored
+            # in the postings instead of term frequencies
+            weights = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[ids] / average_length))
+            postings[token] = (ids, weights.astype(np.float32))
+        return postings
+
+    def predict(self, query: str, ignore_max_similarity=False) -> List[Cocktail]:
+        postings = [
+            self.__postings[token]
+            for token in set(tokenize(query))
+            if token in self.__postings
+        ]
+        if len(postings) == 0:
+            return []
+
+        ids = np.concatenate([token_ids for token_ids, _ in postings])
+        weights = np.concatenate([token_weights for _, token_weights in postings])
+
+        if self.__match_all and len(postings) > 1:
+            common = postings[0][0]
+            for token_ids, _ in postings[1:]:
+                common = np.intersect1d(common, token_ids, assume_unique=True)
+            if len(common) > 0:
+                mask = np.isin(ids, common, assume_unique=False)
+                ids, weights = ids[mask], weights[mask]
+
+        coctails_ids, inverse = np.unique(ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        ranks = select_top_k(scores, self.__top_k)
+        return self.__dataset.get_coctails_by_ids(coctails_ids[ranks].tolist())
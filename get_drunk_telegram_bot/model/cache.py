@@ -0,0 +1,93 @@
+import hashlib
+import logging
+import os
+import pathlib
+from contextlib import contextmanager
+from typing import Iterator, Optional, Union
+
+import numpy as np
+from scipy import sparse
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+Matrix = Union[np.array, sparse.spmatrix]
+
+
+class CandidateCache:
+    """
+    CandidateCache persists candidate vectors between process starts.
+
+    Dense matrices are stored as .npy files and loaded memory-mapped, so
+    restarts don't re-embed the catalog and worker processes share the
+    matrix through the OS page cache. Sparse matrices are stored as .npz.
+
+    Every entry is addressed by a key built from the dataset and embeder
+    fingerprints: when either of them changes, the key changes, and the
+    stale entry with the same name is removed on the next save.
+
+    :param cache_dir: path to the directory with cached matrices.
+    """
+
+    def __init__(self, cache_dir: Union[str, pathlib.Path]):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(name: str, *fingerprints: str) -> str:
+        """
+        Builds cache key for the matrix.
+
+        :param name: str, human readable prefix, e.g. embeder name;
+
+        :param fingerprints: str, everything the matrix depends on.
+        """
+        digest = hashlib.sha1('\n'.join(fingerprints).encode()).hexdigest()
+        return f'{name}-{digest}'
+
+    def path(self, key: str, suffix: str = '.npy') -> pathlib.Path:
+        return self.cache_dir / f'{key}{suffix}'
+
+    def load(self, key: str) -> Optional[Matrix]:
+        if self.path(key).exists():
+            return np.load(self.path(key), mmap_mode='r')
+        if self.path(key, '.npz').exists():
+            return sparse.load_npz(self.path(key, '.npz')).tocsr()
+        return None
+
+    @contextmanager
+    def writing(self, key: str) -> Iterator[pathlib.Path]:
+        """
+        Yields a temporary .npy path to write the dense matrix to, e.g.
+        memory-mapped. If the file was written, it becomes the entry when the
+        block exits without errors.
+        """
+        path = self.path(key)
+        tmp_path = path.with_name(f'{path.stem}.{os.getpid()}.tmp{path.suffix}')
+        try:
+            yield tmp_path
+            if tmp_path.exists():
+                os.replace(tmp_path, path)
+                self.__remove_stale(key)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def save(self, key: str, matrix: Matrix):
+        suffix = '.npz' if sparse.issparse(matrix) else '.npy'
+        path = self.path(key, suffix)
+        tmp_path = path.with_name(f'{path.stem}.{os.getpid()}.tmp{suffix}')
+        if sparse.issparse(matrix):
+            sparse.save_npz(tmp_path, matrix)
+        else:
+            np.save(tmp_path, np.ascontiguousarray(matrix))
+        os.replace(tmp_path, path)
+
+        self.__remove_stale(key)
+
+    def __remove_stale(self, key: str):
+        name = key.rsplit('-', 1)[0]
+        for path in self.cache_dir.glob(f'{name}-*'):
+            stale = path.stem != key and path.stem.rsplit('-', 1)[0] == name
+            if stale and '.tmp' not in path.name:
+                logging.info(f'Removing stale cache entry {path}')
+                path.unlink()
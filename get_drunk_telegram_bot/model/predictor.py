@@ -1,13 +1,24 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence
+
+import numpy as np
 
 from get_drunk_telegram_bot.drinks.cocktail import Cocktail
 from get_drunk_telegram_bot.drinks.dataset import Dataset
-from get_drunk_telegram_bot.embeder import IEmbeder
+from get_drunk_telegram_bot.embeder import IEmbeder, Projection
 from get_drunk_telegram_bot.model import IModel
+from get_drunk_telegram_bot.model.cache import CandidateCache
 from get_drunk_telegram_bot.similarity import CosineSimilarity, ISimilarity
 
 
 class EmbederModel(IModel):
+    """
+    EmbederModel ranks the catalog by similarity of the embedded ingredients.
+
+    :param neighbours_k: int, when set, the k nearest neighbours of every
+        coctail are precomputed at load (one batched pass over the candidate
+        matrix) and served by predict_similar (default=None, no graph).
+    """
+
     def __init__(
         self,
         embeder: IEmbeder,
@@ -15,29 +26,191 @@ class EmbederModel(IModel):
         similarity: ISimilarity = CosineSimilarity(),
         max_similarity: Optional[float] = None,
         min_similarity: Optional[float] = None,
+        top_k: Optional[int] = None,
+        cache: Optional[CandidateCache] = None,
+        projection: Optional[Projection] = None,
+        neighbours_k: Optional[int] = None,
     ):
         self.__embeder = embeder
+        self.__projection = projection
         self.__dataset = dataset
         self.__similarity = similarity
         self.__max_similarity = max_similarity
         self.__min_similarity = min_similarity
-        self.__candidate_vectors = self.__embeder.embed(dataset.get_ingredients())
+        self.__candidate_vectors = self.__load_candidate_vectors(cache)
+        self.__top_k = top_k or self.__candidate_vectors.shape[0]
+        self.__neighbours = None
+        if neighbours_k is not None:
+            self.__neighbours = self.__load_neighbours(cache, neighbours_k)
+
+    @property
+    def neighbours(self) -> Optional[np.array]:
+        """
+        kNN graph, [coctail_count, neighbours_k], int32 dataset ids, most
+        similar first; -1 marks neighbours below min_similarity
+        """
+        return self.__neighbours
 
     def predict(self, query: str, ignore_max_similarity=False) -> List[Cocktail]:
-        question_embedding = self.__embeder.embed([query])[0]
-        similarities, ranks = self.__similarity.rank(
-            question_embedding, self.__candidate_vectors
+        coctails_ids = self.predict_ids(query, ignore_max_similarity=ignore_max_similarity)
+        return self.__dataset.get_coctails_by_ids(coctails_ids)
+
+    def predict_ids(
+        self, query: str, k: Optional[int] = None, ignore_max_similarity=False
+    ) -> List[int]:
+        """
+        Same as predict, but returns dataset ids of the closest coctails
+
+        Args:
+            query: client ingredients, str
+            k: max number of coctails, top_k by default
+            ignore_max_similarity: bool, same as in predict
+
+        Returns:
+            coctails_ids: ids of the closest coctails, most similar first
+        """
+        question_embedding = self.__embed([query])[0]
+        similarities, ranks = self.__similarity.top_k(
+            question_embedding, self.__candidate_vectors, k or self.__top_k
+        )
+        return [
+            int(rank)
+            for rank in self.__filter_ranks(similarities, ranks, ignore_max_similarity)
+        ]
+
+    def predict_similar(self, coctail_id: int) -> List[Cocktail]:
+        if self.__neighbours is None:
+            return super().predict_similar(coctail_id)
+
+        coctails_ids = [int(i) for i in self.__neighbours[coctail_id] if i >= 0]
+        return self.__dataset.get_coctails_by_ids(coctails_ids)
+
+    def predict_batch(
+        self,
+        queries: Sequence[str],
+        k: Optional[int] = None,
+        ignore_max_similarity=False,
+    ) -> List[List[Cocktail]]:
+        """
+        Finds closest coctails for every query. All the queries are embedded
+        with one embeder call and ranked with one (chunked) matrix product.
+
+        Args:
+            queries: client ingredients, array of str
+            k: max number of coctails for every query, top_k by default
+            ignore_max_similarity: bool, same as in predict
+
+        Returns:
+            coctails: closest coctails for every query, array of arrays
+        """
+        if len(queries) == 0:
+            return []
+
+        question_embeddings = self.__embed(list(queries))
+        similarities, ranks = self.__similarity.rank_batch(
+            question_embeddings, self.__candidate_vectors, k or self.__top_k
+        )
+        return [
+            self.__dataset.get_coctails_by_ids(
+                self.__filter_ranks(
+                    query_similarities, query_ranks, ignore_max_similarity
+                )
+            )
+            for query_similarities, query_ranks in zip(similarities, ranks)
+        ]
+
+    def __embed(self, data: List[str]):
+        vectors = self.__embeder.embed(data)
+        if self.__projection is not None:
+            vectors = self.__projection.transform(vectors)
+        return vectors
+
+    def __load_candidate_vectors(self, cache: Optional[CandidateCache]):
+        if cache is None:
+            return self.__similarity.prepare(self.__embed(self.__dataset.get_ingredients()))
+
+        key = cache.key(self.__embeder.name, *self.__fingerprints())
+        candidate_vectors = cache.load(key)
+        if candidate_vectors is not None:
+            return self.__similarity.prepare(candidate_vectors)
+
+        if self.__projection is None:
+            # large catalogs are embedded straight into the cache file and
+            # prepared there, so prepare returns the mapped file unchanged
+            with cache.writing(key) as path:
+                candidate_vectors = self.__embeder.embed_to(self.__dataset.get_ingredients(), path)
+                if candidate_vectors is not None:
+                    self.__similarity.prepare_inplace(candidate_vectors)
+                    candidate_vectors.flush()
+            candidate_vectors = cache.load(key)
+            if candidate_vectors is not None:
+                return self.__similarity.prepare(candidate_vectors)
+
+        candidate_vectors = self.__similarity.prepare(
+            self.__embed(self.__dataset.get_ingredients())
+        )
+        cache.save(key, candidate_vectors)
+        return candidate_vectors
+
+    def __fingerprints(self) -> List[str]:
+        fingerprints = [
+            self.__dataset.fingerprint,
+            self.__embeder.fingerprint,
+            type(self.__similarity).__name__,
+        ]
+        if self.__projection is not None:
+            fingerprints.append(self.__projection.fingerprint)
+        return fingerprints
+
+    def __load_neighbours(self, cache: Optional[CandidateCache], k: int) -> np.array:
+        if cache is None:
+            return self.__build_neighbours(k)
+
+        key = cache.key(
+            f'{self.__embeder.name}-knn',
+            *self.__fingerprints(),
+            str(k),
+            str(self.__min_similarity),
+        )
+        neighbours = cache.load(key)
+        if neighbours is None:
+            neighbours = self.__build_neighbours(k)
+            cache.save(key, neighbours)
+        return neighbours
+
+    def __build_neighbours(self, k: int) -> np.array:
+        coctail_count = self.__candidate_vectors.shape[0]
+        if coctail_count == 0:
+            return np.empty((0, k), dtype=np.int32)
+
+        similarities, ranks = self.__similarity.rank_batch(
+            self.__candidate_vectors, self.__candidate_vectors, k + 1
         )
 
+        # drop the coctail itself (or the last one when the coctail isn't
+        # among the k + 1 best, e.g. it has a zero vector)
+        keep = ranks != np.arange(coctail_count)[:, np.newaxis]
+        keep[keep.all(axis=1), -1] = False
+        neighbours = ranks[keep].reshape(coctail_count, -1).astype(np.int32)
+        if self.__min_similarity is not None:
+            similarities = similarities[keep].reshape(coctail_count, -1)
+            neighbours[similarities <= self.__min_similarity] = -1
+        return neighbours
+
+    def __filter_ranks(self, similarities, ranks, ignore_max_similarity):
         coctails_ids = []
 
         if self.__max_similarity is not None and not ignore_max_similarity:
             coctails_ids = [
-                rank for rank in ranks if similarities[rank] > self.__max_similarity
+                rank
+                for rank, similarity in zip(ranks, similarities)
+                if similarity > self.__max_similarity
             ]
         if len(coctails_ids) == 0 and self.__min_similarity is not None:
             coctails_ids = [
-                rank for rank in ranks if similarities[rank] > self.__min_similarity
+                rank
+                for rank, similarity in zip(ranks, similarities)
+                if similarity > self.__min_similarity
             ]
         if (
             len(coctails_ids) == 0
@@ -46,4 +219,4 @@ class EmbederModel(IModel):
         ):
             coctails_ids = ranks
 
-        return self.__dataset.get_coctails_by_ids(coctails_ids)
+        return coctails_ids
@@ -1,36 +1,107 @@
-from typing import List
+import threading
+from collections import OrderedDict
+from typing import List, Optional
 
 import numpy as np
-from semantic_text_similarity.models import WebBertSimilarity
 
 from get_drunk_telegram_bot.drinks.cocktail import Cocktail
-from get_drunk_telegram_bot.drinks.preprocessing import RawDataset
+from get_drunk_telegram_bot.drinks.dataset import Dataset
 from get_drunk_telegram_bot.model import IModel
+from get_drunk_telegram_bot.model.predictor import EmbederModel
 
 
 class STSBertCocktailModel(IModel):
     """
     STSBertCocktailModel performs cocktail recipe search by finding
     the most similar cocktail recipe using pretrained similarity Bert model.
+
+    Scoring the whole catalog with the cross-encoder is too slow, so a cheap
+    retriever picks top_n candidates first and only those are reranked, in
+    one batch. Scores of (query, cocktail id) pairs are kept in a LRU cache.
+
+    :param retriever: EmbederModel, selects the candidates to rerank;
+
+    :param dataset: Dataset, the retriever was built for;
+
+    :param top_n: int, number of retrieved candidates to rerank (default=20);
+
+    :param top_k: int, max number of returned cocktails (default=None, all
+        the reranked ones);
+
+    :param cache_size: int, max number of cached pair scores (default=4096);
+
+    :param similarity_model: model with predict([(text, text), ...]) method
+        returning pair scores (default=None, WebBertSimilarity on cpu).
     """
 
-    def __init__(self, train: RawDataset):
+    def __init__(
+        self,
+        retriever: EmbederModel,
+        dataset: Dataset,
+        top_n: int = 20,
+        top_k: Optional[int] = None,
+        cache_size: int = 4096,
+        similarity_model=None,
+    ):
         super().__init__()
-        self.train = train
-        self.model = WebBertSimilarity(device='cpu', batch_size=10)
+        if similarity_model is None:
+            from semantic_text_similarity.models import WebBertSimilarity
+
+            similarity_model = WebBertSimilarity(device='cpu', batch_size=10)
+
+        self.retriever = retriever
+        self.dataset = dataset
+        self.top_n = top_n
+        self.top_k = top_k
+        self.model = similarity_model
+        self.cache_size = cache_size
+        self.__scores = OrderedDict()
+        self.__lock = threading.Lock()
 
-    def find_one_best_cocktail(self, query: str, data: List):
+    def score(self, query: str, coctail_ids: List[int]) -> np.array:
         """
-        data: List of n best cocktail's recipes
+        Scores query against coctails ingredients with the cross-encoder.
+        Only pairs missing in the cache are passed to the model, in one batch.
+
+        :param query: str, client ingredients;
+
+        :param coctail_ids: list of dataset ids;
+
+        :return: array of scores, [len(coctail_ids)].
         """
-        predictions = self.model.predict([(recipe, query) for recipe in data])
-        return np.array(predictions).argmax()
-
-    def predict(query: str) -> List[Cocktail]:
-        params = {
-            'ingredients': None,
-            'recipe': None,
-            'image': None,
-            'useful_info': None,
-        }
-        return Cocktail(*params)
+        query = ' '.join(query.lower().split())
+        known = {}
+        with self.__lock:
+            for coctail_id in dict.fromkeys(coctail_ids):
+                if (query, coctail_id) in self.__scores:
+                    self.__scores.move_to_end((query, coctail_id))
+                    known[coctail_id] = self.__scores[query, coctail_id]
+
+        missing = [coctail_id for coctail_id in dict.fromkeys(coctail_ids) if coctail_id not in known]
+        if missing:
+            # the cross-encoder runs outside the lock, other queries are not blocked
+            coctails = self.dataset.get_coctails_by_ids(missing)
+            predictions = self.model.predict(
+                [(coctail.ingredients_str, query) for coctail in coctails]
+            )
+            for coctail_id, prediction in zip(missing, predictions):
+                known[coctail_id] = float(prediction)
+
+            with self.__lock:
+                for coctail_id in missing:
+                    self.__scores[query, coctail_id] = known[coctail_id]
+                while len(self.__scores) > self.cache_size:
+                    self.__scores.popitem(last=False)
+
+        return np.array([known[coctail_id] for coctail_id in coctail_ids], dtype=np.float32)
+
+    def predict(self, query: str, ignore_max_similarity=False) -> List[Cocktail]:
+        coctail_ids = self.retriever.predict_ids(
+            query, k=self.top_n, ignore_max_similarity=True
+        )
+        if len(coctail_ids) == 0:
+            return []
+
+        order = np.argsort(-self.score(query, coctail_ids), kind='stable')
+        reranked = [coctail_ids[i] for i in order[:self.top_k]]
+        return self.dataset.get_coctails_by_ids(reranked)
@@ -1,2 +1,5 @@
 from get_drunk_telegram_bot.similarity.abstract import ISimilarity
 from get_drunk_telegram_bot.similarity.cosine import CosineSimilarity
+from get_drunk_telegram_bot.similarity.sparse import SparseCosineSimilarity
+from get_drunk_telegram_bot.similarity.ivf import IVFCosineSimilarity
+from get_drunk_telegram_bot.similarity.quantized import QuantizedCosineSimilarity
@@ -24,3 +24,65 @@ class ISimilarity(metaclass=abc.ABCMeta):
             similarities: array, [candidate_count]
             ranks: array, [candidate_count]
         """
+
+    def prepare(self, candidates: np.array) -> np.array:
+        """
+        Preprocesses candidate vectors once, before they are passed to top_k
+
+        Args:
+            candidates: array, [candidate_count, vector_size]
+
+        Returns:
+            candidates: array, [candidate_count, vector_size]
+        """
+        return candidates
+
+    def prepare_inplace(self, candidates: np.array):
+        """
+        Preprocesses a writable candidate matrix (e.g. memory-mapped to a
+        cache file) in place, so that prepare returns it unchanged
+
+        Args:
+            candidates: array, [candidate_count, vector_size]
+        """
+        candidates[:] = self.prepare(candidates)
+
+    def top_k(
+        self, anchor: np.array, candidates: np.array, k: int
+    ) -> Tuple[np.array, np.array]:
+        """
+        Finds k best candidates for anchor vector
+
+        Args:
+            anchor: array, [vector_size]
+            candidates: array, [candidate_count, vector_size], prepared
+            k: int, number of candidates to return
+
+        Returns:
+            similarities: array, [k], similarities of the returned candidates
+            ranks: array, [k]
+        """
+        similarities, ranks = self.rank(anchor, candidates)
+        ranks = ranks[:k]
+        return similarities[ranks], ranks
+
+    def rank_batch(
+        self, anchors: np.array, candidates: np.array, k: int
+    ) -> Tuple[np.array, np.array]:
+        """
+        Finds k best candidates for every anchor vector
+
+        Args:
+            anchors: array, [anchor_count, vector_size]
+            candidates: array, [candidate_count, vector_size], prepared
+            k: int, number of candidates to return for every anchor
+
+        Returns:
+            similarities: array, [anchor_count, k]
+            ranks: array, [anchor_count, k]
+        """
+        results = [self.top_k(anchors[i], candidates, k) for i in range(anchors.shape[0])]
+        return (
+            np.array([similarities for similarities, _ in results]),
+            np.array([ranks for _, ranks in results]),
+        )
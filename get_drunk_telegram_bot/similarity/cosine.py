@@ -4,8 +4,42 @@ import numpy as np
 
 from get_drunk_telegram_bot.similarity import ISimilarity
 
+# Upper bound in bytes for the [anchors, candidates] similarity block
+# computed at once by rank_batch.
+BATCH_MEMORY_BUDGET = 64 * 2 ** 20
+
+
+def select_top_k(similarities: np.array, k: int) -> np.array:
+    """
+    Returns indexes of k largest similarities (along the last axis) in
+    descending order. Only k winners are sorted, the rest is partitioned.
+    """
+    size = similarities.shape[-1]
+    k = min(k, size)
+    if k <= 0:
+        return np.empty(similarities.shape[:-1] + (0,), dtype=np.intp)
+    if k < size:
+        winners = np.argpartition(-similarities, k - 1, axis=-1)[..., :k]
+    else:
+        winners = np.broadcast_to(np.arange(size), similarities.shape)
+    order = np.argsort(
+        -np.take_along_axis(similarities, winners, axis=-1), axis=-1, kind='stable'
+    )
+    return np.take_along_axis(winners, order, axis=-1)
+
+
+def batch_chunk_size(candidate_count: int, memory_budget: int) -> int:
+    """
+    Returns number of anchors that can be scored at once against
+    candidate_count candidates within memory_budget bytes.
+    """
+    return max(1, memory_budget // (max(candidate_count, 1) * np.dtype(float).itemsize))
+
 
 class CosineSimilarity(ISimilarity):
+    def __init__(self, memory_budget: int = BATCH_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+
     def compute(self, first: np.array, second: np.array) -> float:
         product = first.dot(second)
         if product == 0:
@@ -21,3 +55,55 @@ class CosineSimilarity(ISimilarity):
 
         similarities = products / norms
         return similarities, np.argsort(-similarities)
+
+    def prepare(self, candidates: np.array) -> np.array:
+        # asanyarray keeps a memory-mapped matrix mapped, einsum computes the
+        # norms without a squared copy of it
+        candidates = np.asanyarray(candidates)
+        norms = np.sqrt(np.einsum('ij,ij->i', candidates, candidates))
+        if np.allclose(norms[norms != 0], 1):
+            return candidates
+
+        norms[norms == 0] = 1
+        return candidates / norms[:, np.newaxis]
+
+    def prepare_inplace(self, candidates: np.array):
+        # normalized in chunks, the matrix is never copied as a whole
+        chunk_size = batch_chunk_size(candidates.shape[1], self.memory_budget)
+        for start in range(0, candidates.shape[0], chunk_size):
+            chunk = candidates[start:start + chunk_size]
+            norms = np.linalg.norm(chunk, axis=1)
+            norms[norms == 0] = 1
+            chunk /= norms[:, np.newaxis].astype(chunk.dtype)
+
+    def top_k(
+        self, anchor: np.array, candidates: np.array, k: int
+    ) -> Tuple[np.array, np.array]:
+        norm = np.linalg.norm(anchor)
+        if norm == 0:
+            norm = 1
+
+        similarities = candidates.dot(anchor) / norm
+        ranks = select_top_k(similarities, k)
+        return similarities[ranks], ranks
+
+    def rank_batch(
+        self, anchors: np.array, candidates: np.array, k: int
+    ) -> Tuple[np.array, np.array]:
+        anchors = np.asarray(anchors)
+        norms = np.linalg.norm(anchors, axis=1)
+        norms[norms == 0] = 1
+
+        similarities, ranks = [], []
+        chunk_size = batch_chunk_size(candidates.shape[0], self.memory_budget)
+        for start in range(0, anchors.shape[0], chunk_size):
+            chunk = slice(start, start + chunk_size)
+            chunk_similarities = anchors[chunk].dot(candidates.T) / norms[chunk, np.newaxis]
+            chunk_ranks = select_top_k(chunk_similarities, k)
+            similarities.append(np.take_along_axis(chunk_similarities, chunk_ranks, axis=1))
+            ranks.append(chunk_ranks)
+
+        if not ranks:
+            width = min(k, candidates.shape[0])
+            return np.empty((0, width)), np.empty((0, width), dtype=np.intp)
+        return np.concatenate(similarities), np.concatenate(ranks)
@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import pathlib
+from typing import Optional, Tuple
+
+import numpy as np
+
+from get_drunk_telegram_bot.similarity.cosine import CosineSimilarity, select_top_k
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+
+class IVFCosineSimilarity(CosineSimilarity):
+    """
+    Approximate cosine top-k over an inverted file (IVF) index.
+
+    Candidates are clustered with spherical k-means, every query is scored
+    against the cluster centroids first and only candidates of the nprobe
+    closest clusters are scored exactly. nprobe is the recall/latency knob:
+    nprobe == n_lists gives the exact answer.
+
+    :param n_lists: int, number of clusters (default=sqrt(candidate_count));
+
+    :param nprobe: int, number of clusters scored for every query;
+
+    :param n_iter: int, number of k-means iterations;
+
+    :param index_path: path where the index is persisted (e.g.
+        embeder.resource.get_resource_path("bert.ivf.npz")). If it exists and
+        was built for the same candidates, it is loaded instead of rebuilt;
+
+    :param seed: int, k-means initialization seed.
+    """
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        nprobe: int = 8,
+        n_iter: int = 20,
+        index_path: Optional[pathlib.Path] = None,
+        seed: int = 0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        self.index_path = pathlib.Path(index_path) if index_path else None
+        self.seed = seed
+        self.centroids = None
+        self.list_offsets = None
+        self.list_members = None
+
+    def prepare(self, candidates: np.array) -> np.array:
+        candidates = super().prepare(candidates)
+        fingerprint = self.__fingerprint(candidates)
+
+        if self.index_path is not None and self.index_path.exists():
+            with np.load(self.index_path) as index:
+                if str(index['fingerprint']) == fingerprint:
+                    self.centroids = index['centroids']
+                    self.list_offsets = index['list_offsets']
+                    self.list_members = index['list_members']
+                    return candidates
+            logging.info(f'IVF index {self.index_path} is stale, rebuilding')
+
+        self.__build(candidates)
+        if self.index_path is not None:
+            np.savez(
+                self.index_path,
+                fingerprint=fingerprint,
+                centroids=self.centroids,
+                list_offsets=self.list_offsets,
+                list_members=self.list_members,
+            )
+        return candidates
+
+    def top_k(
+        self, anchor: np.array, candidates: np.array, k: int
+    ) -> Tuple[np.array, np.array]:
+        norm = np.linalg.norm(anchor)
+        if norm == 0:
+            norm = 1
+
+        # probe more than nprobe lists if they hold less than k candidates
+        probes = select_top_k(self.centroids.dot(anchor), len(self.centroids))
+        sizes = np.diff(self.list_offsets)[probes]
+        enough = np.searchsorted(np.cumsum(sizes), min(k, candidates.shape[0]))
+        probes = probes[:max(self.nprobe, enough + 1)]
+        members = np.concatenate(
+            [
+                self.list_members[self.list_offsets[probe]:self.list_offsets[probe + 1]]
+                for probe in probes
+            ]
+        )
+        similarities = candidates[members].dot(anchor) / norm
+        ranks = select_top_k(similarities, k)
+        return similarities[ranks], members[ranks]
+
+    def rank_batch(
+        self, anchors: np.array, candidates: np.array, k: int
+    ) -> Tuple[np.array, np.array]:
+        results = [self.top_k(anchor, candidates, k) for anchor in np.asarray(anchors)]
+        width = min(k, candidates.shape[0])
+        return (
+            np.array([similarities for similarities, _ in results]).reshape(-1, width),
+            np.array([ranks for _, ranks in results], dtype=np.intp).reshape(-1, width),
+        )
+
+    def __fingerprint(self, candidates: np.array) -> str:
+        digest = hashlib.sha1(np.ascontiguousarray(candidates, dtype=np.float32))
+        digest.update(f'{self.n_lists}:{self.n_iter}:{self.seed}'.encode())
+        return digest.hexdigest()
+
+    def __build(self, candidates: np.array):
+        candidate_count = candidates.shape[0]
+        n_lists = self.n_lists or max(1, int(np.sqrt(candidate_count)))
+        n_lists = min(n_lists, candidate_count)
+
+        random_state = np.random.RandomState(self.seed)
+        centroids = candidates[
+            random_state.choice(candidate_count, n_lists, replace=False)
+        ].astype(np.float32)
+
+        for _ in range(self.n_iter):
+            assignment = self.__assign(candidates, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, candidates)
+            norms = np.linalg.norm(sums, axis=1)
+
+            empty = norms == 0
+            sums[empty] = candidates[random_state.choice(candidate_count, empty.sum())]
+            norms[empty] = 1
+            centroids = sums / norms[:, np.newaxis]
+
+        assignment = self.__assign(candidates, centroids)
+        self.centroids = centroids
+        self.list_members = np.argsort(assignment, kind='stable').astype(np.int32)
+        self.list_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignment, minlength=n_lists))]
+        ).astype(np.int64)
+
+    def __assign(self, candidates: np.array, centroids: np.array) -> np.array:
+        _, ranks = super().rank_batch(candidates, centroids, 1)
+        return ranks[:, 0]
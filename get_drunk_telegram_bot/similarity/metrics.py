@@ -0,0 +1,22 @@
+import numpy as np
+
+
+def recall_at_k(expected_ranks: np.array, actual_ranks: np.array) -> float:
+    """
+    Measures how many of the expected candidates were found, on average.
+
+    Args:
+        expected_ranks: array, [anchor_count, k], exact ranking
+        actual_ranks: array, [anchor_count, k'], approximate ranking
+
+    Returns:
+        recall: float, from 0 to 1
+    """
+    recalls = [
+        len(np.intersect1d(expected, actual)) / len(expected)
+        for expected, actual in zip(expected_ranks, actual_ranks)
+        if len(expected) > 0
+    ]
+    if len(recalls) == 0:
+        return 1.0
+    return float(np.mean(recalls))
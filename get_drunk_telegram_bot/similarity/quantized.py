@@ -0,0 +1,159 @@
+from typing import Tuple
+
+import numpy as np
+
+from get_drunk_telegram_bot.similarity.cosine import (
+    CosineSimilarity,
+    batch_chunk_size,
+    select_top_k,
+)
+from get_drunk_telegram_bot.similarity.metrics import recall_at_k
+
+_INT8_MAX = 127
+
+
+class QuantizedCosineSimilarity(CosineSimilarity):
+    """
+    Cosine top-k over a compressed copy of the candidate matrix.
+
+    Candidates are scored approximately over int8 (scaled per dimension) or
+    float16 codes of the normalized rows, and only the best `rescore` of them
+    are re-scored exactly over the float candidate matrix. prepare returns
+    the float matrix as it is (only row norms and codes are kept in memory)
+    and it is only read row by row afterwards, so it stays memory-mapped
+    (see model.cache.CandidateCache).
+
+    :param dtype: str, 'int8' or 'float16';
+
+    :param rescore: int, number of candidates to re-score exactly.
+    """
+
+    def __init__(self, dtype: str = 'int8', rescore: int = 200, **kwargs):
+        super().__init__(**kwargs)
+        if dtype not in ('int8', 'float16'):
+            raise ValueError(f"Error in dtype. Available: ['int8', 'float16'], Got: {dtype}")
+        self.dtype = dtype
+        self.rescore = rescore
+        self.codes = None
+        self.scales = None
+        self.norms = None
+
+    def prepare(self, candidates: np.array) -> np.array:
+        # the matrix is read in chunks and never copied as a whole
+        chunk_size = max(1, self.memory_budget // (max(candidates.shape[1], 1) * 8))
+        chunks = [
+            slice(start, start + chunk_size) for start in range(0, candidates.shape[0], chunk_size)
+        ]
+        norms = np.empty(candidates.shape[0], dtype=np.float32)
+        for chunk in chunks:
+            norms[chunk] = np.linalg.norm(candidates[chunk], axis=1)
+        norms[norms == 0] = 1
+        self.norms = norms
+
+        def normalized(chunk: slice) -> np.array:
+            return np.asarray(candidates[chunk], dtype=np.float32) / norms[chunk, np.newaxis]
+
+        self.scales = np.ones(candidates.shape[1], dtype=np.float32)
+        if self.dtype == 'float16':
+            self.codes = np.empty(candidates.shape, dtype=np.float16)
+        else:
+            scales = np.zeros(candidates.shape[1], dtype=np.float32)
+            for chunk in chunks:
+                scales = np.maximum(scales, np.abs(normalized(chunk)).max(axis=0))
+            scales /= _INT8_MAX
+            scales[scales == 0] = 1
+            self.scales = scales
+            self.codes = np.empty(candidates.shape, dtype=np.int8)
+
+        for chunk in chunks:
+            codes = normalized(chunk) / self.scales
+            if self.dtype == 'int8':
+                codes = np.round(codes)
+            self.codes[chunk] = codes
+        return candidates
+
+    def top_k(
+        self, anchor: np.array, candidates: np.array, k: int
+    ) -> Tuple[np.array, np.array]:
+        norm = np.linalg.norm(anchor)
+        if norm == 0:
+            norm = 1
+
+        approximate = self.__approximate_similarities(anchor[np.newaxis])[0]
+        # sorted, so that rows of a memory-mapped matrix are read in order
+        shortlist = np.sort(select_top_k(approximate, max(k, self.rescore)))
+
+        similarities = candidates[shortlist].dot(anchor) / (norm * self.norms[shortlist])
+        ranks = select_top_k(similarities, k)
+        return similarities[ranks], shortlist[ranks]
+
+    def rank_batch(
+        self, anchors: np.array, candidates: np.array, k: int
+    ) -> Tuple[np.array, np.array]:
+        # a block of anchors is scored against every dequantized codes chunk
+        # at once, then the shortlists of the block are rescored together
+        similarities, ranks = [], []
+        chunk_size = batch_chunk_size(candidates.shape[0], self.memory_budget)
+        for start in range(0, anchors.shape[0], chunk_size):
+            chunk_similarities, chunk_ranks = self.__rank_block(
+                np.asarray(anchors[start:start + chunk_size]), candidates, k
+            )
+            similarities.append(chunk_similarities)
+            ranks.append(chunk_ranks)
+
+        if not ranks:
+            width = min(k, candidates.shape[0])
+            return np.empty((0, width)), np.empty((0, width), dtype=np.intp)
+        return np.concatenate(similarities), np.concatenate(ranks)
+
+    def recall(self, anchors: np.array, candidates: np.array, k: int) -> float:
+        """
+        Measures recall@k of the quantized ranking against the exact one.
+
+        Args:
+            anchors: array, [anchor_count, vector_size]
+            candidates: array, [candidate_count, vector_size], prepared
+            k: int
+
+        Returns:
+            recall: float, from 0 to 1
+        """
+        exact = CosineSimilarity(memory_budget=self.memory_budget)
+        _, expected_ranks = exact.rank_batch(anchors, exact.prepare(candidates), k)
+        _, actual_ranks = self.rank_batch(anchors, candidates, k)
+        return recall_at_k(expected_ranks, actual_ranks)
+
+    def __rank_block(
+        self, anchors: np.array, candidates: np.array, k: int
+    ) -> Tuple[np.array, np.array]:
+        norms = np.linalg.norm(anchors, axis=1)
+        norms[norms == 0] = 1
+
+        approximate = self.__approximate_similarities(anchors)
+        # sorted, so that rows of a memory-mapped matrix are read in order
+        shortlists = np.sort(select_top_k(approximate, max(k, self.rescore)), axis=1)
+
+        # every shortlisted row is read once for the whole block
+        rows = np.unique(shortlists)
+        exact = anchors.dot(candidates[rows].T)
+        similarities = np.take_along_axis(exact, np.searchsorted(rows, shortlists), axis=1) / (
+            norms[:, np.newaxis] * self.norms[shortlists]
+        )
+        ranks = select_top_k(similarities, k)
+        return (
+            np.take_along_axis(similarities, ranks, axis=1),
+            np.take_along_axis(shortlists, ranks, axis=1),
+        )
+
+    def __approximate_similarities(self, anchors: np.array) -> np.array:
+        # [anchor_count, candidate_count], codes are converted to float32 in
+        # chunks to keep memory bounded
+        scaled_anchors = (anchors * self.scales).astype(np.float32)
+        chunk_size = max(1, self.memory_budget // (self.codes.shape[1] * 4))
+        return np.concatenate(
+            [
+                scaled_anchors.dot(self.codes[start:start + chunk_size].astype(np.float32).T)
+                for start in range(0, self.codes.shape[0], chunk_size)
+            ],
+            axis=1,
+        )
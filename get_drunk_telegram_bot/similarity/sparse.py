@@ -0,0 +1,83 @@
+from typing import Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import norm
+
+from get_drunk_telegram_bot.similarity import ISimilarity
+from get_drunk_telegram_bot.similarity.cosine import (
+    BATCH_MEMORY_BUDGET,
+    batch_chunk_size,
+    select_top_k,
+)
+
+
+class SparseCosineSimilarity(ISimilarity):
+    """
+    Cosine similarity over sparse (CSR) vectors, e.g. TF-IDF features.
+    Vectors are never densified, only the resulting similarities are.
+    """
+
+    def __init__(self, memory_budget: int = BATCH_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+
+    def compute(self, first: sparse.spmatrix, second: sparse.spmatrix) -> float:
+        first, second = sparse.csr_matrix(first), sparse.csr_matrix(second)
+        product = first.multiply(second).sum()
+        if product == 0:
+            return 0
+
+        return product / (norm(first) * norm(second))
+
+    def rank(
+        self, anchor: sparse.spmatrix, candidates: sparse.spmatrix
+    ) -> Tuple[np.array, np.array]:
+        anchor, candidates = sparse.csr_matrix(anchor), sparse.csr_matrix(candidates)
+        products = np.asarray((candidates @ anchor.T).todense()).ravel()
+
+        norms = norm(anchor) * norm(candidates, axis=1)
+        norms[norms == 0] = 1
+
+        similarities = products / norms
+        return similarities, np.argsort(-similarities)
+
+    def prepare(self, candidates: sparse.spmatrix) -> sparse.csr_matrix:
+        candidates = sparse.csr_matrix(candidates)
+        norms = norm(candidates, axis=1)
+        norms[norms == 0] = 1
+        return sparse.csr_matrix(sparse.diags(1 / norms) @ candidates)
+
+    def top_k(
+        self, anchor: sparse.spmatrix, candidates: sparse.csr_matrix, k: int
+    ) -> Tuple[np.array, np.array]:
+        anchor = sparse.csr_matrix(anchor)
+        anchor_norm = norm(anchor)
+        if anchor_norm == 0:
+            anchor_norm = 1
+
+        similarities = np.asarray((candidates @ anchor.T).todense()).ravel()
+        similarities /= anchor_norm
+        ranks = select_top_k(similarities, k)
+        return similarities[ranks], ranks
+
+    def rank_batch(
+        self, anchors: sparse.spmatrix, candidates: sparse.csr_matrix, k: int
+    ) -> Tuple[np.array, np.array]:
+        anchors = sparse.csr_matrix(anchors)
+        norms = norm(anchors, axis=1)
+        norms[norms == 0] = 1
+
+        similarities, ranks = [], []
+        chunk_size = batch_chunk_size(candidates.shape[0], self.memory_budget)
+        for start in range(0, anchors.shape[0], chunk_size):
+            chunk = slice(start, start + chunk_size)
+            chunk_similarities = (anchors[chunk] @ candidates.T).toarray()
+            chunk_similarities /= norms[chunk, np.newaxis]
+            chunk_ranks = select_top_k(chunk_similarities, k)
+            similarities.append(np.take_along_axis(chunk_similarities, chunk_ranks, axis=1))
+            ranks.append(chunk_ranks)
+
+        if not ranks:
+            width = min(k, candidates.shape[0])
+            return np.empty((0, width)), np.empty((0, width), dtype=np.intp)
+        return np.concatenate(similarities), np.concatenate(ranks)
@@ -0,0 +1,32 @@
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """
+    StartupProfiler records how long every named startup phase takes
+    (imports, dataset load, model creation, webhook registration, etc).
+    """
+
+    def __init__(self):
+        self.timings = OrderedDict()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Measures the wrapped block, repeated phases are summed up.
+
+        :param name: str, phase name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def report(self) -> str:
+        lines = [f'{name}: {elapsed:.3f}s' for name, elapsed in self.timings.items()]
+        lines.append(f'total: {sum(self.timings.values()):.3f}s')
+        return '\n'.join(lines)
@@ -1,5 +1,4 @@
 import json
-from copy import deepcopy
 
 from get_drunk_telegram_bot.drinks.cocktail import Cocktail
 
@@ -22,13 +21,8 @@ def decode_json(dct):
 
 def encode_json(obj):
     if isinstance(obj, Cocktail):
-        dct = deepcopy(obj.__dict__)
-
+        dct = obj.to_dict()
         dct['__cocktail__'] = True
-        for key, value in obj.__dict__.items():
-            if key.startswith('_'):
-                dct.pop(key, None)
-                dct[key.replace('_', '', 1)] = deepcopy(value)
         return dct
     elif isinstance(obj, map):
         return list(obj)
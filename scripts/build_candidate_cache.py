@@ -0,0 +1,57 @@
+import argparse
+import functools
+import logging
+import time
+from pathlib import Path
+
+from get_drunk_telegram_bot.drinks.dataset import Dataset
+from get_drunk_telegram_bot.embeder import BertEmbeder, CachingEmbeder, ParallelEmbeder
+from get_drunk_telegram_bot.embeder.bert import create_worker_embeder
+from get_drunk_telegram_bot.model import CandidateCache, EmbederModel
+from get_drunk_telegram_bot.similarity import CosineSimilarity
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-cd', '--cache_dir', type=Path, required=True)
+parser.add_argument('-w', '--workers', type=int, default=None)
+parser.add_argument('-s', '--shard_size', type=int, default=256)
+parser.add_argument(
+    '-m',
+    '--inference_mode',
+    type=str,
+    default='eager',
+    choices=['eager', 'quantized', 'traced', 'quantized-traced'],
+)
+
+
+def build():
+    """
+    Embeds the catalog with BertEmbeder in a process pool and stores the
+    candidate vectors in the cache used by the server (--cache-dir).
+    """
+    args = parser.parse_args()
+    dataset = Dataset()
+    embeder = CachingEmbeder(
+        ParallelEmbeder(
+            BertEmbeder(inference_mode=args.inference_mode),
+            functools.partial(create_worker_embeder, inference_mode=args.inference_mode),
+            n_workers=args.workers,
+            shard_size=args.shard_size,
+        )
+    )
+
+    start = time.perf_counter()
+    EmbederModel(
+        embeder=embeder,
+        dataset=dataset,
+        similarity=CosineSimilarity(),
+        cache=CandidateCache(args.cache_dir),
+    )
+    logging.info(
+        f'Embedded {len(dataset)} cocktails in {time.perf_counter() - start:.1f}s'
+    )
+
+
+if __name__ == '__main__':
+    build()
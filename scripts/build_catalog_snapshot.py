@@ -0,0 +1,41 @@
+import argparse
+import logging
+import time
+from pathlib import Path
+
+from get_drunk_telegram_bot.data import CATALOG_SNAPSHOT
+from get_drunk_telegram_bot.drinks.dataset import Dataset
+from get_drunk_telegram_bot.drinks.snapshot import (
+    load_snapshot,
+    save_snapshot,
+    verify_snapshot,
+)
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-o', '--out', type=Path, default=CATALOG_SNAPSHOT)
+
+
+def build():
+    """
+    Compiles processed_cocktails.json into the binary catalog snapshot that
+    Dataset opens memory-mapped. Run it after cocktails_preprocessing.py.
+    """
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog, fingerprint = Dataset.build_catalog()
+    logging.info(f'Parsed {len(catalog)} cocktails in {time.perf_counter() - start:.2f}s')
+
+    save_snapshot(catalog, args.out, fingerprint)
+    # the arrays are checksummed here only, opening the snapshot skips them
+    verify_snapshot(args.out)
+
+    start = time.perf_counter()
+    load_snapshot(args.out)
+    logging.info(f'Saved {args.out}, it opens in {time.perf_counter() - start:.3f}s')
+
+
+if __name__ == '__main__':
+    build()
@@ -0,0 +1,51 @@
+import argparse
+import logging
+from pathlib import Path
+
+from get_drunk_telegram_bot.drinks.dataset import Dataset
+from get_drunk_telegram_bot.embeder import Projection
+from get_drunk_telegram_bot.embeder.resource import projection_path
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-e', '--embeder', type=str, default='tfidf', choices=['tfidf', 'bert'])
+parser.add_argument('-d', '--dim', type=int, default=128)
+parser.add_argument('-k', '--top_k', type=int, default=10)
+parser.add_argument('-o', '--out', type=Path, default=None)
+
+
+def create_embeder(name: str):
+    if name == 'tfidf':
+        from get_drunk_telegram_bot.embeder import TfidfEmbeder
+
+        return TfidfEmbeder()
+
+    from get_drunk_telegram_bot.embeder import BertEmbeder
+
+    return BertEmbeder()
+
+
+def fit():
+    """
+    Fits the projection on the catalog vectors and reports recall@k of the
+    projected ranking against the full dimensional one (catalog recipes are
+    used as queries). The server uses it with --use-projection.
+    """
+    args = parser.parse_args()
+    vectors = create_embeder(args.embeder).embed(Dataset().get_ingredients())
+
+    projection = Projection.fit(vectors, args.dim)
+    recall = projection.recall(vectors, vectors, args.top_k)
+    logging.info(
+        f'{args.embeder}: {vectors.shape[1]} -> {projection.dim} dims, '
+        f'recall@{args.top_k} = {recall:.3f}'
+    )
+
+    out = args.out or projection_path(args.embeder)
+    projection.save(out)
+    logging.info(f'Saved projection to {out}')
+
+
+if __name__ == '__main__':
+    fit()
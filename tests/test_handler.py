@@ -1,4 +1,10 @@
-from tests.utils import get_handler, run_test_request
+import random
+from unittest.mock import patch
+
+import pytest
+
+from get_drunk_telegram_bot.bot.server import GetDrunkBotHandler
+from tests.utils import TelegramInterfaceMocker, get_handler, run_test_request
 
 
 def test_start():
@@ -132,3 +138,105 @@ def test_explore():
     assert 'with these ingredients' in response
     response, _ = run_test_request(handler, '\\explore Ere long done do does did')
     assert 'Sorry, I' in response
+
+
+def test_reload_model():
+    handler = get_handler()
+    old_model = handler.model
+    handler.reload_model('BaseModel').join()
+
+    assert handler.model is not old_model
+    response, _ = run_test_request(handler, '\\menu')
+    assert response
+
+
+def test_process_batch_ranks_recipes_together():
+    handler = get_handler('TFIdfCocktailModel')
+    for chat_id in (1, 3):
+        handler.db.end_current_session(chat_id)
+    model = handler.model
+    predict_batch = model.predict_batch
+    calls = []
+
+    def spy(queries, *args, **kwargs):
+        calls.append(list(queries))
+        return predict_batch(queries, *args, **kwargs)
+
+    with TelegramInterfaceMocker(), patch.object(model, 'predict_batch', spy), patch.object(
+        model, 'predict', side_effect=AssertionError('predicted one by one')
+    ):
+        handler.process_batch(
+            [(1, '\\recipe rum'), (2, '\\menu'), (3, '\\recipe vodka'), (1, '\\recipe rum')]
+        )
+
+    assert calls == [['rum', 'vodka']]
+    assert len(handler.db.get_cocktails_history(1)) == 2
+    assert len(handler.db.get_cocktails_history(3)) == 1
+
+
+def test_process_batch_falls_back_when_batch_prediction_fails():
+    handler = get_handler('TFIdfCocktailModel')
+    handler.db.end_current_session(1)
+    model = handler.model
+
+    with TelegramInterfaceMocker(), patch.object(
+        model, 'predict_batch', side_effect=RuntimeError('batch failed')
+    ), patch.object(model, 'predict', wraps=model.predict) as predict:
+        handler.process_batch([(1, '\\recipe rum'), (1, '\\recipe vodka')])
+
+    assert predict.call_count == 2
+    assert len(handler.db.get_cocktails_history(1)) == 2
+
+
+def test_quantized_similarity_needs_dense_vectors():
+    with TelegramInterfaceMocker(), pytest.raises(ValueError):
+        GetDrunkBotHandler(model_name='TFIdfCocktailModel', similarity='quantized')
+
+
+def test_recipe_is_picked_among_top_reranked_cocktails():
+    class FakeSimilarity:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def predict(self, pairs):
+            # prefers short ingredient lists
+            return [-len(text) for text, query in pairs]
+
+    with patch('semantic_text_similarity.models.WebBertSimilarity', FakeSimilarity):
+        handler = get_handler('STSBertCocktailModel')
+    handler.db.end_current_session('')
+
+    query = 'rum lime'
+    candidates = handler.dataset.get_coctails_by_ids(
+        handler.model.retriever.predict_ids(query, k=handler.model.top_n, ignore_max_similarity=True)
+    )
+    assert len(candidates) > 3
+    best = sorted(candidates, key=lambda coctail: len(coctail.ingredients_str))[:3]
+
+    with patch('get_drunk_telegram_bot.bot.server.random.choice', wraps=random.choice) as choice:
+        run_test_request(handler, f'\\recipe {query}')
+
+    (picked_from,), _ = choice.call_args
+    assert [coctail.name for coctail in picked_from] == [coctail.name for coctail in best]
+
+
+def test_recipes_of_the_day_follow_reloaded_dataset():
+    handler = get_handler()
+    old_recipes = handler.recipes_of_the_day
+    old_dataset = handler.dataset
+
+    handler.reload_model().join()
+
+    assert handler.dataset is not old_dataset
+    assert handler.recipes_of_the_day is not old_recipes
+    response, _ = run_test_request(handler, '\\menu')
+    assert all(cocktail.name in response for cocktail in handler.recipes_of_the_day)
+
+
+def test_failed_reload_keeps_model_name():
+    handler = get_handler()
+
+    with patch.object(handler, '_create_model', side_effect=RuntimeError('broken catalog')):
+        handler.reload_model('TFIdfCocktailModel').join()
+
+    assert handler.model_name == 'BaseModel'
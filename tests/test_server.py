@@ -7,3 +7,25 @@ def test_server_responses(client):  # noqa: F811
     rv = client.post('/', json=make_message_from_text('\\start'))
     response = json.loads(rv.data.decode('utf-8'))
     assert response == {'ok': True}
+
+
+def test_server_ignores_updates_without_text(client):  # noqa: F811
+    rv = client.post('/', json={'message': {'chat': {'id': 1}, 'sticker': {}}})
+    assert json.loads(rv.data.decode('utf-8')) == {'ok': True}
+
+
+def test_server_stats(client):  # noqa: F811
+    client.post('/', json=make_message_from_text('\\start'))
+    stats = json.loads(client.get('/stats').data.decode('utf-8'))
+    assert stats['submitted'] == 1
+
+
+def test_server_acknowledges_duplicate_updates(client):  # noqa: F811
+    update = dict(make_message_from_text('\\start'), update_id=42)
+    for _ in range(3):
+        rv = client.post('/', json=update)
+        assert json.loads(rv.data.decode('utf-8')) == {'ok': True}
+
+    stats = json.loads(client.get('/stats').data.decode('utf-8'))
+    assert stats['submitted'] == 1
+    assert stats['dedup']['hits'] == 2
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pytest
+import torch
+from pytorch_pretrained_bert import BertConfig, BertModel
+
+from get_drunk_telegram_bot.embeder import BertEmbeder
+
+_VOCAB = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + [
+    'rum', 'lime', 'gin', 'tonic', 'vodka', 'orange', 'juice', 'mint', 'sugar', 'white'
+]
+
+
+@pytest.fixture(scope='module')
+def model_dir(tmpdir_factory):
+    """
+    Tiny randomly initialized BERT saved in pytorch_pretrained_bert format.
+    """
+    path = tmpdir_factory.mktemp('bert')
+    config = BertConfig(
+        vocab_size_or_config_json_file=len(_VOCAB),
+        hidden_size=16,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=32,
+    )
+    torch.manual_seed(0)
+    model = BertModel(config)
+    torch.save(model.state_dict(), str(path / 'pytorch_model.bin'))
+    (path / 'bert_config.json').write(json.dumps(config.to_dict()))
+    (path / 'vocab.txt').write('\n'.join(_VOCAB))
+    return str(path)
+
+
+_TEXTS = [
+    'white rum lime juice sugar mint',
+    'gin',
+    'vodka orange juice',
+    'gin tonic lime',
+    'rum',
+]
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 32])
+def test_padding_does_not_change_embeddings(model_dir, batch_size):
+    embeder = BertEmbeder(model_dir, batch_size=batch_size)
+    vectors = embeder.embed(_TEXTS)
+
+    assert vectors.shape == (len(_TEXTS), 16)
+    for text, vector in zip(_TEXTS, vectors):
+        np.testing.assert_array_almost_equal(embeder.embed([text])[0], vector, decimal=5)
+
+
+def test_batch_size_is_honoured(model_dir):
+    embeder = BertEmbeder(model_dir, batch_size=2)
+    calls = []
+    forward = embeder.model.forward
+
+    def spy(tokens, **kwargs):
+        calls.append(tuple(tokens.shape))
+        return forward(tokens, **kwargs)
+
+    embeder.model.forward = spy
+    embeder.embed(_TEXTS)
+
+    assert [batch for batch, _ in calls] == [2, 2, 1]
+    # texts are bucketed by length, so batches are padded to similar lengths
+    assert [length for _, length in calls] == [3, 5, 8]
+
+
+def test_empty_input(model_dir):
+    assert BertEmbeder(model_dir).embed([]).shape == (0, 16)
+
+
+@pytest.mark.parametrize('inference_mode', ['traced', 'quantized', 'quantized-traced'])
+def test_inference_mode_parity(model_dir, inference_mode):
+    embeder = BertEmbeder(model_dir, batch_size=2, inference_mode=inference_mode)
+    assert embeder.check_parity(_TEXTS) > 0.99
+
+
+def test_unknown_inference_mode(model_dir):
+    with pytest.raises(ValueError):
+        BertEmbeder(model_dir, inference_mode='fp8')
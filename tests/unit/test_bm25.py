@@ -0,0 +1,53 @@
+from typing import List
+from unittest.mock import create_autospec
+
+import pytest
+
+from get_drunk_telegram_bot.drinks.dataset import Dataset
+from get_drunk_telegram_bot.model import BM25Model
+
+_MOCK_INGREDIENTS = [
+    'white rum lime juice sugar syrup mint',
+    'vodka orange juice',
+    'gin tonic water lime',
+    'white rum coconut cream pineapple juice',
+    'tequila triple sec lime juice',
+]
+
+
+@pytest.fixture
+def dataset():
+    def get_coctails_by_ids(coctail_ids: List[int]):
+        return list(coctail_ids)
+
+    mock = create_autospec(Dataset)
+    mock.get_coctails_by_ids.side_effect = get_coctails_by_ids
+    mock.get_ingredients.return_value = _MOCK_INGREDIENTS
+    mock.__len__.return_value = len(_MOCK_INGREDIENTS)
+    return mock
+
+
+@pytest.mark.parametrize(
+    ['query', 'expected_first'],
+    [('rum mint', 0), ('Vodka, orange', 1), ('gin', 2), ('coconut rum', 3)],
+)
+def test_best_match(dataset, query, expected_first):
+    model = BM25Model(dataset)
+    assert model.predict(query)[0] == expected_first
+
+
+def test_only_matching_cocktails_are_returned(dataset):
+    model = BM25Model(dataset)
+    assert sorted(model.predict('lime')) == [0, 2, 4]
+    assert model.predict('whiskey') == []
+
+
+def test_match_all(dataset):
+    model = BM25Model(dataset, match_all=True)
+    assert model.predict('lime juice') == [4, 0]
+    assert sorted(model.predict('gin orange')) == [1, 2]
+
+
+def test_top_k(dataset):
+    model = BM25Model(dataset, top_k=2)
+    assert len(model.predict('juice')) == 2
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from get_drunk_telegram_bot.model.cache import CandidateCache
+
+
+def test_dense_matrix_is_memory_mapped(tmpdir):
+    cache = CandidateCache(tmpdir)
+    key = cache.key('embeder', 'dataset-v1', 'embeder-v1')
+    assert cache.load(key) is None
+
+    matrix = np.arange(12, dtype=np.float32).reshape(3, 4)
+    cache.save(key, matrix)
+    loaded = cache.load(key)
+
+    assert isinstance(loaded, np.memmap)
+    np.testing.assert_array_equal(matrix, loaded)
+
+
+def test_sparse_matrix(tmpdir):
+    cache = CandidateCache(tmpdir)
+    key = cache.key('embeder', 'dataset-v1', 'embeder-v1')
+
+    matrix = sparse.random(10, 50, density=0.1, format='csr', random_state=0)
+    cache.save(key, matrix)
+    loaded = cache.load(key)
+
+    assert sparse.isspmatrix_csr(loaded)
+    np.testing.assert_array_equal(matrix.toarray(), loaded.toarray())
+
+
+def test_stale_entries_are_removed(tmpdir):
+    cache = CandidateCache(tmpdir)
+    old_key = cache.key('embeder', 'dataset-v1', 'embeder-v1')
+    new_key = cache.key('embeder', 'dataset-v2', 'embeder-v1')
+    other_key = cache.key('other', 'dataset-v1', 'embeder-v1')
+    assert old_key != new_key
+
+    cache.save(old_key, np.ones((2, 2)))
+    cache.save(other_key, np.ones((2, 2)))
+    cache.save(new_key, np.zeros((2, 2)))
+
+    assert cache.load(old_key) is None
+    assert cache.load(other_key) is not None
+    np.testing.assert_array_equal(np.zeros((2, 2)), cache.load(new_key))
+
+
+def test_writing_commits_only_written_files(tmp_path):
+    cache = CandidateCache(tmp_path)
+    key = cache.key('bert', 'fingerprint')
+
+    with cache.writing(key):
+        pass
+    assert cache.load(key) is None
+
+    with pytest.raises(RuntimeError):
+        with cache.writing(key) as path:
+            np.save(path, np.eye(2))
+            raise RuntimeError('interrupted')
+    assert list(tmp_path.iterdir()) == []
+
+    with cache.writing(key) as path:
+        np.save(path, np.eye(2))
+    np.testing.assert_array_equal(np.eye(2), cache.load(key))
@@ -0,0 +1,75 @@
+from typing import List
+from unittest.mock import create_autospec
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from get_drunk_telegram_bot.embeder import CachingEmbeder, TfidfEmbeder
+
+
+def f(data: List[str]):
+    return np.array([[len(text), text.count(' ')] for text in data], dtype=float)
+
+
+@pytest.fixture
+def embeder():
+    mock = create_autospec(TfidfEmbeder)
+    mock.embed.side_effect = f
+    mock.name = 'MockEmbeder'
+    mock.embed_to.return_value = None
+    mock.fingerprint = 'mock-embeder'
+    return mock
+
+
+def test_hits_skip_embeder(embeder):
+    caching = CachingEmbeder(embeder)
+
+    first = caching.embed(['rum lime', 'vodka orange juice'])
+    second = caching.embed(['Lime  RUM', 'vodka orange juice'])
+
+    np.testing.assert_array_equal(first, second)
+    assert embeder.embed.call_count == 1
+    embeder.embed.assert_called_with(['rum lime', 'vodka orange juice'])
+    assert caching.stats()['hits'] == 2
+    assert caching.stats()['misses'] == 2
+
+
+def test_only_misses_are_embedded(embeder):
+    caching = CachingEmbeder(embeder)
+    caching.embed(['rum lime'])
+    vectors = caching.embed(['gin tonic', 'rum lime', 'gin tonic'])
+
+    embeder.embed.assert_called_with(['gin tonic'])
+    np.testing.assert_array_equal(f(['gin tonic', 'rum lime', 'gin tonic']), vectors)
+
+
+@pytest.mark.parametrize(['max_entries', 'max_bytes'], [(2, 2 ** 20), (100, 32)])
+def test_least_recently_used_is_evicted(embeder, max_entries, max_bytes):
+    caching = CachingEmbeder(embeder, max_entries=max_entries, max_bytes=max_bytes)
+    caching.embed(['rum'])
+    caching.embed(['gin'])
+    caching.embed(['rum'])
+    caching.embed(['tequila'])
+
+    assert caching.stats()['entries'] == 2
+    caching.embed(['rum'])
+    assert caching.stats()['hits'] == 2
+
+
+def test_sparse_vectors(embeder):
+    embeder.embed.side_effect = lambda data: sparse.csr_matrix(f(data))
+    caching = CachingEmbeder(embeder)
+
+    caching.embed(['rum'])
+    vectors = caching.embed(['gin tonic', 'rum'])
+
+    assert sparse.isspmatrix_csr(vectors)
+    np.testing.assert_array_equal(f(['gin tonic', 'rum']), vectors.toarray())
+
+
+def test_large_batches_are_embedded_as_is(embeder):
+    caching = CachingEmbeder(embeder, max_entries=1)
+    caching.embed(['Rum  Lime', 'vodka'])
+
+    embeder.embed.assert_called_once_with(['Rum  Lime', 'vodka'])
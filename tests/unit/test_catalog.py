@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from get_drunk_telegram_bot.drinks.catalog import ColumnarCatalog, StringTable
+from get_drunk_telegram_bot.drinks.cocktail import Cocktail
+
+_RECORDS = [
+    {
+        'name': 'Mojito 🍃',
+        'characteristics': ['fresh', 'sour'],
+        'ingredients': [
+            {'name': 'White rum', 'amount': '5', 'unit': 'cl'},
+            {'name': 'Lime', 'amount': 1, 'unit': 'piece'},
+        ],
+        'tools': [{'name': 'Highball', 'amount': '1', 'unit': 'piece'}],
+        'recipe': ['Muddle lime', 'Add rum'],
+        'image': 'http://example.com/mojito.jpg',
+        'useful_info': 'was invented in Havana',
+        'abv': 12.5,
+        'volume': 200,
+    },
+    {
+        'name': 'Screwdriver',
+        'characteristics': None,
+        'ingredients': [
+            {'name': 'Vodka', 'amount': '5', 'unit': 'cl'},
+            {'name': 'Orange juice', 'amount': '10', 'unit': 'cl'},
+        ],
+        'tools': [],
+        'recipe': None,
+    },
+    {
+        'name': 'Empty',
+        'characteristics': [],
+        'ingredients': [],
+        'tools': None,
+        'recipe': [],
+    },
+]
+
+
+@pytest.fixture
+def catalog():
+    return ColumnarCatalog.from_records(_RECORDS)
+
+
+def test_string_table():
+    table = StringTable(['Pina Colada 🍍', None, ''])
+
+    assert len(table) == 3
+    assert list(table) == ['Pina Colada 🍍', None, '']
+    assert table.buffer.dtype == np.uint8
+
+
+class ColumnarCatalogTest:
+    def test_columns(self, catalog):
+        assert len(catalog) == 3
+        assert catalog.abv.dtype == np.float64
+        assert list(catalog.ingredient_offsets) == [0, 2, 4, 4]
+        assert catalog.ingredient_ids.dtype == np.int32
+        # 'piece', '5', 'cl' are stored once
+        assert len(catalog.vocabulary) == len(set(map(repr, catalog.vocabulary)))
+
+    @pytest.mark.parametrize('i', range(len(_RECORDS)))
+    def test_cocktails_match_records(self, catalog, i):
+        cocktail = catalog.cocktail(i)
+        expected = Cocktail(**_RECORDS[i])
+
+        assert cocktail.name == expected.name
+        assert cocktail.ingredients == expected.ingredients
+        assert cocktail.tools == expected.tools
+        assert cocktail.recipe == expected.recipe
+        assert cocktail.useful_info == expected.useful_info
+        assert cocktail.abv == expected.abv
+        assert cocktail.volume == expected.volume
+        assert catalog.ingredients_str(i) == expected.ingredients_str
+
+    def test_empty_catalog(self):
+        catalog = ColumnarCatalog.from_records([])
+        assert len(catalog) == 0
+        assert catalog.ingredient_ids.shape == (0, 3)
@@ -0,0 +1,68 @@
+import json
+import pickle
+
+import pytest
+
+from get_drunk_telegram_bot.drinks.cocktail import Cocktail
+from get_drunk_telegram_bot.utils.utils import decode_json, encode_json
+
+
+def create_cocktail(name='Mojito'):
+    return Cocktail(
+        name=name,
+        characteristics=['fresh'],
+        ingredients=[
+            {'name': 'White rum', 'amount': '5', 'unit': 'cl'},
+            {'name': 'Lime'.strip(), 'amount': '1', 'unit': ''.join(['pie', 'ce'])},
+        ],
+        tools=[{'name': 'Highball', 'amount': '1', 'unit': 'piece'}],
+        recipe=['Muddle lime', 'Add rum'],
+        useful_info='was invented in Havana',
+        abv=12.5,
+    )
+
+
+class CocktailTest:
+    def test_fields(self):
+        cocktail = create_cocktail()
+
+        assert cocktail.name == 'Mojito'
+        assert cocktail.ingredients[0]['name'] == 'White rum'
+        assert cocktail.ingredients_str == 'white rum lime'
+        assert list(cocktail.pretty_ingredients) == ['White rum 5 cl', 'Lime 1 piece']
+        assert cocktail.recipe == '1. Muddle lime\n2. Add rum'
+        assert cocktail.useful_info == 'was invented in Havana\n\nCharacteristics: fresh'
+        assert cocktail.abv == 12.5
+        assert cocktail.volume == 1.0
+        assert cocktail.image is None
+
+    def test_is_immutable(self):
+        cocktail = create_cocktail()
+
+        with pytest.raises(AttributeError):
+            cocktail.name = 'Daiquiri'
+        with pytest.raises(TypeError):
+            cocktail.ingredients[0]['name'] = 'Vodka'
+        with pytest.raises(AttributeError):
+            cocktail.extra = 1
+        assert not hasattr(cocktail, '__dict__')
+
+    def test_derived_fields_are_computed_once(self):
+        cocktail = create_cocktail()
+        assert cocktail.ingredients_str is cocktail.ingredients_str
+        assert cocktail.pretty_ingredients is cocktail.pretty_ingredients
+
+    def test_strings_are_interned(self):
+        first, second = create_cocktail('Mojito'), create_cocktail('Mojito Royal')
+        assert first.ingredients[1]['unit'] is second.tools[0]['unit']
+
+    def test_json_round_trip(self):
+        cocktail = create_cocktail()
+        restored = json.loads(json.dumps(cocktail, default=encode_json), object_hook=decode_json)
+
+        assert isinstance(restored, Cocktail)
+        assert restored.to_dict() == cocktail.to_dict()
+
+    def test_pickle_round_trip(self):
+        cocktail = create_cocktail()
+        assert pickle.loads(pickle.dumps(cocktail)).to_dict() == cocktail.to_dict()
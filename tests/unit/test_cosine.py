@@ -49,3 +49,59 @@ class CosineSimilarityTest:
         self.assert_ranking_equal(
             anchor, candidates, expected_similarities, expected_ranks
         )
+
+    @pytest.mark.parametrize(
+        ['anchor', 'candidates', 'k', 'expected_similarities', 'expected_ranks'],
+        [
+            ([1, 1], [[0, 0], [-1, -1], [2, 2]], 2, [1, 0], [2, 0]),
+            ([1, 1], [[0, 0], [-1, -1], [2, 2]], 5, [1, 0, -1], [2, 0, 1]),
+            ([1, 0], [[1, 0], [0, 1], [3, 1], [1, 1]], 1, [1], [0]),
+        ],
+    )
+    def test_top_k(self, anchor, candidates, k, expected_similarities, expected_ranks):
+        prepared = self.similarity.prepare(np.array(candidates, dtype=float))
+        actual_similarities, actual_ranks = self.similarity.top_k(
+            np.array(anchor, dtype=float), prepared, k
+        )
+
+        np.testing.assert_array_almost_equal(expected_similarities, actual_similarities)
+        np.testing.assert_array_equal(expected_ranks, actual_ranks)
+
+    def test_top_k_agrees_with_rank(self):
+        rng = np.random.RandomState(0)
+        anchor = rng.randn(16)
+        candidates = rng.randn(100, 16)
+
+        similarities, ranks = self.similarity.rank(anchor, candidates)
+        top_similarities, top_ranks = self.similarity.top_k(
+            anchor, self.similarity.prepare(candidates), 10
+        )
+
+        np.testing.assert_array_equal(ranks[:10], top_ranks)
+        np.testing.assert_array_almost_equal(similarities[ranks[:10]], top_similarities)
+
+    @pytest.mark.parametrize('memory_budget', [1, 1000, 2 ** 20])
+    def test_rank_batch_agrees_with_top_k(self, memory_budget):
+        rng = np.random.RandomState(0)
+        anchors = rng.randn(7, 16)
+        candidates = self.similarity.prepare(rng.randn(50, 16))
+
+        similarity = CosineSimilarity(memory_budget=memory_budget)
+        similarities, ranks = similarity.rank_batch(anchors, candidates, 5)
+
+        assert similarities.shape == ranks.shape == (7, 5)
+        for anchor, anchor_similarities, anchor_ranks in zip(anchors, similarities, ranks):
+            expected_similarities, expected_ranks = similarity.top_k(anchor, candidates, 5)
+            np.testing.assert_array_almost_equal(expected_similarities, anchor_similarities)
+            np.testing.assert_array_equal(expected_ranks, anchor_ranks)
+
+    @pytest.mark.parametrize('memory_budget', [1, 2 ** 20])
+    def test_prepare_inplace(self, memory_budget):
+        candidates = np.random.RandomState(0).randn(20, 8)
+        candidates[3] = 0
+        expected = self.similarity.prepare(candidates)
+
+        CosineSimilarity(memory_budget=memory_budget).prepare_inplace(candidates)
+
+        np.testing.assert_array_almost_equal(expected, candidates)
+        assert self.similarity.prepare(candidates) is candidates
@@ -0,0 +1,59 @@
+import pytest
+
+from get_drunk_telegram_bot.bot.dedup import UpdateDeduplicator
+
+
+class UpdateDeduplicatorTest:
+    def test_duplicates_are_counted(self):
+        dedup = UpdateDeduplicator(size=10)
+
+        assert dedup.add(1)
+        assert dedup.add(2)
+        assert not dedup.add(1)
+        assert 1 in dedup and 3 not in dedup
+        assert dedup.stats() == {'size': 2, 'capacity': 10, 'hits': 1}
+
+    def test_oldest_ids_are_forgotten(self):
+        dedup = UpdateDeduplicator(size=3)
+        for update_id in range(5):
+            assert dedup.add(update_id)
+
+        assert len(dedup) == 3
+        assert [update_id in dedup for update_id in range(5)] == [False, False, True, True, True]
+        assert dedup.add(0)
+
+    def test_discarded_id_is_accepted_again(self):
+        dedup = UpdateDeduplicator(size=3)
+        dedup.add(1)
+        dedup.add(2)
+        dedup.discard(1)
+
+        assert 1 not in dedup
+        assert dedup.add(1)
+        for update_id in (3, 4):
+            dedup.add(update_id)
+        # the slot of the discarded id does not evict the new one
+        assert 1 in dedup and 2 not in dedup
+
+    def test_ids_are_persisted(self, tmp_path):
+        path = tmp_path / 'update_ids.npy'
+        dedup = UpdateDeduplicator(size=4, path=path, save_every=2)
+        for update_id in range(6):
+            dedup.add(update_id)
+        assert path.exists()
+
+        restored = UpdateDeduplicator(size=3, path=path)
+        assert [update_id in restored for update_id in range(6)] == [False] * 3 + [True] * 3
+        assert not restored.add(5)
+        assert restored.hits == 1
+
+    def test_invalid_file_is_ignored(self, tmp_path):
+        path = tmp_path / 'update_ids.npy'
+        path.write_bytes(b'not an array')
+
+        dedup = UpdateDeduplicator(size=3, path=path)
+        assert len(dedup) == 0
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            UpdateDeduplicator(size=0)
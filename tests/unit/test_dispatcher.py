@@ -0,0 +1,94 @@
+import threading
+from collections import defaultdict
+
+import pytest
+
+from get_drunk_telegram_bot.bot.dispatcher import ChatDispatcher
+
+
+class ChatDispatcherTest:
+    def test_messages_of_one_chat_are_processed_in_order(self):
+        processed = defaultdict(list)
+
+        def handle(chat_id, text):
+            processed[chat_id].append(text)
+
+        dispatcher = ChatDispatcher(handle, n_workers=3)
+        for i in range(50):
+            for chat_id in range(5):
+                assert dispatcher.submit(chat_id, str(i))
+        dispatcher.join()
+
+        assert dict(processed) == {chat_id: [str(i) for i in range(50)] for chat_id in range(5)}
+        dispatcher.close()
+
+    def test_chats_are_processed_in_parallel(self):
+        slow_chat_started, release, fast_chat_done = (threading.Event() for _ in range(3))
+
+        def handle(chat_id, text):
+            if text == 'slow':
+                slow_chat_started.set()
+                release.wait()
+            else:
+                fast_chat_done.set()
+
+        dispatcher = ChatDispatcher(handle, n_workers=2)
+        slow_chat = 0
+        fast_chat = next(i for i in range(1, 10) if hash(i) % 2 != hash(slow_chat) % 2)
+        dispatcher.submit(slow_chat, 'slow')
+        slow_chat_started.wait()
+        dispatcher.submit(fast_chat, 'fast')
+
+        assert fast_chat_done.wait(timeout=5)
+        release.set()
+        dispatcher.close()
+
+    def test_full_queue_rejects_messages(self):
+        release = threading.Event()
+        dispatcher = ChatDispatcher(
+            lambda chat_id, text: release.wait(), n_workers=1, max_queue_size=2
+        )
+
+        results = [dispatcher.submit(1, str(i)) for i in range(5)]
+        release.set()
+        dispatcher.join()
+
+        # one message is being processed, two are waiting
+        assert results.count(False) >= 2
+        stats = dispatcher.stats()
+        assert stats['rejected'] == results.count(False)
+        assert stats['processed'] == results.count(True)
+        dispatcher.close()
+
+    def test_failures_are_counted(self):
+        def handle(chat_id, text):
+            if text == 'bad':
+                raise ValueError(text)
+
+        dispatcher = ChatDispatcher(handle, n_workers=1)
+        for text in ['good', 'bad', 'good']:
+            dispatcher.submit(1, text)
+        dispatcher.join()
+
+        stats = dispatcher.stats()
+        assert stats['processed'] == 2
+        assert stats['failed'] == 1
+        assert stats['queue_depth'] == 0
+        assert 0 <= stats['queue_latency_p50'] <= stats['queue_latency_max']
+        dispatcher.close()
+
+
+@pytest.mark.parametrize(
+    ['update', 'expected'],
+    [
+        ({'message': {'chat': {'id': 1}, 'text': 'hi'}}, (1, 'hi')),
+        ({'edited_message': {'chat': {'id': 2}, 'text': 'hey'}}, (2, 'hey')),
+        ({'message': {'chat': {'id': 1}, 'photo': []}}, None),
+        ({'callback_query': {}}, None),
+        (None, None),
+    ],
+)
+def test_parse_update(update, expected):
+    from get_drunk_telegram_bot.bot.server import parse_update
+
+    assert parse_update(update) == expected
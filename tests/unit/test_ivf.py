@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from get_drunk_telegram_bot.similarity.cosine import CosineSimilarity
+from get_drunk_telegram_bot.similarity.ivf import IVFCosineSimilarity
+from get_drunk_telegram_bot.similarity.metrics import recall_at_k
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.RandomState(0)
+    centers = rng.randn(10, 32)
+    candidates = np.repeat(centers, 30, axis=0) + 0.3 * rng.randn(300, 32)
+    anchors = centers + 0.3 * rng.randn(10, 32)
+    return anchors, candidates
+
+
+class IVFCosineSimilarityTest:
+    def exact_ranks(self, anchors, candidates, k):
+        similarity = CosineSimilarity()
+        _, ranks = similarity.rank_batch(anchors, similarity.prepare(candidates), k)
+        return ranks
+
+    def test_full_probe_is_exact(self, vectors):
+        anchors, candidates = vectors
+        similarity = IVFCosineSimilarity(n_lists=8, nprobe=8)
+        prepared = similarity.prepare(candidates)
+
+        _, ranks = similarity.rank_batch(anchors, prepared, 10)
+
+        np.testing.assert_array_equal(self.exact_ranks(anchors, candidates, 10), ranks)
+
+    def test_partial_probe_recall(self, vectors):
+        anchors, candidates = vectors
+        similarity = IVFCosineSimilarity(n_lists=10, nprobe=2)
+        prepared = similarity.prepare(candidates)
+
+        similarities, ranks = similarity.rank_batch(anchors, prepared, 10)
+
+        assert ranks.shape == similarities.shape == (10, 10)
+        assert recall_at_k(self.exact_ranks(anchors, candidates, 10), ranks) > 0.9
+
+    def test_returns_k_candidates_from_small_lists(self, vectors):
+        anchors, candidates = vectors
+        similarity = IVFCosineSimilarity(n_lists=50, nprobe=1)
+        prepared = similarity.prepare(candidates)
+
+        _, ranks = similarity.top_k(anchors[0], prepared, 100)
+
+        assert len(ranks) == 100
+        assert len(np.unique(ranks)) == 100
+
+    def test_index_is_persisted(self, vectors, tmpdir):
+        anchors, candidates = vectors
+        index_path = tmpdir / 'index.npz'
+        built = IVFCosineSimilarity(n_lists=10, index_path=index_path)
+        built.prepare(candidates)
+        assert index_path.exists()
+
+        loaded = IVFCosineSimilarity(n_lists=10, index_path=index_path)
+        with patch.object(IVFCosineSimilarity, '_IVFCosineSimilarity__build') as build:
+            loaded.prepare(candidates)
+        build.assert_not_called()
+        np.testing.assert_array_equal(built.list_members, loaded.list_members)
+
+        rebuilt = IVFCosineSimilarity(n_lists=10, index_path=index_path)
+        rebuilt.prepare(candidates[::-1])
+        assert not np.array_equal(built.list_members, rebuilt.list_members)
@@ -0,0 +1,59 @@
+import difflib
+
+import pytest
+
+from get_drunk_telegram_bot.drinks.name_index import NameIndex, strip_name
+
+_NAMES = [
+    'Pina Colada 🍍 🥃',
+    'Mojito 🍃',
+    'Cuba Libre',
+    'Long Island Iced Tea 🍹',
+    'Margarita 🍸',
+    'Strawberry Margarita 🍓',
+    'Blue Lagoon',
+    'Tequila Sunrise 🌅',
+]
+
+
+def brute_force_search(query, min_ratio=0.8):
+    best_id, best_ratio = None, min_ratio
+    for i, name in enumerate(_NAMES):
+        ratio = difflib.SequenceMatcher(a=query, b=strip_name(name)).ratio()
+        if ratio > best_ratio:
+            best_id, best_ratio = i, ratio
+    return best_id
+
+
+def test_strip_name():
+    assert strip_name('Pina Colada 🍍 🥃') == 'pina colada'
+    assert strip_name('Cuba Libre') == 'cuba libre'
+
+
+@pytest.mark.parametrize(
+    'query',
+    [
+        'pina colada',
+        'pinacolada',
+        'mojito',
+        'mohito',
+        'margarita',
+        'strawbery margarita',
+        'long island',
+        'tequila sunrise',
+        'ere long done do does did',
+        'rum',
+        'a',
+        '',
+    ],
+)
+def test_search_matches_brute_force(query):
+    assert NameIndex(_NAMES).search(query) == brute_force_search(query)
+
+
+def test_only_shortlist_is_compared():
+    index = NameIndex(_NAMES, shortlist_size=2)
+
+    assert len(index.shortlist('margarita')) == 2
+    assert set(index.shortlist('margarita')) == {4, 5}
+    assert index.search('margarita') == 4
@@ -0,0 +1,98 @@
+import os
+from typing import List
+from unittest.mock import create_autospec, patch
+
+import numpy as np
+
+from get_drunk_telegram_bot.drinks.dataset import Dataset
+from get_drunk_telegram_bot.embeder import (
+    CachingEmbeder,
+    IEmbeder,
+    ParallelEmbeder,
+    embed_parallel,
+)
+from get_drunk_telegram_bot.model import CandidateCache, EmbederModel
+from get_drunk_telegram_bot.similarity import CosineSimilarity
+
+_TEXTS = [f'ingredient {i} ' * (i % 7) for i in range(50)]
+
+
+class LengthEmbeder(IEmbeder):
+    def embed(self, data: List[str]) -> np.array:
+        vectors = [[len(text), text.count(' '), os.getpid()] for text in data]
+        return np.array(vectors, dtype=float).reshape(-1, 3)
+
+
+def test_embed_parallel_keeps_order():
+    vectors = embed_parallel(LengthEmbeder, _TEXTS, n_workers=2, shard_size=7)
+    expected = LengthEmbeder().embed(_TEXTS)
+
+    np.testing.assert_array_equal(expected[:, :2], vectors[:, :2])
+    assert os.getpid() not in vectors[:, 2]
+
+
+def test_embed_parallel_to_memory_map(tmpdir):
+    out_path = str(tmpdir / 'vectors.npy')
+    vectors = embed_parallel(LengthEmbeder, _TEXTS, n_workers=2, shard_size=10, out_path=out_path)
+
+    assert isinstance(vectors, np.memmap)
+    np.testing.assert_array_equal(vectors, np.load(out_path))
+
+
+def test_parallel_embeder_embeds_small_batches_locally():
+    embeder = ParallelEmbeder(LengthEmbeder(), LengthEmbeder, n_workers=2, shard_size=10)
+
+    assert (embeder.embed(_TEXTS[:10])[:, 2] == os.getpid()).all()
+    assert (embeder.embed(_TEXTS)[:, 2] != os.getpid()).all()
+    assert embeder.fingerprint == 'LengthEmbeder'
+
+
+def test_embed_parallel_empty_data(tmpdir):
+    assert embed_parallel(LengthEmbeder, [], n_workers=1).shape == (0, 3)
+
+    out_path = str(tmpdir / 'vectors.npy')
+    embed_parallel(LengthEmbeder, [], n_workers=1, out_path=out_path)
+    assert np.load(out_path).shape == (0, 3)
+
+
+def test_catalog_is_embedded_into_cache_file(tmp_path):
+    dataset = create_autospec(Dataset)
+    dataset.get_ingredients.return_value = _TEXTS
+    dataset.fingerprint = 'mock-dataset'
+    embeder = CachingEmbeder(
+        ParallelEmbeder(LengthEmbeder(), LengthEmbeder, n_workers=2, shard_size=10)
+    )
+
+    with patch.object(CandidateCache, 'save', side_effect=AssertionError('built in memory')):
+        EmbederModel(embeder, dataset, CosineSimilarity(), cache=CandidateCache(tmp_path))
+
+    (path,) = tmp_path.glob('*.npy')
+    assert path.name.startswith('LengthEmbeder-')
+    # the entry is stored normalized
+    vectors = np.load(path)
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1)
+    expected = LengthEmbeder().embed(_TEXTS)
+    np.testing.assert_allclose(vectors[:, 0] * expected[:, 1], vectors[:, 1] * expected[:, 0])
+    assert list(tmp_path.glob('*.tmp*')) == []
+
+
+class RecordingSimilarity(CosineSimilarity):
+    def prepare(self, candidates: np.array) -> np.array:
+        self.prepared = super().prepare(candidates)
+        return self.prepared
+
+
+def test_cached_catalog_stays_memory_mapped(tmp_path):
+    dataset = create_autospec(Dataset)
+    dataset.get_ingredients.return_value = _TEXTS
+    dataset.fingerprint = 'mock-dataset'
+    embeder = ParallelEmbeder(LengthEmbeder(), LengthEmbeder, n_workers=2, shard_size=10)
+    similarity = RecordingSimilarity()
+
+    EmbederModel(embeder, dataset, similarity, cache=CandidateCache(tmp_path))
+    assert isinstance(similarity.prepared, np.memmap)
+
+    # a cache hit maps the file, prepare does not copy it
+    EmbederModel(embeder, dataset, similarity, cache=CandidateCache(tmp_path))
+    assert isinstance(similarity.prepared, np.memmap)
+    assert not similarity.prepared.flags.writeable
@@ -0,0 +1,171 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs
+
+import pytest
+
+from get_drunk_telegram_bot.bot.dedup import UpdateDeduplicator
+from get_drunk_telegram_bot.bot.polling import UpdatePoller
+from get_drunk_telegram_bot.bot.server import create_poller
+from get_drunk_telegram_bot.bot.telegram import TelegramClient
+from tests.utils import get_handler
+
+
+class FakeBotApi:
+    """
+    Local stand-in of the Bot API server serving getUpdates.
+    """
+
+    def __init__(self):
+        self.updates = []
+        self.requests = []
+        self.fail = False
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                params = {
+                    key: values[0]
+                    for key, values in parse_qs(self.rfile.read(length).decode()).items()
+                }
+                api.requests.append((self.path.rsplit('/', 1)[-1], params))
+
+                if api.fail:
+                    status, body = 409, {'ok': False, 'description': 'Conflict'}
+                else:
+                    offset = int(params.get('offset', 0))
+                    limit = int(params.get('limit', 100))
+                    result = [u for u in api.updates if u['update_id'] >= offset][:limit]
+                    status, body = 200, {'ok': True, 'result': result}
+
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_update(update_id, chat_id, text):
+    return {'update_id': update_id, 'message': {'chat': {'id': chat_id}, 'text': text}}
+
+
+@pytest.fixture
+def api():
+    api = FakeBotApi()
+    yield api
+    api.close()
+
+
+@pytest.fixture
+def client(api):
+    return TelegramClient('token', api_url=api.url, max_retries=0)
+
+
+class UpdatePollerTest:
+    def test_batches_are_handled_and_offset_is_persisted(self, api, client, tmp_path):
+        api.updates = [make_update(i, i % 2, f'\\recipe {i}') for i in range(10, 15)]
+        batches = []
+        offset_path = tmp_path / 'offset.json'
+        poller = UpdatePoller(client, batches.append, offset_path=offset_path, limit=3, timeout=0)
+
+        assert poller.poll_once() == 3
+        assert poller.poll_once() == 2
+        assert poller.poll_once() == 0
+
+        assert [[u['update_id'] for u in batch] for batch in batches] == [[10, 11, 12], [13, 14]]
+        methods, params = zip(*api.requests)
+        assert set(methods) == {'getUpdates'}
+        assert [p.get('offset') for p in params] == [None, '13', '15']
+        assert json.loads(offset_path.read_text()) == {'offset': 15}
+
+        # a restarted poller continues after the handled updates
+        api.updates.append(make_update(15, 0, '\\menu'))
+        restarted = UpdatePoller(client, batches.append, offset_path=offset_path, timeout=0)
+        assert restarted.poll_once() == 1
+        assert batches[-1] == [make_update(15, 0, '\\menu')]
+
+    def test_offset_is_not_saved_when_handling_fails(self, api, client, tmp_path):
+        api.updates = [make_update(1, 1, '\\start')]
+        offset_path = tmp_path / 'offset.json'
+
+        def fail(updates):
+            raise RuntimeError('handler failed')
+
+        poller = UpdatePoller(client, fail, offset_path=offset_path, timeout=0)
+        with pytest.raises(RuntimeError):
+            poller.poll_once()
+        assert poller.offset == 0
+        assert not offset_path.exists()
+
+        batches = []
+        poller.handle_batch = batches.append
+        assert poller.poll_once() == 1
+        assert batches == [api.updates]
+
+    def test_failed_call_waits_before_next_poll(self, api, client):
+        api.fail = True
+        sleeps, batches = [], []
+        poller = UpdatePoller(client, batches.append, timeout=0, error_delay=2, sleep=sleeps.append)
+
+        assert poller.poll_once() == 0
+        assert batches == []
+        assert sleeps == [2]
+
+    def test_run_stops(self, api, client):
+        stop = threading.Event()
+        api.updates = [make_update(1, 1, '\\start')]
+        poller = UpdatePoller(client, lambda updates: stop.set(), timeout=0)
+
+        poller.run(stop)
+        assert poller.offset == 2
+
+    def test_duplicate_updates_are_skipped(self, client):
+        handler = get_handler()
+        dedup = UpdateDeduplicator(size=10)
+        batches = []
+        handler.process_batch = batches.append
+        handler._client = client
+        poller = create_poller(handler, dedup=dedup)
+
+        poller.handle_batch([make_update(1, 1, '\\start'), make_update(2, 2, '\\menu')])
+        poller.handle_batch([make_update(2, 2, '\\menu'), make_update(3, 1, '\\end')])
+
+        assert batches == [[(1, '\\start'), (2, '\\menu')], [(1, '\\end')]]
+        assert dedup.hits == 1
+
+    def test_failed_batch_is_not_taken_for_duplicates(self, client):
+        handler = get_handler()
+        handler._client = client
+        dedup = UpdateDeduplicator(size=10)
+        poller = create_poller(handler, dedup=dedup)
+        updates = [make_update(1, 1, '\\start'), make_update(2, 2, '\\menu')]
+
+        with patch.object(handler, 'process_batch', side_effect=RuntimeError('failed')):
+            with pytest.raises(RuntimeError):
+                poller.handle_batch(updates)
+
+        batches = []
+        handler.process_batch = batches.append
+        poller.handle_batch(updates)
+        assert batches == [[(1, '\\start'), (2, '\\menu')]]
+        assert dedup.hits == 0
+
+    def test_invalid_limit(self, client):
+        with pytest.raises(ValueError):
+            UpdatePoller(client, print, limit=101)
@@ -5,8 +5,8 @@ import numpy as np
 import pytest
 
 from get_drunk_telegram_bot.drinks.dataset import Dataset
-from get_drunk_telegram_bot.embeder import TfidfEmbeder
-from get_drunk_telegram_bot.model import EmbederModel
+from get_drunk_telegram_bot.embeder import CachingEmbeder, TfidfEmbeder
+from get_drunk_telegram_bot.model import CandidateCache, EmbederModel
 from get_drunk_telegram_bot.similarity import CosineSimilarity
 
 _MOCK_EMBEDINGS = {
@@ -24,6 +24,9 @@ def f(data: List[str]):
 def embeder():
     mock = create_autospec(TfidfEmbeder)
     mock.embed.side_effect = f
+    mock.name = 'MockEmbeder'
+    mock.embed_to.return_value = None
+    mock.fingerprint = 'mock-embeder'
     return mock
 
 
@@ -36,6 +39,7 @@ def dataset():
     mock = create_autospec(Dataset)
     mock.get_coctails_by_ids.side_effect = g
     mock.get_ingredients.return_value = list(_MOCK_EMBEDINGS.keys())
+    mock.fingerprint = 'mock-dataset'
     return mock
 
 
@@ -44,3 +48,121 @@ def test_embeder_model(query, embeder, dataset):
     model = EmbederModel(embeder, dataset, CosineSimilarity(), 0.0)
     prediction = model.predict(query)
     assert [query] == prediction
+
+
+def test_embeder_model_batch(embeder, dataset):
+    model = EmbederModel(embeder, dataset, CosineSimilarity(), 0.0)
+    queries = list(_MOCK_EMBEDINGS.keys())
+    predictions = model.predict_batch(queries)
+    assert [[query] for query in queries] == predictions
+    assert embeder.embed.call_count == 2
+
+
+def test_embeder_model_cache(embeder, dataset, tmpdir):
+    cache = CandidateCache(tmpdir)
+    EmbederModel(embeder, dataset, CosineSimilarity(), 0.0, cache=cache)
+    assert embeder.embed.call_count == 1
+
+    model = EmbederModel(embeder, dataset, CosineSimilarity(), 0.0, cache=cache)
+    assert embeder.embed.call_count == 1
+    assert ['2'] == model.predict('2')
+
+
+def test_wrapped_embeders_keep_separate_cache_entries(dataset, tmp_path):
+    cache = CandidateCache(tmp_path)
+    embeders = []
+    for name in ['TfidfEmbeder', 'BertEmbeder']:
+        embeder = create_autospec(TfidfEmbeder)
+        embeder.embed.side_effect = f
+        embeder.name = name
+        embeder.embed_to.return_value = None
+        embeder.fingerprint = name
+        embeders.append(embeder)
+
+    for embeder in embeders + embeders:
+        EmbederModel(CachingEmbeder(embeder), dataset, CosineSimilarity(), 0.0, cache=cache)
+
+    names = sorted(path.name.split('-')[0] for path in tmp_path.glob('*.npy'))
+    assert names == ['BertEmbeder', 'TfidfEmbeder']
+    assert [embeder.embed.call_count for embeder in embeders] == [1, 1]
+
+
+def test_predict_ids(embeder, dataset):
+    model = EmbederModel(embeder, dataset, CosineSimilarity())
+    coctail_ids = model.predict_ids('2')
+    assert coctail_ids[0] == 1 and sorted(coctail_ids) == [0, 1, 2]
+    assert model.predict_ids('3', k=1) == [2]
+
+
+@pytest.fixture
+def neighbours_embeder():
+    vectors = {
+        '1': np.array([1.0, 0.0, 0.0]),
+        '2': np.array([0.9, 0.1, 0.0]),
+        '3': np.array([0.0, 1.0, 0.0]),
+        '4': np.array([0.0, 0.9, 0.2]),
+        '5': np.array([0.0, 0.0, 0.0]),
+    }
+    mock = create_autospec(TfidfEmbeder)
+    mock.embed.side_effect = lambda data: np.array([vectors[x] for x in data])
+    mock.name = 'MockEmbeder'
+    mock.embed_to.return_value = None
+    mock.fingerprint = 'mock-embeder'
+    return mock
+
+
+@pytest.fixture
+def neighbours_dataset():
+    mock = create_autospec(Dataset)
+    mock.get_coctails_by_ids.side_effect = g
+    mock.get_ingredients.return_value = ['1', '2', '3', '4', '5']
+    mock.fingerprint = 'mock-dataset'
+    return mock
+
+
+def test_neighbours_graph(neighbours_embeder, neighbours_dataset):
+    model = EmbederModel(
+        neighbours_embeder, neighbours_dataset, CosineSimilarity(), neighbours_k=2
+    )
+
+    assert model.neighbours.dtype == np.int32
+    assert model.neighbours.shape == (5, 2)
+    assert model.neighbours[0][0] == 1
+    assert list(model.neighbours[2]) == [3, 1]
+    assert all(model.neighbours[4] != 4)
+    assert model.predict_similar(3) == ['3', '2']
+
+
+def test_neighbours_below_min_similarity_are_dropped(
+    neighbours_embeder, neighbours_dataset
+):
+    model = EmbederModel(
+        neighbours_embeder,
+        neighbours_dataset,
+        CosineSimilarity(),
+        min_similarity=0.5,
+        neighbours_k=2,
+    )
+
+    assert list(model.neighbours[0]) == [1, -1]
+    assert model.predict_similar(0) == ['2']
+    assert model.predict_similar(4) == []
+
+
+def test_neighbours_are_cached(neighbours_embeder, neighbours_dataset, tmp_path):
+    cache = CandidateCache(tmp_path)
+    first = EmbederModel(
+        neighbours_embeder, neighbours_dataset, cache=cache, neighbours_k=2
+    )
+    second = EmbederModel(
+        neighbours_embeder, neighbours_dataset, cache=cache, neighbours_k=2
+    )
+
+    assert len(list(tmp_path.glob('*-knn-*.npy'))) == 1
+    np.testing.assert_array_equal(first.neighbours, second.neighbours)
+
+
+def test_predict_similar_without_graph(embeder, dataset):
+    model = EmbederModel(embeder, dataset, CosineSimilarity())
+    with pytest.raises(NotImplementedError):
+        model.predict_similar(0)
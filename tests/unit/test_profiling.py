@@ -0,0 +1,28 @@
+import subprocess
+import sys
+
+from get_drunk_telegram_bot.utils.profiling import StartupProfiler
+
+
+def test_phases_are_recorded():
+    profiler = StartupProfiler()
+    with profiler.phase('imports'):
+        pass
+    with profiler.phase('dataset'):
+        pass
+    with profiler.phase('imports'):
+        pass
+
+    assert list(profiler.timings) == ['imports', 'dataset']
+    assert profiler.report().splitlines()[-1].startswith('total: ')
+
+
+def test_server_does_not_import_heavy_backends():
+    code = (
+        'import sys; import get_drunk_telegram_bot.bot.server; '
+        "print(' '.join(sorted(set(sys.modules) & {'torch', 'pandas', 'PIL', 'sklearn'})))"
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code], stdout=subprocess.PIPE, check=True
+    ).stdout
+    assert output.decode().strip() == ''
@@ -0,0 +1,96 @@
+from typing import List
+from unittest.mock import create_autospec
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from get_drunk_telegram_bot.drinks.dataset import Dataset
+from get_drunk_telegram_bot.embeder import Projection, TfidfEmbeder
+from get_drunk_telegram_bot.model import CandidateCache, EmbederModel
+from get_drunk_telegram_bot.similarity import CosineSimilarity
+
+
+@pytest.fixture
+def vectors():
+    # 300 vectors of 64 dims lying close to a 8 dimensional subspace
+    rng = np.random.RandomState(0)
+    basis = rng.randn(8, 64)
+    return rng.randn(300, 8).dot(basis) + 0.01 * rng.randn(300, 64)
+
+
+class ProjectionTest:
+    def test_dense_vectors_are_fitted_with_pca(self, vectors):
+        projection = Projection.fit(vectors, 8)
+
+        assert projection.method == 'pca'
+        assert projection.transform(vectors).shape == (300, 8)
+        assert projection.transform(vectors).dtype == np.float32
+        assert projection.recall(vectors[:20], vectors, 10) > 0.9
+
+    def test_sparse_vectors_are_fitted_with_svd(self, vectors):
+        sparse_vectors = sparse.csr_matrix(np.maximum(vectors, 0))
+        projection = Projection.fit(sparse_vectors, 8)
+
+        assert projection.method == 'svd'
+        assert projection.mean is None
+        projected = projection.transform(sparse_vectors)
+        assert isinstance(projected, np.ndarray)
+        assert projected.shape == (300, 8)
+        assert 0 <= projection.recall(sparse_vectors[:20], sparse_vectors, 10) <= 1
+
+    def test_save_and_load(self, vectors, tmp_path):
+        projection = Projection.fit(vectors, 4)
+        projection.save(tmp_path / 'projection.npz')
+        loaded = Projection.load(tmp_path / 'projection.npz')
+
+        assert loaded.method == 'pca'
+        assert loaded.fingerprint == projection.fingerprint
+        np.testing.assert_allclose(loaded.transform(vectors), projection.transform(vectors))
+
+
+@pytest.fixture
+def embeder(vectors):
+    texts = [str(i) for i in range(len(vectors))]
+
+    def embed(data: List[str]):
+        return vectors[[texts.index(text) for text in data]]
+
+    mock = create_autospec(TfidfEmbeder)
+    mock.embed.side_effect = embed
+    mock.name = 'MockEmbeder'
+    mock.embed_to.return_value = None
+    mock.fingerprint = 'mock-embeder'
+    return mock
+
+
+@pytest.fixture
+def dataset(vectors):
+    mock = create_autospec(Dataset)
+    mock.get_coctails_by_ids.side_effect = list
+    mock.get_ingredients.return_value = [str(i) for i in range(len(vectors))]
+    mock.fingerprint = 'mock-dataset'
+    return mock
+
+
+def test_embeder_model_ranks_in_projected_space(embeder, dataset, vectors):
+    projection = Projection.fit(vectors, 8)
+    model = EmbederModel(
+        embeder, dataset, CosineSimilarity(), top_k=5, projection=projection
+    )
+
+    assert model.predict('7')[0] == 7
+    assert [coctails[0] for coctails in model.predict_batch(['3', '11'])] == [3, 11]
+
+
+def test_projection_is_part_of_cache_key(embeder, dataset, vectors, tmp_path):
+    cache = CandidateCache(tmp_path)
+    projection = Projection.fit(vectors, 8)
+    EmbederModel(embeder, dataset, CosineSimilarity(), cache=cache)
+    for _ in range(2):
+        EmbederModel(
+            embeder, dataset, CosineSimilarity(), cache=cache, projection=projection
+        )
+
+    assert embeder.embed.call_count == 2
+    assert [np.load(path).shape for path in tmp_path.glob('*.npy')] == [(300, 8)]
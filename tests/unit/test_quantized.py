@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from get_drunk_telegram_bot.similarity.cosine import CosineSimilarity
+from get_drunk_telegram_bot.similarity.quantized import QuantizedCosineSimilarity
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.RandomState(0)
+    return rng.randn(20, 64).astype(np.float32), rng.randn(1000, 64).astype(np.float32)
+
+
+class QuantizedCosineSimilarityTest:
+    @pytest.mark.parametrize(['dtype', 'itemsize'], [('int8', 1), ('float16', 2)])
+    def test_codes_are_compressed(self, vectors, dtype, itemsize):
+        _, candidates = vectors
+        similarity = QuantizedCosineSimilarity(dtype=dtype)
+        similarity.prepare(candidates)
+
+        assert similarity.codes.shape == candidates.shape
+        assert similarity.codes.itemsize == itemsize
+
+    @pytest.mark.parametrize('dtype', ['int8', 'float16'])
+    def test_rescored_similarities_are_exact(self, vectors, dtype):
+        anchors, candidates = vectors
+        similarity = QuantizedCosineSimilarity(dtype=dtype, rescore=50)
+        prepared = similarity.prepare(candidates)
+
+        similarities, ranks = similarity.top_k(anchors[0], prepared, 10)
+        exact = CosineSimilarity()
+
+        np.testing.assert_array_almost_equal(
+            [exact.compute(anchors[0], candidates[rank]) for rank in ranks],
+            similarities,
+            decimal=5,
+        )
+        assert similarity.recall(anchors, prepared, 10) > 0.95
+
+    def test_rescoring_everything_is_exact(self, vectors):
+        anchors, candidates = vectors
+        similarity = QuantizedCosineSimilarity(rescore=len(candidates), memory_budget=1000)
+        prepared = similarity.prepare(candidates)
+
+        assert similarity.recall(anchors, prepared, 10) == 1.0
+
+    def test_unknown_dtype(self):
+        with pytest.raises(ValueError):
+            QuantizedCosineSimilarity(dtype='int4')
+
+    def test_memory_mapped_candidates_are_not_copied(self, vectors, tmp_path):
+        anchors, candidates = vectors
+        np.save(tmp_path / 'candidates.npy', candidates * 3)
+        mapped = np.load(tmp_path / 'candidates.npy', mmap_mode='r')
+        similarity = QuantizedCosineSimilarity(rescore=50, memory_budget=4096)
+
+        prepared = similarity.prepare(mapped)
+        assert prepared is mapped
+
+        similarities, ranks = similarity.top_k(anchors[0], prepared, 5)
+        exact_similarities, exact_ranks = CosineSimilarity().top_k(
+            anchors[0], CosineSimilarity().prepare(candidates), 5
+        )
+        np.testing.assert_array_equal(exact_ranks, ranks)
+        np.testing.assert_array_almost_equal(exact_similarities, similarities, decimal=5)
+
+    @pytest.mark.parametrize('memory_budget', [1000, 2 ** 20])
+    def test_rank_batch_agrees_with_top_k(self, vectors, memory_budget):
+        anchors, candidates = vectors
+        anchors[3] = 0
+        similarity = QuantizedCosineSimilarity(rescore=50, memory_budget=memory_budget)
+        prepared = similarity.prepare(candidates)
+
+        similarities, ranks = similarity.rank_batch(anchors, prepared, 10)
+
+        assert similarities.shape == ranks.shape == (len(anchors), 10)
+        for anchor, anchor_similarities, anchor_ranks in zip(anchors, similarities, ranks):
+            expected_similarities, expected_ranks = similarity.top_k(anchor, prepared, 10)
+            np.testing.assert_array_equal(expected_ranks, anchor_ranks)
+            np.testing.assert_array_almost_equal(expected_similarities, anchor_similarities, decimal=5)
+
+    def test_rank_batch_of_no_anchors(self, vectors):
+        _, candidates = vectors
+        similarity = QuantizedCosineSimilarity()
+        prepared = similarity.prepare(candidates)
+
+        similarities, ranks = similarity.rank_batch(np.empty((0, 64)), prepared, 10)
+        assert similarities.shape == ranks.shape == (0, 10)
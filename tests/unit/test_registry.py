@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from get_drunk_telegram_bot.bot.registry import ModelRegistry, ModelSlot
+
+
+def test_registry_creates_registered_models():
+    registry = ModelRegistry()
+
+    @registry.register('Echo')
+    def create_echo(dataset, prefix='', **options):
+        return f'{prefix}{dataset}'
+
+    assert registry.names == ['Echo']
+    assert registry.create('Echo', 'dataset', prefix='model-', unused=1) == 'model-dataset'
+    with pytest.raises(ValueError):
+        registry.create('Unknown', 'dataset')
+
+
+def test_swap_waits_for_in_flight_requests():
+    slot = ModelSlot('old-model', 'old-dataset')
+
+    with slot.acquire() as pinned:
+        old = slot.swap('new-model', 'new-dataset')
+
+        assert pinned.model == 'old-model'
+        assert slot.current.model == 'new-model'
+        assert not old.released.is_set()
+
+    assert old.released.is_set()
+    assert old.model is None
+
+
+def test_swap_releases_idle_generation():
+    slot = ModelSlot('old-model', 'old-dataset')
+    old = slot.swap('new-model', 'new-dataset')
+
+    assert old.released.is_set()
+    assert slot.current.version == 1
+
+
+def test_swap_in_background():
+    slot = ModelSlot('old-model', 'old-dataset')
+    building = threading.Event()
+    release_build = threading.Event()
+
+    def build():
+        building.set()
+        release_build.wait()
+        return 'new-model', 'new-dataset'
+
+    thread = slot.swap_in_background(build)
+    building.wait()
+    with slot.acquire() as generation:
+        assert generation.model == 'old-model'
+
+    release_build.set()
+    thread.join()
+    assert slot.current.model == 'new-model'
+
+
+def test_failed_build_keeps_current_model():
+    slot = ModelSlot('old-model', 'old-dataset')
+
+    def build():
+        raise RuntimeError('broken catalog')
+
+    slot.swap_in_background(build).join()
+    assert slot.current.model == 'old-model'
+
+
+def test_on_swap_is_called_only_after_successful_swap():
+    slot = ModelSlot('old-model', 'old-dataset')
+    swapped = []
+
+    def build():
+        raise RuntimeError('broken catalog')
+
+    slot.swap_in_background(build, lambda: swapped.append(slot.current.model)).join()
+    assert swapped == []
+
+    slot.swap_in_background(
+        lambda: ('new-model', 'new-dataset'), lambda: swapped.append(slot.current.model)
+    ).join()
+    assert swapped == ['new-model']
+
+
+def test_derived_values_are_replaced_with_dataset():
+    slot = ModelSlot('old-model', 'old-dataset')
+    with slot.acquire() as generation:
+        generation.derived['picks'] = 'old-picks'
+
+    slot.swap('new-model', 'new-dataset')
+    assert slot.current.derived == {}
+    assert generation.derived == {}
@@ -0,0 +1,229 @@
+import threading
+import time
+
+import pytest
+
+from get_drunk_telegram_bot.bot.scheduler import BULK, INTERACTIVE, SendScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+def create_scheduler(clock, sent, **kwargs):
+    return SendScheduler(
+        lambda method, data, files: sent.append((data['chat_id'], data['text'])),
+        clock=clock,
+        **kwargs,
+    )
+
+
+def drain(scheduler):
+    while scheduler.step() == 0:
+        pass
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2, capacity=2, now=0)
+    for _ in range(2):
+        assert bucket.wait_time(0) == 0
+        bucket.take()
+
+    assert bucket.wait_time(0) == pytest.approx(0.5)
+    assert bucket.wait_time(0.5) == 0
+    assert bucket.is_full(10)
+
+
+class SendSchedulerTest:
+    def test_chat_rate_limit(self, clock, sent):
+        scheduler = create_scheduler(clock, sent, chat_rate=1, chat_burst=2)
+        for i in range(4):
+            scheduler.submit(1, 'sendMessage', {'chat_id': 1, 'text': str(i)})
+
+        drain(scheduler)
+        assert sent == [(1, '0'), (1, '1')]
+        assert scheduler.step() == pytest.approx(1.0)
+
+        clock.advance(1.0)
+        drain(scheduler)
+        assert sent == [(1, '0'), (1, '1'), (1, '2')]
+
+    def test_global_rate_limit(self, clock, sent):
+        scheduler = create_scheduler(clock, sent, global_rate=3, chat_rate=10)
+        for chat_id in range(5):
+            scheduler.submit(chat_id, 'sendMessage', {'chat_id': chat_id, 'text': ''})
+
+        drain(scheduler)
+        assert len(sent) == 3
+        assert scheduler.step() == pytest.approx(1 / 3)
+
+    def test_chats_are_served_round_robin(self, clock, sent):
+        scheduler = create_scheduler(clock, sent, chat_rate=100, chat_burst=10)
+        for i in range(3):
+            scheduler.submit('a', 'sendMessage', {'chat_id': 'a', 'text': str(i)})
+        scheduler.submit('b', 'sendMessage', {'chat_id': 'b', 'text': '0'})
+
+        drain(scheduler)
+        assert sent == [('a', '0'), ('b', '0'), ('a', '1'), ('a', '2')]
+
+    def test_interactive_sends_go_first(self, clock, sent):
+        scheduler = create_scheduler(clock, sent)
+        scheduler.submit(1, 'sendMessage', {'chat_id': 1, 'text': 'bulk'}, priority=BULK)
+        scheduler.submit(2, 'sendMessage', {'chat_id': 2, 'text': 'reply'}, priority=INTERACTIVE)
+
+        drain(scheduler)
+        assert sent == [(2, 'reply'), (1, 'bulk')]
+
+    def test_delivery_delay_metrics(self, clock, sent):
+        scheduler = create_scheduler(clock, sent, chat_rate=1, chat_burst=1)
+        scheduler.submit(1, 'sendMessage', {'chat_id': 1, 'text': '0'})
+        scheduler.submit(1, 'sendMessage', {'chat_id': 1, 'text': '1'})
+        drain(scheduler)
+        clock.advance(2.0)
+        drain(scheduler)
+
+        stats = scheduler.stats()['interactive']
+        assert stats['sent'] == 2
+        assert stats['pending'] == 0
+        assert stats['delay_max'] == pytest.approx(2.0)
+        assert stats['delay_p50'] == pytest.approx(1.0)
+
+    def test_nothing_pending(self, clock, sent):
+        assert create_scheduler(clock, sent).step() is None
+
+    def test_background_thread(self, sent):
+        delivered = threading.Event()
+
+        def send(method, data, files):
+            sent.append(data['text'])
+            if len(sent) == 2:
+                delivered.set()
+
+        scheduler = SendScheduler(send, chat_rate=1000, chat_burst=10)
+        scheduler.start()
+        scheduler.submit(1, 'sendMessage', {'text': 'a'})
+        scheduler.submit(1, 'sendMessage', {'text': 'b'})
+
+        assert delivered.wait(timeout=5)
+        scheduler.close()
+        assert sent == ['a', 'b']
+
+    def test_rate_limited_send_is_queued_again(self, clock, sent):
+        responses = [{'ok': False, 'error_code': 429, 'parameters': {'retry_after': 5}}]
+
+        def send(method, data, files):
+            if responses:
+                return responses.pop()
+            sent.append((data['chat_id'], data['text']))
+            return {'ok': True}
+
+        scheduler = SendScheduler(send, chat_rate=10, chat_burst=10, clock=clock)
+        scheduler.submit(1, 'sendMessage', {'chat_id': 1, 'text': '0'})
+        scheduler.submit(1, 'sendMessage', {'chat_id': 1, 'text': '1'})
+        scheduler.submit(2, 'sendMessage', {'chat_id': 2, 'text': '0'})
+
+        drain(scheduler)
+        # the other chat is not delayed, the limited one waits retry_after
+        assert sent == [(2, '0')]
+        assert scheduler.step() == pytest.approx(5.0)
+
+        clock.advance(5.0)
+        drain(scheduler)
+        assert sent == [(2, '0'), (1, '0')]
+
+        # the chat bucket refills from empty after the pause
+        clock.advance(1.0)
+        drain(scheduler)
+        assert sent == [(2, '0'), (1, '0'), (1, '1')]
+        assert scheduler.stats()['interactive']['rate_limited'] == 1
+        assert scheduler.stats()['interactive']['sent'] == 3
+
+    def test_slow_chat_does_not_block_others(self):
+        release = threading.Event()
+        delivered = []
+        done = threading.Event()
+
+        def send(method, data, files):
+            if data['chat_id'] == 'slow':
+                release.wait(timeout=5)
+            delivered.append(data['chat_id'])
+            if len(delivered) == 3:
+                done.set()
+
+        scheduler = SendScheduler(send, chat_rate=1000, chat_burst=10, n_workers=2)
+        scheduler.start()
+        scheduler.submit('slow', 'sendMessage', {'chat_id': 'slow'})
+        for chat_id in ['a', 'b']:
+            scheduler.submit(chat_id, 'sendMessage', {'chat_id': chat_id})
+
+        for _ in range(100):
+            if len(delivered) == 2:
+                break
+            time.sleep(0.01)
+        assert sorted(delivered) == ['a', 'b']
+
+        release.set()
+        assert done.wait(timeout=5)
+        scheduler.close()
+
+    def test_one_send_in_flight_per_chat(self):
+        active, overlaps = [], []
+
+        def send(method, data, files):
+            active.append(data['text'])
+            if len(active) > 1:
+                overlaps.append(list(active))
+            time.sleep(0.01)
+            sent.append(data['text'])
+            active.remove(data['text'])
+
+        sent = []
+        scheduler = SendScheduler(send, chat_rate=1000, chat_burst=10, n_workers=4)
+        scheduler.start()
+        for i in range(5):
+            scheduler.submit(1, 'sendMessage', {'text': str(i)})
+        scheduler.close(timeout=5)
+
+        assert sent == [str(i) for i in range(5)]
+        assert overlaps == []
+
+    def test_close_sends_pending_interactive_only(self):
+        sent = []
+        scheduler = SendScheduler(
+            lambda method, data, files: sent.append(data['text']), chat_rate=1000, chat_burst=10
+        )
+        scheduler.submit(1, 'sendMessage', {'text': 'bulk'}, priority=BULK)
+        scheduler.submit(2, 'sendMessage', {'text': 'reply'})
+        scheduler.start()
+        scheduler.close(timeout=5)
+
+        assert 'reply' in sent
+
+    def test_close_gives_up_after_timeout(self, clock):
+        scheduler = SendScheduler(lambda *args: None, chat_rate=1, chat_burst=1, clock=clock)
+        scheduler.submit(1, 'sendMessage', {'text': '0'})
+        scheduler.submit(1, 'sendMessage', {'text': '1'})
+        scheduler.start()
+
+        # the fake clock never advances, the second send is never allowed
+        start = time.monotonic()
+        scheduler.close(timeout=0.2)
+        assert time.monotonic() - start < 2
+        assert scheduler.stats()['interactive']['pending'] == 1
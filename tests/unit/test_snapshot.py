@@ -0,0 +1,154 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from get_drunk_telegram_bot.drinks import dataset
+from get_drunk_telegram_bot.drinks.catalog import ColumnarCatalog
+from get_drunk_telegram_bot.drinks.snapshot import (
+    SnapshotError,
+    load_snapshot,
+    save_snapshot,
+    verify_snapshot,
+)
+
+_RECORDS = [
+    {
+        'name': 'Mojito 🍃',
+        'characteristics': ['fresh'],
+        'ingredients': [
+            {'name': 'White rum', 'amount': '5', 'unit': 'cl'},
+            {'name': 'Lime', 'amount': 1, 'unit': None},
+        ],
+        'tools': [{'name': 'Highball', 'amount': '1', 'unit': 'piece'}],
+        'recipe': ['Muddle lime', 'Add rum'],
+        'image': None,
+        'useful_info': 'was invented in Havana',
+        'abv': 12.5,
+        'volume': 200,
+    },
+    {
+        'name': 'Screwdriver',
+        'characteristics': None,
+        'ingredients': [{'name': 'Vodka', 'amount': '5', 'unit': 'cl'}],
+        'tools': [],
+        'recipe': None,
+    },
+]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = tmp_path / 'catalog.snapshot'
+    save_snapshot(ColumnarCatalog.from_records(_RECORDS), path, 'source-fingerprint')
+    return path
+
+
+class SnapshotTest:
+    def test_round_trip(self, snapshot_path):
+        expected = ColumnarCatalog.from_records(_RECORDS)
+        catalog, fingerprint = load_snapshot(snapshot_path)
+
+        assert fingerprint == 'source-fingerprint'
+        assert len(catalog) == len(expected)
+        for i in range(len(expected)):
+            assert catalog.cocktail(i).to_dict() == expected.cocktail(i).to_dict()
+            assert catalog.ingredients_str(i) == expected.ingredients_str(i)
+
+    def test_arrays_are_memory_mapped(self, snapshot_path):
+        catalog, _ = load_snapshot(snapshot_path)
+
+        assert isinstance(catalog.abv.base, np.memmap) or isinstance(catalog.abv, np.memmap)
+        assert catalog.ingredient_ids.dtype == np.int32
+        assert catalog.ingredient_ids.shape == (3, 3)
+
+    def test_corrupted_metadata(self, snapshot_path):
+        data = bytearray(snapshot_path.read_bytes())
+        data[40] ^= 0xFF
+        snapshot_path.write_bytes(bytes(data))
+
+        with pytest.raises(SnapshotError, match='checksum'):
+            load_snapshot(snapshot_path)
+
+    def test_corrupted_arrays_are_found_by_verify(self, snapshot_path):
+        data = bytearray(snapshot_path.read_bytes())
+        data[-1] ^= 0xFF
+        snapshot_path.write_bytes(bytes(data))
+
+        # opening the snapshot does not checksum the arrays
+        load_snapshot(snapshot_path)
+
+        with pytest.raises(SnapshotError, match='checksum'):
+            verify_snapshot(snapshot_path)
+
+    def test_truncated_snapshot(self, snapshot_path):
+        snapshot_path.write_bytes(snapshot_path.read_bytes()[:-8])
+
+        with pytest.raises(SnapshotError, match='truncated'):
+            load_snapshot(snapshot_path)
+
+    def test_verify(self, snapshot_path):
+        verify_snapshot(snapshot_path)
+
+    def test_not_a_snapshot(self, tmp_path):
+        path = tmp_path / 'catalog.snapshot'
+        path.write_bytes(b'{"json": "instead"}' * 4)
+
+        with pytest.raises(SnapshotError):
+            load_snapshot(path)
+
+    def test_empty_catalog(self, tmp_path):
+        save_snapshot(ColumnarCatalog.from_records([]), tmp_path / 'empty', 'fingerprint')
+        catalog, _ = load_snapshot(tmp_path / 'empty')
+        assert len(catalog) == 0
+
+
+@pytest.fixture
+def processed_cocktails(tmp_path, monkeypatch):
+    path = tmp_path / 'processed_cocktails.json'
+    records = [dict(record, ABV=record.pop('abv', None)) for record in map(dict, _RECORDS)]
+    path.write_text(json.dumps(records), encoding='utf8')
+    os.utime(path, (0, 0))
+    monkeypatch.setattr(dataset, 'PROCESSED_COCKTAILS', path)
+    return path
+
+
+def test_dataset_opens_snapshot(processed_cocktails, tmp_path, monkeypatch):
+    catalog, fingerprint = dataset.Dataset.build_catalog()
+    save_snapshot(catalog, tmp_path / 'catalog.snapshot', fingerprint)
+
+    def load_data(path):
+        raise AssertionError('json should not be parsed')
+
+    monkeypatch.setattr(dataset, 'load_data', load_data)
+    loaded = dataset.Dataset(tmp_path / 'catalog.snapshot')
+
+    assert len(loaded) == 2
+    assert loaded.fingerprint == fingerprint
+    assert loaded.get_ingredients() == ['white rum lime', 'vodka']
+    assert loaded.get_coctail_by_id(0).abv == 12.5
+
+
+def test_dataset_ignores_stale_snapshot(processed_cocktails, tmp_path):
+    save_snapshot(ColumnarCatalog.from_records([]), tmp_path / 'catalog.snapshot', 'old-fingerprint')
+    # the snapshot is newer but was built from another json
+    os.utime(tmp_path / 'catalog.snapshot', (60, 60))
+
+    loaded = dataset.Dataset(tmp_path / 'catalog.snapshot')
+    assert len(loaded) == 2
+    assert loaded.fingerprint == dataset.file_fingerprint(processed_cocktails)
+
+
+def test_dataset_opens_snapshot_older_than_json(processed_cocktails, tmp_path, monkeypatch):
+    catalog, fingerprint = dataset.Dataset.build_catalog()
+    save_snapshot(catalog, tmp_path / 'catalog.snapshot', fingerprint)
+    # e.g. a fresh checkout, the mtimes do not follow the build order
+    os.utime(tmp_path / 'catalog.snapshot', (0, 0))
+    os.utime(processed_cocktails, (60, 60))
+
+    def load_data(path):
+        raise AssertionError('json should not be parsed')
+
+    monkeypatch.setattr(dataset, 'load_data', load_data)
+    assert len(dataset.Dataset(tmp_path / 'catalog.snapshot')) == 2
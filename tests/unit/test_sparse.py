@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from get_drunk_telegram_bot.similarity.cosine import CosineSimilarity
+from get_drunk_telegram_bot.similarity.sparse import SparseCosineSimilarity
+
+
+class SparseCosineSimilarityTest:
+    @property
+    def similarity(self):
+        return SparseCosineSimilarity()
+
+    @pytest.mark.parametrize(
+        ['first', 'second', 'expected_similarity'],
+        [
+            ([1, 1], [2, 2], 1),
+            ([1, 2], [2, -1], 0),
+            ([0, 0], [0, 0], 0),
+            ([1, 1], [-1, -1], -1),
+        ],
+    )
+    def test_compute(self, first, second, expected_similarity):
+        actual_similarity = self.similarity.compute(
+            sparse.csr_matrix(first), sparse.csr_matrix(second)
+        )
+
+        np.testing.assert_almost_equal(expected_similarity, actual_similarity)
+
+    @pytest.mark.parametrize(
+        ['anchor', 'candidates', 'expected_similarities', 'expected_ranks'],
+        [([1, 1], [[0, 0], [-1, -1], [2, 2]], [0, -1, 1], [2, 0, 1])],
+    )
+    def test_rank(self, anchor, candidates, expected_similarities, expected_ranks):
+        actual_similarities, actual_ranks = self.similarity.rank(
+            sparse.csr_matrix(anchor), sparse.csr_matrix(candidates)
+        )
+
+        np.testing.assert_array_almost_equal(expected_similarities, actual_similarities)
+        np.testing.assert_array_equal(expected_ranks, actual_ranks)
+
+    def test_top_k_agrees_with_dense(self):
+        candidates = sparse.random(200, 1000, density=0.01, format='csr', random_state=0)
+        anchor = sparse.random(1, 1000, density=0.05, format='csr', random_state=1)
+
+        dense = CosineSimilarity()
+        expected_similarities, expected_ranks = dense.top_k(
+            anchor.toarray()[0], dense.prepare(candidates.toarray()), 10
+        )
+        prepared = self.similarity.prepare(candidates)
+        actual_similarities, actual_ranks = self.similarity.top_k(anchor, prepared, 10)
+
+        assert sparse.isspmatrix_csr(prepared)
+        np.testing.assert_array_almost_equal(expected_similarities, actual_similarities)
+        np.testing.assert_array_equal(expected_ranks, actual_ranks)
+
+    def test_rank_batch_agrees_with_top_k(self):
+        candidates = self.similarity.prepare(
+            sparse.random(100, 500, density=0.02, format='csr', random_state=0)
+        )
+        anchors = sparse.random(9, 500, density=0.05, format='csr', random_state=1)
+
+        similarity = SparseCosineSimilarity(memory_budget=2000)
+        similarities, ranks = similarity.rank_batch(anchors, candidates, 5)
+
+        assert similarities.shape == ranks.shape == (9, 5)
+        for i in range(anchors.shape[0]):
+            expected_similarities, _ = similarity.top_k(anchors[i], candidates, 5)
+            np.testing.assert_array_almost_equal(expected_similarities, similarities[i])
@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from unittest.mock import MagicMock, create_autospec
+
+import pytest
+
+from get_drunk_telegram_bot.drinks.cocktail import Cocktail
+from get_drunk_telegram_bot.drinks.dataset import Dataset
+from get_drunk_telegram_bot.model import EmbederModel
+from get_drunk_telegram_bot.model.stsbert import STSBertCocktailModel
+
+_MOCK_INGREDIENTS = ['rum mint lime', 'vodka orange', 'gin tonic', 'rum coconut']
+
+
+@pytest.fixture
+def dataset():
+    def get_coctails_by_ids(coctail_ids: List[int]):
+        return [
+            create_autospec(Cocktail, instance=True, ingredients_str=_MOCK_INGREDIENTS[i])
+            for i in coctail_ids
+        ]
+
+    mock = create_autospec(Dataset)
+    mock.get_coctails_by_ids.side_effect = get_coctails_by_ids
+    return mock
+
+
+@pytest.fixture
+def retriever():
+    mock = create_autospec(EmbederModel)
+    mock.predict_ids.return_value = [0, 3, 1]
+    return mock
+
+
+@pytest.fixture
+def similarity_model():
+    def predict(pairs):
+        # number of common words
+        return [len(set(text.split()) & set(query.split())) for text, query in pairs]
+
+    mock = MagicMock()
+    mock.predict.side_effect = predict
+    return mock
+
+
+def test_only_retrieved_candidates_are_reranked(dataset, retriever, similarity_model):
+    model = STSBertCocktailModel(
+        retriever, dataset, top_n=3, similarity_model=similarity_model
+    )
+    prediction = model.predict('rum coconut')
+
+    retriever.predict_ids.assert_called_once_with(
+        'rum coconut', k=3, ignore_max_similarity=True
+    )
+    similarity_model.predict.assert_called_once()
+    assert [coctail.ingredients_str for coctail in prediction] == [
+        'rum coconut',
+        'rum mint lime',
+        'vodka orange',
+    ]
+
+
+def test_pair_scores_are_cached(dataset, retriever, similarity_model):
+    model = STSBertCocktailModel(retriever, dataset, similarity_model=similarity_model)
+    model.predict('rum coconut')
+    model.predict('Rum  Coconut')
+
+    assert similarity_model.predict.call_count == 1
+
+    retriever.predict_ids.return_value = [2, 3]
+    model.predict('rum coconut')
+    pairs = similarity_model.predict.call_args[0][0]
+    assert pairs == [('gin tonic', 'rum coconut')]
+
+
+def test_cache_size_is_bounded(dataset, retriever, similarity_model):
+    model = STSBertCocktailModel(
+        retriever, dataset, cache_size=3, similarity_model=similarity_model
+    )
+    model.predict('rum')
+    model.predict('gin')
+    model.predict('rum')
+
+    assert similarity_model.predict.call_count == 3
+
+
+def test_top_k_and_empty_retrieval(dataset, retriever, similarity_model):
+    model = STSBertCocktailModel(
+        retriever, dataset, top_k=1, similarity_model=similarity_model
+    )
+    assert len(model.predict('rum coconut')) == 1
+
+    retriever.predict_ids.return_value = []
+    assert model.predict('whiskey') == []
+
+
+def test_concurrent_scoring_with_evictions(dataset, retriever, similarity_model):
+    model = STSBertCocktailModel(
+        retriever, dataset, cache_size=2, similarity_model=similarity_model
+    )
+    queries = ['rum coconut', 'gin tonic', 'vodka orange', 'rum mint'] * 50
+
+    with ThreadPoolExecutor(8) as pool:
+        scores = list(pool.map(lambda query: model.score(query, [0, 3, 1, 2]), queries))
+
+    for query, query_scores in zip(queries, scores):
+        assert list(query_scores) == similarity_model.predict.side_effect(
+            [(text, query) for text in [_MOCK_INGREDIENTS[i] for i in [0, 3, 1, 2]]]
+        )
@@ -0,0 +1,130 @@
+from io import BytesIO
+from unittest.mock import create_autospec
+
+import pytest
+import requests
+
+from get_drunk_telegram_bot.bot.telegram import TelegramClient
+
+
+def make_response(status_code, json_data):
+    response = create_autospec(requests.Response, instance=True)
+    response.status_code = status_code
+    response.ok = status_code < 400
+    response.json.return_value = json_data
+    response.text = str(json_data)
+    return response
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def client(sleeps):
+    client = TelegramClient('token', max_retries=2, backoff=0.1, sleep=sleeps.append)
+    client.session = create_autospec(requests.Session, instance=True)
+    return client
+
+
+class TelegramClientTest:
+    def test_successful_call(self, client, sleeps):
+        client.session.post.return_value = make_response(200, {'ok': True})
+
+        assert client.call('sendMessage', data={'chat_id': 1}) == {'ok': True}
+        client.session.post.assert_called_once_with(
+            'https://api.telegram.org/bottoken/sendMessage',
+            data={'chat_id': 1},
+            files=None,
+            timeout=client.timeout,
+        )
+        assert sleeps == []
+        assert client.stats()['sendMessage']['calls'] == 1
+
+    def test_retry_after_is_honoured(self, client, sleeps):
+        client.session.post.side_effect = [
+            make_response(429, {'ok': False, 'parameters': {'retry_after': 7}}),
+            make_response(200, {'ok': True}),
+        ]
+
+        assert client.call('sendMessage') == {'ok': True}
+        assert sleeps == [7.0]
+        assert client.stats()['sendMessage']['retries'] == 1
+
+    def test_errors_are_retried_with_jittered_backoff(self, client, sleeps):
+        client.session.post.side_effect = [
+            requests.ConnectionError('reset'),
+            make_response(502, {'ok': False}),
+            make_response(200, {'ok': True}),
+        ]
+
+        assert client.call('sendMessage') == {'ok': True}
+        assert len(sleeps) == 2
+        assert 0 <= sleeps[0] <= 0.1 and 0 <= sleeps[1] <= 0.2
+
+    def test_gives_up_after_max_retries(self, client, sleeps):
+        client.session.post.side_effect = requests.ConnectionError('refused')
+
+        assert client.call('sendMessage') is None
+        stats = client.stats()['sendMessage']
+        assert stats['calls'] == 3
+        assert stats['retries'] == 2
+        assert stats['failures'] == 1
+
+    def test_sends_are_not_retried_after_read_timeout(self, client, sleeps):
+        client.session.post.side_effect = requests.ReadTimeout('read timeout')
+
+        assert client.call('sendMessage') is None
+        assert client.session.post.call_count == 1
+        assert client.stats()['sendMessage']['failures'] == 1
+
+    def test_idempotent_calls_are_retried_after_read_timeout(self, client, sleeps):
+        client.session.post.side_effect = [
+            requests.ReadTimeout('read timeout'),
+            make_response(200, {'ok': True}),
+        ]
+
+        assert client.call('getUpdates') == {'ok': True}
+        assert client.stats()['getUpdates']['retries'] == 1
+
+    def test_connect_timeouts_are_retried(self, client, sleeps):
+        client.session.post.side_effect = [
+            requests.ConnectTimeout('connect timeout'),
+            make_response(200, {'ok': True}),
+        ]
+
+        assert client.call('sendMessage') == {'ok': True}
+
+    def test_client_errors_are_not_retried(self, client, sleeps):
+        client.session.post.return_value = make_response(400, {'ok': False})
+
+        assert client.call('sendMessage') == {'ok': False}
+        assert client.session.post.call_count == 1
+        assert client.stats()['sendMessage']['failures'] == 1
+
+    def test_files_are_rewound_before_retry(self, client, sleeps):
+        photo = BytesIO(b'png')
+        positions = []
+
+        def post(url, data, files, timeout):
+            positions.append(files['photo'].tell())
+            files['photo'].read()
+            if len(positions) == 1:
+                return make_response(500, {'ok': False})
+            return make_response(200, {'ok': True})
+
+        client.session.post.side_effect = post
+        client.call('sendPhoto', files={'photo': photo})
+        assert positions == [0, 0]
+
+    def test_rate_limit_is_returned_to_the_caller(self, client, sleeps):
+        client.session.post.return_value = make_response(
+            429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 7}}
+        )
+
+        response = client.call('sendMessage', wait_on_rate_limit=False)
+        assert response == {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 7.0}}
+        assert client.session.post.call_count == 1
+        assert sleeps == []
+        assert client.stats()['sendMessage']['rate_limited'] == 1
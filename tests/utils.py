@@ -49,11 +49,29 @@ def client():
     with TelegramInterfaceMocker():
         test_app = create_server(FakeArgs())
         yield test_app.test_client()
+        # messages are processed in background, wait for them under the mock
+        test_app.extensions['chat_dispatcher'].close()
 
 
 class FakeArgs:
     token = None
     web_hook_url = None
+    api_url = 'https://api.telegram.org'
+    model_name = 'TFIdfCocktailModel'
+    cache_dir = None
+    bert_inference_mode = 'eager'
+    embed_workers = None
+    use_projection = False
+    rerank_top_n = None
+    similarity = 'exact'
+    workers = 2
+    queue_size = 100
+    http_pool_size = 10
+    http_timeout = 10
+    send_rate = 30
+    chat_send_rate = 1
+    dedup_window = 10000
+    dedup_file = None
     debug = False
 
 